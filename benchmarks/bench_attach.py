@@ -0,0 +1,113 @@
+# Benchmarks attaching to the game when it starts: the process watcher
+# (process_watcher.ProcessWatcher) against the previous loop that tried to attach by name
+# every WAIT_INTERVAL_PROCESS seconds and looked for the game module every WAIT_INTERVAL_MEMORY.
+#
+#   python benchmarks/bench_attach.py [--runs 4] [--module-delay 0.3]
+#
+# The worker waits on a simulated process table (250 unrelated processes, some starting
+# and exiting all the time) until the simulated game launches at a random point; the game
+# module loads --module-delay seconds later. Reports the "game start -> first HP sample"
+# latency and what is left of it after the module load, then the cost of one watcher poll.
+from argparse import ArgumentParser
+from random import Random
+from threading import Event, Thread
+from time import perf_counter, sleep, time
+
+from bench_common import DEFAULT_USER_CFG, AlwaysEnabled, StatusVar, percentile
+
+import config
+from input_injector import RecordingInjector
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from process_watcher import ProcessWatcher
+from worker import AutoPotionWorker
+
+
+# The backend before the process watcher: attach by name only.
+class NoTableBackend(SimulatedBackend):
+    def process_table(self):
+        raise NotImplementedError("no process table")
+
+
+# Starts and ends unrelated processes until stopped.
+def churn(table, stop):
+    rng = Random(2)
+    pids = []
+    while not stop.wait(0.01):
+        pids.append(table.start("short_lived.exe"))
+        if len(pids) > 20:
+            table.exit(pids.pop(rng.randrange(len(pids))))
+
+
+def launch_latency(backend_class, launch_after, module_delay):
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]))
+    game.terminate()
+    backend = backend_class(game)
+    stop = Event()
+    Thread(target=churn, args=(SimulatedBackend.process_table(backend), stop), daemon=True).start()
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=DEFAULT_USER_CFG,
+                              memory_backend=backend, input_injector=RecordingInjector())
+    worker.daemon = True
+    worker.start()
+    sleep(launch_after)
+    game.launch(module_loaded=False)
+    sleep(module_delay)
+    game.load_game_module()
+    while worker._max_hp is None:
+        sleep(0.001)
+    latency = time() - game.started_at
+    stop.set()
+    worker.stop()
+    worker.join()
+    return latency, worker.start_to_first_sample
+
+
+def report(label, latencies, module_delay):
+    latencies = sorted(latency * 1000 for latency in latencies)
+    print(f"  {label:<34} game start -> first HP sample p50 {percentile(latencies, 50):7.1f} ms   "
+          f"max {latencies[-1]:7.1f} ms   after module load p50 {percentile(latencies, 50) - module_delay * 1000:7.1f} ms")
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--runs", type=int, default=4)
+    parser.add_argument("--module-delay", type=float, default=0.3)
+    args = parser.parse_args()
+    rng = Random(1)
+    # Launch at a random point of the old attach loop's period.
+    launches = [rng.uniform(0.2, config.WAIT_INTERVAL_PROCESS) for _ in range(args.runs)]
+    print(f"Game launch to first HP sample ({args.runs} launches, module loads after {args.module_delay * 1000:g} ms):")
+
+    module_poll = config.MODULE_LOAD_POLL_INTERVAL
+    config.MODULE_LOAD_POLL_INTERVAL = config.WAIT_INTERVAL_MEMORY
+    old = [launch_latency(NoTableBackend, after, args.module_delay)[0] for after in launches]
+    report(f"attach by name every {config.WAIT_INTERVAL_PROCESS:g} s", old, args.module_delay)
+    config.MODULE_LOAD_POLL_INTERVAL = module_poll
+    runs = [launch_latency(SimulatedBackend, after, args.module_delay) for after in launches]
+    report(f"process watcher every {config.PROCESS_WATCH_INTERVAL * 1000:g} ms", [run[0] for run in runs],
+           args.module_delay)
+    print(f"  worker's own start_to_first_sample metric: "
+          f"{', '.join(f'{run[1] * 1000:.0f}' for run in runs)} ms")
+
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]))
+    game.terminate()
+    table = SimulatedBackend(game).process_table()
+    watcher = ProcessWatcher(table, config.PROCESS_NAME)
+    watcher.poll(initial=True)
+    rng = Random(3)
+    pids = []
+    polls = 2000
+    start = perf_counter()
+    for _ in range(polls):
+        # About one process start and exit per poll.
+        pids.append(table.start("short_lived.exe"))
+        if len(pids) > 20:
+            table.exit(pids.pop(rng.randrange(len(pids))))
+        watcher.poll()
+    per_poll_us = (perf_counter() - start) / polls * 1e6
+    print(f"Watcher poll over {len(table.pids())} processes: {per_poll_us:.1f} us "
+          f"({watcher.lookups} name lookups in {watcher.polls} polls), "
+          f"{per_poll_us / (config.PROCESS_WATCH_INTERVAL * 1e6) * 100:.3f}% of one core while the game is closed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# Benchmarks multi-chain pointer resolution (game_memory.MultiChainResolver) with the
+# chains of config.POINTER_CHAINS on a simulated game that holds all of them.
+#
+#   python benchmarks/bench_chain_failover.py [--duration 3]
+#
+# Reports the cost of a full pass over all chains, of revalidating the winner and
+# of a failover, then runs AutoPotionWorker and breaks the winning chain halfway:
+# the worker should switch chains inside the monitoring cycle, without a new
+# address search and without a gap in the samples.
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from io import StringIO
+from time import perf_counter_ns, sleep
+
+from bench_common import DEFAULT_USER_CFG, AlwaysEnabled, StatusVar, print_latency_ns
+
+import config
+import game_memory
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from worker import AutoPotionWorker
+
+STEADY_CURVE = [(0.0, 1000.0), (1.0, 900.0), (2.0, 1000.0)]
+MODULE_SIZE = 0x4500000
+
+
+def make_game():
+    primary_base, primary_offsets = config.POINTER_CHAINS[0]
+    game = SimulatedGame(ScriptedHpCurve(STEADY_CURVE), base_offset=primary_base, offsets=primary_offsets,
+                         module_size=MODULE_SIZE)
+    for base_offset, offsets in config.POINTER_CHAINS[1:]:
+        game.add_chain(base_offset, offsets)
+    return game
+
+
+# Worker that counts address searches and timestamps every HP read.
+class CountingWorker(AutoPotionWorker):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.read_timestamps_ns = []
+        self.address_searches = 0
+
+    def _initialize_for_active_logic(self):
+        self.address_searches += 1
+        return super()._initialize_for_active_logic()
+
+    def _read_current_hp_value(self):
+        current_hp = super()._read_current_hp_value()
+        self.read_timestamps_ns.append(perf_counter_ns())
+        return current_hp
+
+
+def bench_resolver(iterations):
+    game = make_game()
+    process = SimulatedBackend(game).attach(config.PROCESS_NAME)
+    resolver = game_memory.MultiChainResolver(process)
+
+    timings = []
+    for _ in range(iterations):
+        start = perf_counter_ns()
+        addr = resolver.resolve()
+        timings.append(perf_counter_ns() - start)
+        assert addr == game.hp_addr
+    print_latency_ns(f"full pass ({len(resolver.chains)} chains)", timings)
+
+    timings = []
+    for _ in range(iterations):
+        start = perf_counter_ns()
+        resolver.revalidate()
+        timings.append(perf_counter_ns() - start)
+    print_latency_ns("revalidate winner", timings)
+
+    timings = []
+    primary_base = resolver.chains[0][0]
+    primary_pointer = game.read_pointer(game.module_base + primary_base)
+    with redirect_stdout(StringIO()):
+        for _ in range(iterations):
+            game.break_chain(primary_base)
+            start = perf_counter_ns()
+            addr = resolver.failover()
+            timings.append(perf_counter_ns() - start)
+            assert addr == game.hp_addr and resolver.winner == 1
+            game.write_pointer(game.module_base + primary_base, primary_pointer)
+            resolver.resolve()
+    print_latency_ns("failover to backup", timings)
+
+
+def bench_worker_failover(duration):
+    config.INTERVAL = 0.01
+    game = make_game()
+    worker = CountingWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=dict(DEFAULT_USER_CFG),
+                            memory_backend=SimulatedBackend(game))
+    worker.daemon = True
+    worker.start()
+    sleep(duration / 2)
+    # A patch that keeps the HP in place but moves the primary static pointer
+    # and the player object: the cached address must be dropped.
+    game.break_chain(config.POINTER_CHAINS[0][0])
+    old_hp_addr = game.hp_addr
+    game.relocate_hop()
+    for base_offset, offsets in config.POINTER_CHAINS[1:]:
+        game.add_chain(base_offset, offsets)
+    game.write_float(old_hp_addr, float("nan"))
+    sleep(duration / 2)
+    worker.stop()
+    worker.join()
+
+    stamps = worker.read_timestamps_ns
+    gaps = [b - a for a, b in zip(stamps, stamps[1:])]
+    stats = worker._pointer_resolver.stats()
+    print(f"  samples {len(stamps)}, address searches {worker.address_searches}, failovers {stats['failovers']}")
+    print(f"  per-chain (ok, failed) {stats['chains']}")
+    print(f"  largest gap between samples {max(gaps) / 1e6:.1f} ms (interval {config.INTERVAL * 1000:.0f} ms)")
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+    print("Multi-chain resolution:")
+    bench_resolver(args.iterations)
+    print("Worker failover:")
+    bench_worker_failover(args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# Shared helpers for the benchmark scripts. Makes src/ importable and provides
+# the small stand-ins the worker expects from the GUI when it runs headless.
+from os import path
+from sys import path as sys_path
+
+sys_path.insert(0, path.join(path.dirname(path.abspath(__file__)), "..", "src"))
+
+import config  # noqa: E402
+
+# User config equivalent to a freshly generated config_user.ini.
+DEFAULT_USER_CFG = {
+    "HOTKEY_TOGGLE": config.HOTKEY_TOGGLE,
+    "HOTKEY_CLOSE": config.HOTKEY_CLOSE,
+    "HOTKEY_HIDE_SHOW": config.HOTKEY_HIDE_SHOW,
+    "HOTKEY_LOCK_MOVE": config.HOTKEY_LOCK_MOVE,
+    "POTION_KEY": config.POTION_KEY,
+    "POTION_COOLDOWN": config.POTION_COOLDOWN,
+    "THRESHOLD_PCT": config.THRESHOLD_PCT,
+    "STABLE_HP_DURATION": config.STABLE_HP_DURATION,
+    "INITIAL_POS_X": config.INITIAL_POS_X,
+    "INITIAL_POS_Y": config.INITIAL_POS_Y,
+    "DEVELOPER_DEBUG": False,
+}
+
+
+# Minimal replacement for the status text/color variables of the non-GUI path.
+class StatusVar:
+    def __init__(self):
+        self.value = None
+
+    def set(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+# Enabled flag that is always on, as if the toggle hotkey had been pressed.
+class AlwaysEnabled:
+    def get(self):
+        return True
+
+
+# Enabled flag the caller flips, like the toggle hotkey.
+class ToggleFlag:
+    def __init__(self, enabled):
+        self.enabled = enabled
+
+    def get(self):
+        return self.enabled
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+# Resident memory of this process in KiB (peak RSS where /proc is unavailable).
+def rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+# Prints mean/p50/p99/max of a list of nanosecond durations in microseconds.
+def print_latency_ns(label, values_ns):
+    values = sorted(values_ns)
+    if not values:
+        print(f"  {label:<32} no samples")
+        return
+    mean_us = sum(values) / len(values) / 1000.0
+    print(f"  {label:<32} n={len(values):<8} mean={mean_us:9.2f}us "
+          f"p50={percentile(values, 50) / 1000.0:9.2f}us "
+          f"p99={percentile(values, 99) / 1000.0:9.2f}us "
+          f"max={values[-1] / 1000.0:9.2f}us")
+
+
+# Counts emits in place of a Qt signal.
+class CountingSignal:
+    def __init__(self):
+        self.count = 0
+        self.last = None
+
+    def emit(self, *args):
+        self.count += 1
+        self.last = args
+
+
+# Stand-in for OverlayWindow as seen by the worker (its signals only).
+class FakeOverlay:
+    def __init__(self):
+        self.snapshot_signal = CountingSignal()
+        self.log_signal = CountingSignal()
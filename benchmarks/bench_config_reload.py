@@ -0,0 +1,103 @@
+# Benchmarks the user config snapshot (user_config.UserConfig) and its hot reload.
+#
+#   python benchmarks/bench_config_reload.py [--reloads 5] [--poll 0.05]
+#
+# Compares the per-read cost of the old dict lookup with fallback against the snapshot's
+# attribute, then runs AutoPotionWorker on a temporary config_user.ini, rewrites
+# THRESHOLD_PCT and POTION_KEY while it samples, and reports how long each change takes
+# to reach the worker and whether sampling kept going.
+from argparse import ArgumentParser
+from os import path, remove
+from tempfile import gettempdir
+from time import perf_counter, perf_counter_ns, sleep
+
+from bench_common import AlwaysEnabled, StatusVar
+
+import config
+from input_injector import RecordingInjector
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from user_config import ConfigWatcher, UserConfig, load_user_config
+from worker import AutoPotionWorker
+
+
+def write_ini(file_path, threshold_pct, potion_key):
+    with open(file_path, "w") as f:
+        f.write(f"[Potion]\nPOTION_KEY = {potion_key}\nTHRESHOLD_PCT = {threshold_pct}\nPOTION_COOLDOWN = 0.2\n")
+
+
+def bench_access(iterations):
+    user_cfg = {"THRESHOLD_PCT": 0.6, "POTION_KEY": "1"}
+    start = perf_counter_ns()
+    for _ in range(iterations):
+        pct = user_cfg['THRESHOLD_PCT'] if user_cfg else config.THRESHOLD_PCT
+        key = str(user_cfg['POTION_KEY'])
+    per_dict = (perf_counter_ns() - start) / iterations
+
+    cfg = UserConfig(user_cfg)
+    start = perf_counter_ns()
+    for _ in range(iterations):
+        pct = cfg.THRESHOLD_PCT
+        key = cfg.POTION_KEY
+    per_snapshot = (perf_counter_ns() - start) / iterations
+    assert pct == 0.6 and key == "1"
+    print(f"  dict lookup + fallback + str()   {per_dict:7.1f} ns per tick")
+    print(f"  snapshot attributes              {per_snapshot:7.1f} ns per tick")
+
+
+def bench_reload(reloads, poll):
+    file_path = path.join(gettempdir(), "le_autopot_bench_config.ini")
+    write_ini(file_path, 0.6, "1")
+    config.INTERVAL = 0.01
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]))
+    reads = [0]
+    read_float = game.read_float
+
+    def counting_read_float(addr):
+        reads[0] += 1
+        return read_float(addr)
+
+    game.read_float = counting_read_float
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=load_user_config(file_path),
+                              memory_backend=SimulatedBackend(game), input_injector=RecordingInjector())
+    worker.daemon = True
+    worker.start()
+    watcher = ConfigWatcher(worker.apply_user_config, file_path, interval=poll)
+    watcher.start()
+    sleep(0.5)
+
+    delays_ms = []
+    for i in range(reloads):
+        threshold_pct = 0.3 + 0.05 * i
+        samples = reads[0]
+        written = perf_counter()
+        write_ini(file_path, threshold_pct, str(i + 2))
+        while worker._threshold != 1000.0 * threshold_pct:
+            sleep(0.0005)
+        delays_ms.append((perf_counter() - written) * 1000)
+        sleep(0.3)
+        assert worker.user_cfg.POTION_KEY == str(i + 2)
+        print(f"  THRESHOLD_PCT -> {threshold_pct:.2f}: applied after {delays_ms[-1]:6.1f} ms, "
+              f"{reads[0] - samples} HP reads in the next 0.3 s")
+
+    watcher.stop()
+    worker.stop()
+    worker.join()
+    remove(file_path)
+    print(f"  {watcher.reloads} reloads, mean {sum(delays_ms) / len(delays_ms):.1f} ms "
+          f"(poll interval {poll * 1000:.0f} ms)")
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--reloads", type=int, default=5)
+    parser.add_argument("--poll", type=float, default=0.05)
+    parser.add_argument("--iterations", type=int, default=1000000)
+    args = parser.parse_args()
+    print("Config reads in the hot loop:")
+    bench_access(args.iterations)
+    print("Hot reload of config_user.ini:")
+    bench_reload(args.reloads, args.poll)
+
+
+if __name__ == "__main__":
+    main()
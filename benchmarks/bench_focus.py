@@ -0,0 +1,77 @@
+# Benchmarks the focus/pause logic of the monitoring loop with a scripted focus tracker.
+#
+#   python benchmarks/bench_focus.py [--cycles 10]
+#
+# Alternates game focus on and off and reports how long the worker takes to
+# pause after focus is lost (noticed on the next tick) and to take its next HP
+# sample after focus returns (the tracker wakes the paused worker), plus the
+# cost of the per-tick focus check.
+from argparse import ArgumentParser
+from time import perf_counter, perf_counter_ns, sleep
+
+from bench_common import DEFAULT_USER_CFG, AlwaysEnabled, StatusVar, print_latency_ns
+
+from focus_tracker import ScriptedFocusTracker
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from worker import AutoPotionWorker
+
+
+class TimedWorker(AutoPotionWorker):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.last_read = 0.0
+
+    def _read_current_hp_value(self):
+        self.last_read = perf_counter()
+        return super()._read_current_hp_value()
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--cycles", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    tracker = ScriptedFocusTracker(True)
+    status_text = StatusVar()
+    worker = TimedWorker(status_text, StatusVar(), AlwaysEnabled(), user_cfg=dict(DEFAULT_USER_CFG),
+                         memory_backend=SimulatedBackend(SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]))),
+                         focus_tracker_factory=lambda process: tracker)
+    worker.daemon = True
+    worker.start()
+    while worker.last_read == 0.0:
+        sleep(0.01)
+
+    pause_ns = []
+    resume_ns = []
+    for _ in range(args.cycles):
+        lost = perf_counter()
+        tracker.set_foreground(False)
+        while not status_text.get().startswith("PAUSED"):
+            sleep(0.0001)
+        pause_ns.append(int((perf_counter() - lost) * 1e9))
+        sleep(0.3)
+        regained = perf_counter()
+        tracker.set_foreground(True)
+        while worker.last_read < regained:
+            sleep(0.0001)
+        resume_ns.append(int((worker.last_read - regained) * 1e9))
+        sleep(0.2)
+
+    worker.signal_shutdown()
+    worker.join()
+
+    start = perf_counter_ns()
+    for _ in range(args.iterations):
+        if not tracker.is_foreground:
+            break
+    per_check = (perf_counter_ns() - start) / args.iterations
+
+    print("Focus tracking:")
+    print_latency_ns("focus lost -> paused", pause_ns)
+    print_latency_ns("focus regained -> HP sample", resume_ns)
+    print(f"  {'focus check per tick':<32} {per_check:9.1f} ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Measures how often an idle AutoPotionWorker wakes up and how much CPU it uses.
+#
+#   python benchmarks/bench_idle_wakeups.py [--duration 5]
+#
+# Runs three idle phases: disabled, enabled while waiting for a game process
+# that is not running, and enabled while paused because the game is not focused.
+# Also measures how fast a toggle reaches a worker that is blocked in a wait.
+from argparse import ArgumentParser
+from time import perf_counter, process_time, sleep
+
+from bench_common import DEFAULT_USER_CFG, StatusVar, ToggleFlag
+
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from worker import AutoPotionWorker
+
+
+def measure_phase(label, worker, duration):
+    worker.wakeups_per_second()
+    cpu_start = process_time()
+    sleep(duration)
+    cpu_used = process_time() - cpu_start
+    print(f"  {label:<28} wakeups/sec={worker.wakeups_per_second():8.2f}  cpu={cpu_used / duration * 100:6.2f}%")
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--duration", type=float, default=5.0)
+    args = parser.parse_args()
+
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]))
+    game.terminate()
+    backend = SimulatedBackend(game)
+    flag = ToggleFlag(False)
+    status_text = StatusVar()
+    worker = AutoPotionWorker(status_text, StatusVar(), flag, user_cfg=dict(DEFAULT_USER_CFG),
+                              memory_backend=backend)
+    worker.daemon = True
+    worker.start()
+
+    print("Idle worker:")
+    measure_phase("disabled", worker, args.duration)
+
+    flag.enabled = True
+    worker.wake()
+    measure_phase("waiting for process", worker, args.duration)
+
+    # Toggle latency: how long until a blocked worker notices it was disabled.
+    flag.enabled = False
+    started = perf_counter()
+    worker.wake()
+    while status_text.get() != "Auto Potion: OFF":
+        sleep(0.0001)
+    print(f"  {'toggle -> worker reacts':<28} {(perf_counter() - started) * 1000:8.2f} ms")
+
+    backend.games = [SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]))]
+    backend.games[0].set_foreground(False)
+    flag.enabled = True
+    worker.wake()
+    measure_phase("paused (game not focused)", worker, args.duration)
+
+    worker.signal_shutdown()
+    worker.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Measures "decision -> key sent" latency of the potion input injectors.
+#
+#   python benchmarks/bench_input_injection.py [--presses 2000] [--live]
+#
+# The recording injector shows the floor of the measurement itself. With --live
+# the real injectors press POTION_KEY (keyboard library everywhere, SendInput on
+# Windows), so focus a text editor first. Finally the worker runs against a
+# simulated game with bursts below the threshold and reports its own histogram.
+from argparse import ArgumentParser
+from time import perf_counter_ns, sleep
+
+from bench_common import DEFAULT_USER_CFG, AlwaysEnabled, StatusVar
+
+import config
+from input_injector import KeyboardLibInjector, RecordingInjector, SendInputInjector
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from worker import AutoPotionWorker
+
+BURST_CURVE = [(0.0, 1000.0), (0.2, 1000.0), (0.25, 400.0), (0.4, 1000.0)]
+
+
+def bench_injector(injector, presses, pause):
+    for _ in range(presses):
+        injector.inject(perf_counter_ns())
+        if pause:
+            sleep(pause)
+    print(f"  {type(injector).__name__:<20} {injector.latency.format_line()}")
+
+
+def bench_worker(duration):
+    config.INTERVAL = 0.005
+    injector = RecordingInjector()
+    game = SimulatedGame(ScriptedHpCurve(BURST_CURVE))
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=dict(DEFAULT_USER_CFG),
+                              memory_backend=SimulatedBackend(game), input_injector=injector)
+    worker.daemon = True
+    worker.start()
+    sleep(duration)
+    worker.stop()
+    worker.join()
+    print(f"  worker ({len(injector.sent)} potions) {injector.latency.format_line()}")
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--presses", type=int, default=2000)
+    parser.add_argument("--live", action="store_true")
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args()
+
+    print("Input injection (decision -> key sent):")
+    bench_injector(RecordingInjector(), args.presses, 0)
+    if args.live:
+        for injector_type in (KeyboardLibInjector, SendInputInjector):
+            try:
+                injector = injector_type(config.POTION_KEY)
+            except Exception as e:
+                print(f"  {injector_type.__name__:<20} unavailable: {e}")
+                continue
+            try:
+                bench_injector(injector, min(args.presses, 200), 0.01)
+            except Exception as e:
+                print(f"  {injector_type.__name__:<20} failed: {e}")
+    print("Worker with bursts below the threshold:")
+    bench_worker(args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# Benchmarks the logging of the worker side (logs.py) against the print() calls it replaced.
+#
+#   python benchmarks/bench_logging.py [--calls 200000] [--ticks 400] [--console-delay 0.01]
+#
+# First the cost of one debug message on a hot path while developer debug is off: the old
+# f-string plus debug_print flag check against a lazy log.debug call. Then a 5 ms tick loop
+# that logs one line per tick to a slow console (each write takes --console-delay), once
+# with a handler writing on the ticking thread (like print) and once through the queue to
+# the listener thread; reports the tick work time and how many ticks overran the period.
+from argparse import ArgumentParser
+from io import StringIO
+from logging import StreamHandler
+from time import perf_counter, sleep
+
+from bench_common import percentile
+
+import logs
+
+log = logs.get_logger("bench")
+
+
+# Console that takes `delay` seconds per write, like a slow or paused terminal.
+class SlowConsole(StringIO):
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+
+    def write(self, text):
+        sleep(self.delay)
+        return super().write(text)
+
+
+class OldDebugFlag:
+    DEVELOPER_DEBUG = False
+
+
+def old_debug_print(user_cfg, message):
+    if user_cfg.DEVELOPER_DEBUG:
+        print('> ' + message)
+
+
+def per_call_ns(fn, calls):
+    start = perf_counter()
+    fn(calls)
+    return (perf_counter() - start) / calls * 1e9
+
+
+def hot_path_cost(calls):
+    user_cfg = OldDebugFlag()
+    current_hp = 812.25
+
+    def old(n):
+        for _ in range(n):
+            old_debug_print(user_cfg, f"[DEBUG] HP: Determining Max HP... (Current: {current_hp:.0f})")
+
+    def lazy(n):
+        for _ in range(n):
+            log.debug("HP: Determining Max HP... (Current: %.0f)", current_hp)
+
+    print(f"Debug message with developer debug off ({calls} calls):")
+    print(f"  f-string + debug_print      {per_call_ns(old, calls):6.0f} ns/call")
+    print(f"  log.debug (lazy)            {per_call_ns(lazy, calls):6.0f} ns/call")
+
+
+def tick_loop(ticks, period=0.005):
+    busy = []
+    overruns = 0
+    deadline = perf_counter()
+    for tick in range(ticks):
+        start = perf_counter()
+        log.info("Tick %d: HP %.0f", tick, 1000.0 - tick)
+        end = perf_counter()
+        busy.append((end - start) * 1000)
+        deadline += period
+        if end > deadline:
+            overruns += 1
+            deadline = end
+        else:
+            sleep(deadline - end)
+    return sorted(busy), overruns
+
+
+def report(label, busy, overruns, ticks):
+    print(f"  {label:<28} log call p50 {percentile(busy, 50):6.3f} ms p99 {percentile(busy, 99):6.3f} ms   "
+          f"overran {overruns}/{ticks} ticks")
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--ticks", type=int, default=400)
+    parser.add_argument("--console-delay", type=float, default=0.01)
+    args = parser.parse_args()
+    hot_path_cost(args.calls)
+
+    print(f"5 ms ticks logging one line each, console write {args.console_delay * 1000:g} ms:")
+    root = logs._root
+    console = StreamHandler(SlowConsole(args.console_delay))
+    root.addHandler(console)
+    root.propagate = False
+    busy, overruns = tick_loop(args.ticks)
+    root.removeHandler(console)
+    report("written on the ticking thread", busy, overruns, args.ticks)
+
+    logs.start(log_file="", stream=SlowConsole(args.console_delay))
+    busy, overruns = tick_loop(args.ticks)
+    logs.stop()
+    report("queued to the listener", busy, overruns, args.ticks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Benchmarks the OpenMetrics endpoint (metrics.MetricsServer): what a scrape costs and
+# whether scraping disturbs the monitoring loop.
+#
+#   python benchmarks/bench_metrics.py [--interval 0.005] [--duration 3] [--scrapes-per-second 20]
+#
+# Runs the worker on the simulated game at a fixed sample period, once without and once
+# with a client scraping the endpoint, and reports the sample rate, the tick work time
+# and the start lateness of the ticks, then the scrape round trip and render time.
+from argparse import ArgumentParser
+from threading import Event, Thread
+from time import perf_counter, sleep
+from urllib.request import urlopen
+
+from bench_common import DEFAULT_USER_CFG, AlwaysEnabled, StatusVar, percentile
+
+import config
+from input_injector import RecordingInjector
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from metrics import MetricsServer, render_metrics
+from worker import AutoPotionWorker
+
+
+def scrape_loop(url, rate, stop, round_trips):
+    while not stop.wait(1.0 / rate):
+        start = perf_counter()
+        with urlopen(url) as response:
+            response.read()
+        round_trips.append((perf_counter() - start) * 1000)
+
+
+def run(label, interval, duration, scrape_rate):
+    config.INTERVAL = interval
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0), (0.5, 1000.0), (0.52, 300.0), (1.0, 1000.0)]))
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(),
+                              user_cfg=dict(DEFAULT_USER_CFG, ADAPTIVE_SAMPLING=False),
+                              memory_backend=SimulatedBackend(game), input_injector=RecordingInjector())
+    worker.daemon = True
+    server = MetricsServer(worker, 0)
+    server.start()
+    worker.start()
+    sleep(0.5)
+    stop = Event()
+    round_trips = []
+    if scrape_rate:
+        Thread(target=scrape_loop, args=(f"http://127.0.0.1:{server.port}/metrics", scrape_rate, stop, round_trips),
+               daemon=True).start()
+    samples_start = worker.sampling_stats.total_samples
+    worker.scheduler.busy.reset()
+    worker.scheduler.lateness.reset()
+    sleep(duration)
+    stop.set()
+    samples = worker.sampling_stats.total_samples - samples_start
+    busy = worker.scheduler.busy
+    lateness = worker.scheduler.lateness
+    render_ms = []
+    for _ in range(200):
+        start = perf_counter()
+        render_metrics(worker)
+        render_ms.append((perf_counter() - start) * 1000)
+    worker.stop()
+    worker.join()
+    server.stop()
+    print(f"  {label:<26} {samples / duration:6.1f} samples/s (nominal {1 / interval:.0f})   "
+          f"tick p50<={busy.percentile(50) / 1000:6.1f}us p99<={busy.percentile(99) / 1000:6.1f}us   "
+          f"late start p99<={lateness.percentile(99) / 1000:7.1f}us")
+    return sorted(round_trips), sorted(render_ms)
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--interval", type=float, default=0.005)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--scrapes-per-second", type=float, default=20.0)
+    args = parser.parse_args()
+    print(f"Monitoring loop, {args.interval * 1000:g} ms sample period, {args.duration:g} s:")
+    run("no scrapes", args.interval, args.duration, 0)
+    round_trips, render_ms = run(f"{args.scrapes_per_second:g} scrapes/s", args.interval, args.duration,
+                                 args.scrapes_per_second)
+    print(f"Scrape round trip p50 {percentile(round_trips, 50):.2f} ms p99 {percentile(round_trips, 99):.2f} ms "
+          f"({len(round_trips)} scrapes), render p50 {percentile(render_ms, 50) * 1000:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
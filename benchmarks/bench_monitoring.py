@@ -0,0 +1,104 @@
+# Benchmarks the HP monitoring hot loop against a simulated game process.
+#
+#   python benchmarks/bench_monitoring.py [--duration 3] [--interval 0]
+#
+# Reports pointer-resolution cost of game_memory.get_hp_address and of a cached
+# PointerChainResolver revalidation (relocating the player object every 1000
+# calls), then runs AutoPotionWorker for --duration seconds and reports
+# samples/sec and the per-tick latency of _perform_hp_monitoring_cycle, once
+# plain and once with the per-stage latency instrumentation enabled.
+from argparse import ArgumentParser
+from time import perf_counter, perf_counter_ns, sleep
+
+from bench_common import DEFAULT_USER_CFG, AlwaysEnabled, StatusVar, print_latency_ns
+
+import config
+import game_memory
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from worker import AutoPotionWorker
+
+# HP stays above the default 60% threshold so no key is ever sent.
+STEADY_DAMAGE_CURVE = [(0.0, 1000.0), (0.5, 950.0), (1.0, 800.0), (1.5, 700.0), (2.0, 1000.0)]
+
+
+# Worker that timestamps every HP read of the monitoring cycle.
+class TimedWorker(AutoPotionWorker):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.read_timestamps_ns = []
+
+    def _read_current_hp_value(self):
+        current_hp = super()._read_current_hp_value()
+        self.read_timestamps_ns.append(perf_counter_ns())
+        return current_hp
+
+
+def bench_pointer_resolution(iterations):
+    game = SimulatedGame(ScriptedHpCurve(STEADY_DAMAGE_CURVE))
+    process = SimulatedBackend(game).attach(config.PROCESS_NAME)
+    timings = []
+    for _ in range(iterations):
+        start = perf_counter_ns()
+        addr = game_memory.get_hp_address(process)
+        timings.append(perf_counter_ns() - start)
+        assert addr == game.hp_addr
+    print_latency_ns("get_hp_address", timings)
+
+    resolver = game_memory.PointerChainResolver(process)
+    resolver.resolve()
+    timings = []
+    for i in range(iterations):
+        if i % 1000 == 999:
+            game.relocate_hop()
+        start = perf_counter_ns()
+        addr = resolver.revalidate()
+        timings.append(perf_counter_ns() - start)
+        assert addr == game.hp_addr
+    print_latency_ns("PointerChainResolver.revalidate", timings)
+    print(f"  resolver counters {resolver.stats()}")
+
+
+def bench_monitoring_cycle(duration, interval, instrumented=False):
+    config.INTERVAL = interval
+    game = SimulatedGame(ScriptedHpCurve(STEADY_DAMAGE_CURVE))
+    user_cfg = dict(DEFAULT_USER_CFG, DEVELOPER_DEBUG=instrumented)
+    worker = TimedWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=user_cfg,
+                         memory_backend=SimulatedBackend(game))
+    worker.daemon = True
+    worker.start()
+    sleep(duration)
+    worker.stop()
+    worker.join()
+
+    stamps = worker.read_timestamps_ns
+    if len(stamps) < 2:
+        print("  no HP samples were taken")
+        return
+    elapsed = (stamps[-1] - stamps[0]) / 1e9
+    print(f"  samples/sec (INTERVAL={interval:g})  {(len(stamps) - 1) / elapsed:12.1f}")
+    print_latency_ns("tick period", [b - a for a, b in zip(stamps, stamps[1:])])
+    if worker._pointer_resolver is not None:
+        print(f"  resolver counters {worker._pointer_resolver.stats()}")
+    if instrumented:
+        worker.dump_latency_stats()
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--interval", type=float, default=0.0)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    print("Pointer resolution:")
+    bench_pointer_resolution(args.iterations)
+    print("Monitoring cycle:")
+    started = perf_counter()
+    bench_monitoring_cycle(args.duration, args.interval)
+    print(f"  wall time {perf_counter() - started:.2f}s")
+    print("Monitoring cycle with latency instrumentation (developer mode):")
+    bench_monitoring_cycle(args.duration, args.interval, instrumented=True)
+
+
+if __name__ == "__main__":
+    main()
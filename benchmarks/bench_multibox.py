@@ -0,0 +1,127 @@
+# Benchmarks guarding N game clients from one multibox instance (multibox.MultiboxWorker)
+# against N separate instances of the tool, one per client.
+#
+#   python benchmarks/bench_multibox.py [--clients 1 2 4 8] [--duration 5] [--interval 0.02]
+#
+# Every instance is a fresh interpreter running the headless front end (worker plus
+# console status thread) on simulated game clients that take a hit below the threshold
+# every second. Reports the total resident memory (without the simulated games' memory
+# images), threads, CPU time, and per client the sample rate and the potions sent.
+import json
+from argparse import ArgumentParser
+from io import StringIO
+from os import path, times
+from subprocess import PIPE, Popen
+from sys import executable
+
+from bench_common import rss_kb
+
+# A hit to 40% every second.
+HIT_CURVE = [(0.0, 1000.0), (0.5, 1000.0), (0.52, 400.0), (0.7, 1000.0), (1.0, 1000.0)]
+
+
+# Runs inside the child process: guards `clients` simulated games for `duration` seconds.
+def child(clients, multibox, duration, interval):
+    import threading
+    from time import sleep
+
+    import config
+    from headless import ConsoleStatusLine, _IgnoredStatusColor, EnabledFlag
+    from input_injector import RecordingInjector
+    from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+    from user_config import UserConfig
+
+    config.INTERVAL = interval
+    config.MULTIBOX_SCAN_INTERVAL = 0.2
+    before_games = rss_kb()
+    games = [SimulatedGame(ScriptedHpCurve(HIT_CURVE), pid=1000 + i) for i in range(clients)]
+    games_kb = rss_kb() - before_games
+    user_cfg = UserConfig({"MULTIBOX": multibox, "STABLE_HP_DURATION": 0.3})
+    status = ConsoleStatusLine(user_cfg.OVERLAY_REFRESH_RATE, stream=StringIO())
+    injectors = []
+
+    def make_injector(key):
+        injectors.append(RecordingInjector(key))
+        return injectors[-1]
+
+    if multibox:
+        from multibox import MultiboxWorker, StatusSlots
+        slots = StatusSlots(status)
+        worker = MultiboxWorker(slots.slot(-1), _IgnoredStatusColor(), EnabledFlag(True), user_cfg=user_cfg,
+                                memory_backend=SimulatedBackend(*games),
+                                client_view=lambda slot: {"status_text_var": slots.slot(slot, f"#{slot + 1} "),
+                                                          "status_color_var": _IgnoredStatusColor(),
+                                                          "add_potion_log_callback": status.add_potion_log},
+                                injector_factory=lambda process, key, kind: make_injector(key))
+    else:
+        from worker import AutoPotionWorker
+        worker = AutoPotionWorker(status, _IgnoredStatusColor(), EnabledFlag(True),
+                                  add_potion_log_callback=status.add_potion_log, user_cfg=user_cfg,
+                                  memory_backend=SimulatedBackend(*games),
+                                  injector_factory=lambda key, kind: make_injector(key))
+    worker.daemon = True
+    status.start()
+    worker.start()
+    sleep(1.0)
+    cpu_start = times()
+    sent_start = sum(len(injector.sent) for injector in injectors)
+    sleep(duration)
+    cpu_end = times()
+    if multibox:
+        samples = [client.sampling_stats.samples_per_second() for client in worker.clients if client is not None]
+    else:
+        samples = [worker.sampling_stats.samples_per_second()]
+    result = {
+        "rss_kb": rss_kb() - games_kb,
+        "threads": threading.active_count(),
+        "cpu_s": (cpu_end.user - cpu_start.user) + (cpu_end.system - cpu_start.system),
+        "samples_per_second": samples,
+        "potions": sum(len(injector.sent) for injector in injectors) - sent_start,
+    }
+    print("RESULT " + json.dumps(result), flush=True)
+
+
+def run_children(count, clients, multibox, duration, interval):
+    procs = [Popen([executable, path.abspath(__file__), "--child", str(clients), str(int(multibox)),
+                    str(duration), str(interval)], stdout=PIPE, stderr=PIPE, text=True) for _ in range(count)]
+    results = []
+    for proc in procs:
+        out, err = proc.communicate(timeout=duration + 60)
+        line = next((l for l in out.splitlines() if l.startswith("RESULT ")), None)
+        if line is None:
+            raise RuntimeError(f"child failed:\n{out}\n{err}")
+        results.append(json.loads(line[7:]))
+    return results
+
+
+def report(label, results, duration):
+    rates = [rate for result in results for rate in result["samples_per_second"]]
+    print(f"  {label:<22} RSS {sum(r['rss_kb'] for r in results) / 1024:7.1f} MB   "
+          f"threads {sum(r['threads'] for r in results):3d}   "
+          f"CPU {sum(r['cpu_s'] for r in results) / duration * 100:5.1f}%   "
+          f"samples/s per client {min(rates):5.1f}-{max(rates):5.1f}   "
+          f"potions {sum(r['potions'] for r in results):3d}")
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--interval", type=float, default=0.02)
+    parser.add_argument("--child", nargs=4)
+    args = parser.parse_args()
+    if args.child:
+        clients, multibox, duration, interval = args.child
+        child(int(clients), multibox == "1", float(duration), float(interval))
+        return
+
+    print(f"Guarding N clients, {args.interval * 1000:g} ms sample period, {args.duration:g} s:")
+    for n in args.clients:
+        print(f" N = {n}")
+        report(f"{n} separate instance{'s' if n > 1 else ''}",
+               run_children(n, 1, False, args.duration, args.interval), args.duration)
+        report("1 multibox instance", run_children(1, n, True, args.duration, args.interval), args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# Counts overlay updates the worker publishes with the change-only display channel.
+#
+#   python benchmarks/bench_overlay_updates.py [--duration 4]
+#
+# Runs the worker at the default INTERVAL against a trace that sits at full HP
+# and then takes damage, and compares the snapshots emitted with the three
+# signals per tick the overlay used to receive.
+from argparse import ArgumentParser
+from time import sleep
+
+from bench_common import DEFAULT_USER_CFG, AlwaysEnabled, FakeOverlay
+
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from worker import AutoPotionWorker
+
+TRACES = {
+    "full HP, idle": [(0.0, 1000.0), (1.0, 1000.0)],
+    "regular damage": [(0.0, 1000.0), (1.0, 1000.0), (1.5, 750.0), (2.0, 1000.0)],
+}
+
+
+def run(name, keyframes, duration):
+    overlay = FakeOverlay()
+    worker = AutoPotionWorker(None, None, AlwaysEnabled(), gui=overlay, user_cfg=dict(DEFAULT_USER_CFG),
+                              memory_backend=SimulatedBackend(SimulatedGame(ScriptedHpCurve(keyframes))))
+    worker.daemon = True
+    worker.start()
+    sleep(duration)
+    worker.stop()
+    worker.join()
+    display = worker._display
+    ticks = worker.sampling_stats.samples
+    print(f"  {name:<16} ticks={ticks:5d}  emitted={display.emitted:5d}  suppressed={display.suppressed:5d}  "
+          f"cross-thread events: {overlay.snapshot_signal.count} (was {3 * ticks})")
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--duration", type=float, default=4.0)
+    args = parser.parse_args()
+    print("Overlay updates:")
+    for name, keyframes in TRACES.items():
+        run(name, keyframes, args.duration)
+
+
+if __name__ == "__main__":
+    main()
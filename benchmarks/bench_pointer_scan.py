@@ -0,0 +1,98 @@
+# Recovers the HP pointer chain of a "patched" SimulatedGame with the pointer
+# scanner and reports the time of each step.
+#
+#   python benchmarks/bench_pointer_scan.py [--heap-mb 256] [--workers N]
+#
+# The simulated game uses the backup chain from config.py as its real layout and
+# adds heap regions full of unrelated pointers plus decoy floats equal to the HP.
+from argparse import ArgumentParser
+from os import path, remove
+from tempfile import gettempdir
+from time import perf_counter
+
+import numpy
+from bench_common import config  # noqa: F401  (puts src/ on the path)
+
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from memory_dump import MemoryImage, capture, pages_covering
+from pointer_scanner import PointerScanner, format_chain
+
+PATCHED_BASE_OFFSET = 0x44DF308
+PATCHED_OFFSETS = [0x88, 0xE98, 0x30, 0x6C]
+NOISE_REGION_SIZE = 16 * 1024 * 1024
+
+
+# Fills heap regions with pointers into each other and plants decoy HP values.
+def add_noise(game, heap_mb, hp, seed=3):
+    rng = numpy.random.default_rng(seed)
+    starts = [0x0000_0300_0000_0000 + i * 0x1000_0000 for i in range(max(1, heap_mb * 1024 * 1024 // NOISE_REGION_SIZE))]
+    buffers = [game.map_region(start, NOISE_REGION_SIZE) for start in starts]
+    for buf in buffers:
+        words = numpy.frombuffer(buf, dtype="<u8")
+        pointer_slots = rng.random(len(words)) < 0.2
+        targets = numpy.array(starts, dtype=numpy.uint64)[rng.integers(0, len(starts), len(words))]
+        words[pointer_slots] = (targets + rng.integers(0, NOISE_REGION_SIZE // 8, len(words)).astype(numpy.uint64) * 8)[pointer_slots]
+        floats = numpy.frombuffer(buf, dtype="<f4")
+        floats[rng.integers(0, len(floats), 2000)] = hp
+    # A few pointers from the module's static image into the noise.
+    static = numpy.frombuffer(game.module_image, dtype="<u8")
+    static[rng.integers(0, len(static), 5000)] = numpy.array(starts, dtype=numpy.uint64)[0] + rng.integers(0, NOISE_REGION_SIZE // 8, 5000).astype(numpy.uint64) * 8
+
+
+def timed(label, fn):
+    started = perf_counter()
+    result = fn()
+    print(f"  {label:<34} {perf_counter() - started:7.2f}s")
+    return result
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--heap-mb", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    now = [0.0]
+    curve = ScriptedHpCurve([(0.0, 1250.0), (10.0, 980.0), (20.0, 1100.0)], loop=False)
+    game = SimulatedGame(curve, base_offset=PATCHED_BASE_OFFSET, offsets=PATCHED_OFFSETS, clock=lambda: now[0])
+    add_noise(game, args.heap_mb, 1250.0)
+    game.write_float(game.hp_addr, 1250.0)
+    process = SimulatedBackend(game).attach(game.process_name)
+    scanner = PointerScanner(workers=args.workers)
+
+    first = path.join(gettempdir(), "le_autopot_bench_first.dmp")
+    pages = path.join(gettempdir(), "le_autopot_bench_pages.dmp")
+    final = path.join(gettempdir(), "le_autopot_bench_final.dmp")
+    print(f"Pointer scan ({args.heap_mb} MB noise heap, {scanner.workers} workers):")
+    timed("full dump", lambda: capture(process, first, game.module_name))
+    with MemoryImage(first) as image:
+        print(f"  dump size {image.total_size() / 1e6:.0f} MB in {len(image.regions)} regions")
+        count = timed("value scan (HP 1250)", lambda: scanner.scan_value(image, 1250.0))
+    print(f"    {count} candidates")
+
+    now[0] = 10.0
+    timed("candidate page dump", lambda: capture(process, pages, game.module_name,
+                                                 regions=pages_covering(scanner.candidates.tolist())))
+    with MemoryImage(pages) as image:
+        count = timed("narrow (HP 980)", lambda: scanner.scan_value(image, 980.0))
+    print(f"    {count} candidates")
+
+    now[0] = 20.0
+    timed("final dump", lambda: capture(process, final, game.module_name))
+    with MemoryImage(final) as image:
+        timed("value check (HP 1100)", lambda: scanner.scan_value(image, 1100.0))
+        paths = timed("reverse index + chain search", lambda: scanner.find_paths(image))
+        print(f"    index of {scanner.index_size:,} pointers, {len(paths)} chains")
+    with MemoryImage(first) as image:
+        paths = timed("narrow chains (first dump)", lambda: scanner.narrow_paths(image, 1250.0))
+
+    expected = [PATCHED_BASE_OFFSET, PATCHED_OFFSETS]
+    print(f"  {len(paths)} chain(s) left; patched chain {'FOUND' if expected in paths else 'MISSING'}")
+    if paths:
+        print("  best:\n    " + format_chain(*paths[0]).replace("\n", "\n    "))
+    for dump in (first, pages, final):
+        remove(dump)
+
+
+if __name__ == "__main__":
+    main()
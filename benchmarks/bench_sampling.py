@@ -0,0 +1,92 @@
+# Compares fixed-rate and adaptive HP sampling under the same scripted damage trace.
+#
+#   python benchmarks/bench_sampling.py [--duration 6]
+#
+# For each mode reports the effective sample rate, the worker's own threshold
+# crossing detection latency, and the reaction latency measured against the
+# true crossing times of the scripted curve (crossing -> potion key).
+from argparse import ArgumentParser
+from time import perf_counter, sleep
+
+from bench_common import DEFAULT_USER_CFG, AlwaysEnabled, StatusVar, percentile
+
+from input_injector import RecordingInjector
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from worker import AutoPotionWorker
+
+MAX_HP = 1000.0
+# Calm at full HP, a fast burst, recovery, then a slow damage-over-time slide.
+DAMAGE_TRACE = [
+    (0.0, MAX_HP), (1.2, MAX_HP), (1.28, 450.0), (1.6, MAX_HP),
+    (2.4, MAX_HP), (2.43, 700.0), (2.5, 520.0), (2.9, MAX_HP),
+    (3.6, MAX_HP), (4.4, 550.0), (4.7, MAX_HP), (5.0, MAX_HP),
+]
+
+
+# Times at which the looped curve falls below the threshold, within one loop.
+def true_crossings(curve, threshold, loop_duration, step=0.0001):
+    crossings = []
+    prev_above = curve(0.0) >= threshold
+    t = step
+    while t < loop_duration:
+        above = curve(t) >= threshold
+        if prev_above and not above:
+            crossings.append(t)
+        prev_above = above
+        t += step
+    return crossings
+
+
+def run_mode(label, adaptive, duration):
+    injector = RecordingInjector(clock=perf_counter)
+    fire_times = injector.sent
+
+    user_cfg = dict(DEFAULT_USER_CFG, ADAPTIVE_SAMPLING=adaptive)
+    curve = ScriptedHpCurve(DAMAGE_TRACE)
+    game = SimulatedGame(curve)
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=user_cfg,
+                              memory_backend=SimulatedBackend(game), input_injector=injector)
+    worker.daemon = True
+    worker.start()
+    sleep(duration)
+    stats = worker.sampling_stats
+    samples_per_second = stats.samples_per_second()
+    worker.stop()
+    worker.join()
+
+    loop_duration = DAMAGE_TRACE[-1][0]
+    threshold = MAX_HP * user_cfg["THRESHOLD_PCT"]
+    crossings = true_crossings(curve, threshold, loop_duration)
+    start = game._start_time
+    reaction_ms = []
+    fired = sorted(t - start for t in fire_times)
+    loops = int(duration // loop_duration) + 1
+    for n in range(loops):
+        for crossing in crossings:
+            t_cross = n * loop_duration + crossing
+            later = [t for t in fired if t >= t_cross]
+            if later and later[0] - t_cross < 1.0:
+                reaction_ms.append((later[0] - t_cross) * 1000.0)
+    reaction_ms.sort()
+
+    print(f"  {label}")
+    print(f"    samples/sec               {samples_per_second:10.1f}")
+    print(f"    detection latency (worker) mean={stats.mean_detection_latency() * 1000:7.2f} ms "
+          f"max={stats.detection_latency_max * 1000:7.2f} ms over {stats.crossings} crossings")
+    if reaction_ms:
+        print(f"    crossing -> potion key     mean={sum(reaction_ms) / len(reaction_ms):7.2f} ms "
+              f"p99={percentile(reaction_ms, 99):7.2f} ms over {len(reaction_ms)} crossings")
+    print(f"    potions sent              {len(fire_times):10d}")
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--duration", type=float, default=6.0)
+    args = parser.parse_args()
+    print("HP sampling:")
+    run_mode("fixed INTERVAL", False, args.duration)
+    run_mode("adaptive", True, args.duration)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# Benchmarks the deadline scheduler of the monitoring loop (sampling.DeadlineScheduler)
+# against the previous "work, then sleep INTERVAL" loop.
+#
+#   python benchmarks/bench_scheduler.py [--interval 0.01] [--ticks 400]
+#
+# Both loops do 1-3 ms of work per tick, with a stall longer than two periods every
+# 50 ticks (like a slow pointer re-resolution). Reports the mean period, the drift from
+# the nominal schedule at the end, the period jitter and the missed deadlines. Then runs
+# the worker on the simulated game with the same stalls in its HP reads, in both
+# monitoring modes, and prints the scheduler's own counters.
+from argparse import ArgumentParser
+from random import Random
+from threading import Event
+from time import perf_counter, sleep
+
+from bench_common import DEFAULT_USER_CFG, AlwaysEnabled, StatusVar, percentile
+
+import config
+from input_injector import RecordingInjector
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from sampling import DeadlineScheduler
+from worker import AutoPotionWorker
+
+STALL_EVERY = 50
+
+
+def work(rng, tick, interval):
+    end = perf_counter() + (2.5 * interval if tick % STALL_EVERY == STALL_EVERY - 1 else rng.uniform(0.001, 0.003))
+    while perf_counter() < end:
+        pass
+
+
+def report(label, starts, interval, missed):
+    periods = [b - a for a, b in zip(starts, starts[1:])]
+    # Jitter around the nominal period, leaving out the stalled ticks themselves.
+    jitter_ms = sorted(abs(p - interval) * 1000 for i, p in enumerate(periods) if i % STALL_EVERY != STALL_EVERY - 1)
+    drift_ms = (starts[-1] - starts[0] - (len(starts) - 1 + missed) * interval) * 1000
+    print(f"  {label:<28} mean period {sum(periods) / len(periods) * 1000:7.2f} ms   drift {drift_ms:8.1f} ms   "
+          f"jitter p50 {percentile(jitter_ms, 50):6.3f} ms p90 {percentile(jitter_ms, 90):6.3f} ms "
+          f"p99 {percentile(jitter_ms, 99):6.3f} ms   "
+          f"missed {missed}")
+
+
+def fixed_sleep_loop(interval, ticks):
+    rng = Random(1)
+    wait = Event().wait
+    starts = []
+    for tick in range(ticks):
+        starts.append(perf_counter())
+        work(rng, tick, interval)
+        wait(interval)
+    return starts, 0
+
+
+def deadline_loop(interval, ticks):
+    rng = Random(1)
+    wait = Event().wait
+    scheduler = DeadlineScheduler()
+    starts = []
+    for tick in range(ticks):
+        starts.append(scheduler.begin_tick())
+        # Deadlines skipped before this tick.
+        missed = scheduler.missed
+        work(rng, tick, interval)
+        deadline = scheduler.schedule(interval)
+        remaining = deadline - perf_counter() - scheduler.spin
+        if remaining > 0:
+            wait(remaining)
+        scheduler.spin_until(deadline)
+    return starts, missed
+
+
+def run_worker(label, split, interval, duration):
+    config.INTERVAL = interval
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]))
+    rng = Random(1)
+    reads = [0]
+    read_float = game.read_float
+
+    def stalling_read_float(addr):
+        reads[0] += 1
+        work(rng, reads[0] - 1, interval)
+        return read_float(addr)
+
+    game.read_float = stalling_read_float
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(),
+                              user_cfg=dict(DEFAULT_USER_CFG, SPLIT_SAMPLER_THREAD=split),
+                              memory_backend=SimulatedBackend(game), input_injector=RecordingInjector())
+    worker.daemon = True
+    worker.start()
+    sleep(duration)
+    scheduler = worker.scheduler
+    line = scheduler.format_line()
+    rate = worker.sampling_stats.samples_per_second()
+    worker.stop()
+    worker.join()
+    print(f"  {label:<28} {rate:6.1f} samples/s (nominal {1 / interval:.0f}), {line}")
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--interval", type=float, default=0.01)
+    parser.add_argument("--ticks", type=int, default=400)
+    args = parser.parse_args()
+    print(f"Tick loop, {args.interval * 1000:g} ms period, {args.ticks} ticks:")
+    starts, missed = fixed_sleep_loop(args.interval, args.ticks)
+    report("work + fixed sleep", starts, args.interval, missed)
+    starts, missed = deadline_loop(args.interval, args.ticks)
+    report("deadline scheduler", starts, args.interval, missed)
+    duration = args.interval * args.ticks
+    print(f"AutoPotionWorker with stalling HP reads ({duration:g} s):")
+    run_worker("single thread", False, args.interval, duration)
+    run_worker("split sampler thread", True, args.interval, duration)
+
+
+if __name__ == "__main__":
+    main()
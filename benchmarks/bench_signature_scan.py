@@ -0,0 +1,71 @@
+# Times signature mode (signature_scan.find_base_offset) on a simulated ~100 MB
+# GameAssembly.dll: a PE header, a 64 MB code section of random bytes and one
+# instruction referencing BASE_OFFSET. Runs a cold scan and a cached lookup, then
+# resolves the HP chain in signature mode.
+#
+#   python benchmarks/bench_signature_scan.py
+from os import path, remove, urandom
+from random import Random
+from struct import pack_into
+from tempfile import gettempdir
+from time import perf_counter
+
+from bench_common import config
+
+import game_memory
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from signature_scan import find_base_offset
+
+MODULE_SIZE = 0x6400000
+TEXT_START = 0x1000
+TEXT_END = 0x4000000
+SIGNATURE = "48 8B 05 ?? ?? ?? ?? 48 8B 88 B8 00 00 00"
+
+
+# Writes a minimal PE header (.text up to text_end, .data after it) and the referencing instruction.
+def build_module_image(game, timestamp=0x65F0_1234, seed=5, text_end=TEXT_END):
+    image = game.module_image
+    image[TEXT_START:text_end] = urandom(text_end - TEXT_START)
+    image[0:2] = b"MZ"
+    pe = 0x80
+    pack_into("<I", image, 0x3C, pe)
+    image[pe:pe + 4] = b"PE\0\0"
+    pack_into("<HHIIIHH", image, pe + 4, 0x8664, 2, timestamp, 0, 0, 0xF0, 0x22)
+    table = pe + 24 + 0xF0
+    pack_into("<8sIIIIIIHHI", image, table, b".text", text_end - TEXT_START, TEXT_START, 0, 0, 0, 0, 0, 0, 0x60000020)
+    pack_into("<8sIIIIIIHHI", image, table + 40, b".data", len(image) - text_end, text_end, 0, 0, 0, 0, 0, 0, 0xC0000040)
+
+    at = Random(seed).randrange(TEXT_START, text_end - 16)
+    image[at:at + 3] = bytes.fromhex("488B05")
+    pack_into("<i", image, at + 3, game.base_offset - (at + 7))
+    image[at + 7:at + 14] = bytes.fromhex("488B88B8000000")
+    return at
+
+
+def main():
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]), module_size=MODULE_SIZE)
+    at = build_module_image(game)
+    process = SimulatedBackend(game).attach(game.process_name)
+    cache_file = path.join(gettempdir(), "le_autopot_signature_cache.json")
+    if path.exists(cache_file):
+        remove(cache_file)
+
+    print(f"Signature scan ({MODULE_SIZE / 1e6:.0f} MB module, {(TEXT_END - TEXT_START) / 1e6:.0f} MB code, match at 0x{at:X}):")
+    started = perf_counter()
+    base_offset = find_base_offset(process, signature_text=SIGNATURE, cache_file=cache_file)
+    print(f"  cold scan       {(perf_counter() - started) * 1000:8.1f} ms -> BASE_OFFSET 0x{base_offset:X} "
+          f"({'OK' if base_offset == game.base_offset else 'WRONG'})")
+    started = perf_counter()
+    base_offset = find_base_offset(process, signature_text=SIGNATURE, cache_file=cache_file)
+    print(f"  cached lookup   {(perf_counter() - started) * 1000:8.1f} ms -> BASE_OFFSET 0x{base_offset:X}")
+
+    config.BASE_SIGNATURE = SIGNATURE
+    config.SIGNATURE_CACHE_FILE = cache_file
+    resolver = game_memory.PointerChainResolver(process)
+    hp_addr = resolver.resolve()
+    print(f"  signature-mode resolve: HP address {'OK' if hp_addr == game.hp_addr else 'WRONG'}")
+    remove(cache_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# Benchmarks the overlay's HP sparkline (gui_qt.HpSparkline) under the offscreen Qt platform.
+#
+#   python benchmarks/bench_sparkline.py [--duration 5] [--frames 2000]
+#
+# Runs the overlay on a simulated game that takes damage every second, once without and
+# once with the sparkline, and reports the CPU time of the GUI thread. Then times one
+# sparkline frame (the slots since the last frame and their partial repaint) against
+# repainting the whole sparkline.
+from argparse import ArgumentParser
+from os import environ
+from random import Random
+from time import perf_counter, thread_time
+
+environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from bench_common import DEFAULT_USER_CFG, percentile
+
+import config
+from input_injector import RecordingInjector
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication
+import gui_qt
+from gui_qt import HpSparkline, OverlayWindow
+from worker import AutoPotionWorker
+
+# A hit to 40% every second.
+HIT_CURVE = [(0.0, 1000.0), (0.5, 1000.0), (0.52, 400.0), (0.7, 1000.0), (1.0, 1000.0)]
+
+
+class BenchOverlay(OverlayWindow):
+    def print_startup_info(self):
+        pass
+
+    def _register_hotkey(self):
+        self.auto_potion_enabled = True
+
+    def _start_worker(self):
+        self.worker_thread = AutoPotionWorker(None, None, self, add_potion_log_callback=self.add_potion_log,
+                                              gui=self, user_cfg=self.user_cfg,
+                                              memory_backend=SimulatedBackend(SimulatedGame(ScriptedHpCurve(HIT_CURVE))),
+                                              input_injector=RecordingInjector())
+        self.worker_thread.daemon = True
+        self.worker_thread.start()
+
+
+# GUI thread CPU share while the overlay shows a damaged character for `duration` seconds.
+def overlay_cpu(app, sparkline_seconds, duration):
+    window = BenchOverlay(dict(DEFAULT_USER_CFG, SPARKLINE_SECONDS=sparkline_seconds))
+    window.show()
+    QTimer.singleShot(1000, app.quit)
+    app.exec_()
+    cpu_start, start = thread_time(), perf_counter()
+    QTimer.singleShot(int(duration * 1000), app.quit)
+    app.exec_()
+    cpu = thread_time() - cpu_start
+    wall = perf_counter() - start
+    window.worker_thread.stop()
+    window.worker_thread.join()
+    window.hide()
+    return cpu / wall * 100
+
+
+# Frames of a sparkline fed a changing HP, on a clock that moves one frame per call.
+def frame_times(app, frames):
+    clock = [0.0]
+    gui_qt.monotonic = lambda: clock[0]
+    sparkline = HpSparkline(config.SPARKLINE_SECONDS, config.SPARKLINE_RATE)
+    sparkline.resize(162, config.SPARKLINE_HEIGHT)
+    sparkline.show()
+    app.processEvents()
+    rng = Random(1)
+    partial, full = [], []
+    for _ in range(frames):
+        clock[0] += 1.0 / config.SPARKLINE_FPS
+        sparkline.add_sample(rng.uniform(300.0, 1000.0), 1000.0, 600.0)
+        start = perf_counter()
+        sparkline.frame()
+        app.processEvents()
+        partial.append((perf_counter() - start) * 1e6)
+    for _ in range(frames // 10):
+        start = perf_counter()
+        sparkline.repaint()
+        full.append((perf_counter() - start) * 1e6)
+    sparkline.hide()
+    return sorted(partial), sorted(full)
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--frames", type=int, default=2000)
+    args = parser.parse_args()
+    app = QApplication([])
+    print(f"Overlay GUI thread CPU, {args.duration:g} s of regular damage:")
+    for label, seconds in (("no sparkline", 0), (f"{config.SPARKLINE_SECONDS} s sparkline", config.SPARKLINE_SECONDS)):
+        print(f"  {label:<18} {overlay_cpu(app, seconds, args.duration):5.2f}% of one core")
+    partial, full = frame_times(app, args.frames)
+    slots = int(config.SPARKLINE_SECONDS * config.SPARKLINE_RATE)
+    print(f"Sparkline frame ({slots} slots, {config.SPARKLINE_FPS} frames/s while HP changes): "
+          f"new slots + partial repaint p50 {percentile(partial, 50):.0f} us p99 {percentile(partial, 99):.0f} us, "
+          f"full repaint p50 {percentile(full, 50):.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# Compares the single-thread monitoring loop with the split sampler/housekeeping
+# threads (SPLIT_SAMPLER_THREAD) while housekeeping is slow: every overlay update
+# stalls like a busy GUI thread and every pointer hop read is slowed down.
+#
+#   python benchmarks/bench_split_sampler.py [--duration 4] [--gui-stall-ms 15] [--pointer-delay-ms 2]
+#
+# For each mode reports the sample gap, the sampler tick latency and the reaction
+# latency against the true threshold crossings of the scripted curve.
+from argparse import ArgumentParser
+from time import perf_counter, perf_counter_ns, sleep
+
+from bench_common import DEFAULT_USER_CFG, AlwaysEnabled, CountingSignal, StatusVar, percentile, print_latency_ns
+
+import config
+from bench_sampling import DAMAGE_TRACE, MAX_HP, true_crossings
+from input_injector import RecordingInjector
+from instrumentation import LatencyInstrumentation
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from worker import AutoPotionWorker
+
+
+# Overlay signal whose emit blocks like a stalled GUI event loop.
+class StallingSignal(CountingSignal):
+    def __init__(self, stall):
+        super().__init__()
+        self.stall = stall
+
+    def emit(self, *args):
+        super().emit(*args)
+        sleep(self.stall)
+
+
+class SlowOverlay:
+    def __init__(self, stall):
+        self.snapshot_signal = StallingSignal(stall)
+        self.log_signal = CountingSignal()
+
+
+def run_mode(label, split, duration, gui_stall, pointer_delay):
+    curve = ScriptedHpCurve(DAMAGE_TRACE)
+    game = SimulatedGame(curve)
+    read_float, read_pointer = game.read_float, game.read_pointer
+    read_stamps_ns = []
+
+    def timed_read_float(addr):
+        value = read_float(addr)
+        read_stamps_ns.append(perf_counter_ns())
+        return value
+
+    def slow_read_pointer(addr):
+        sleep(pointer_delay)
+        return read_pointer(addr)
+
+    game.read_float = timed_read_float
+    game.read_pointer = slow_read_pointer
+
+    injector = RecordingInjector(clock=perf_counter)
+    user_cfg = dict(DEFAULT_USER_CFG, SPLIT_SAMPLER_THREAD=split)
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(), add_potion_log_callback=lambda *_: None,
+                              gui=SlowOverlay(gui_stall), user_cfg=user_cfg,
+                              memory_backend=SimulatedBackend(game), input_injector=injector)
+    worker._latency = LatencyInstrumentation()
+    worker.daemon = True
+    worker.start()
+    sleep(duration)
+    worker.stop()
+    worker.join()
+
+    loop_duration = DAMAGE_TRACE[-1][0]
+    threshold = MAX_HP * user_cfg["THRESHOLD_PCT"]
+    crossings = true_crossings(curve, threshold, loop_duration)
+    fired = sorted(t - game._start_time for t in injector.sent)
+    reaction_ns = []
+    for n in range(int(duration // loop_duration) + 1):
+        for crossing in crossings:
+            t_cross = n * loop_duration + crossing
+            later = [t for t in fired if t >= t_cross]
+            if later and later[0] - t_cross < 1.0:
+                reaction_ns.append(int((later[0] - t_cross) * 1e9))
+
+    gaps = [b - a for a, b in zip(read_stamps_ns, read_stamps_ns[1:])]
+    print(f"  {label}")
+    print_latency_ns("gap between HP reads", gaps)
+    print_latency_ns("sampler tick", _histogram_values(worker._latency.tick))
+    print_latency_ns("true crossing -> potion key", reaction_ns)
+    print(f"  {'':<32} potions {len(injector.sent)}, overlay updates {worker._display.emitted}")
+    return percentile(sorted(gaps), 99)
+
+
+# Expands a LatencyHistogram into bucket upper bounds, one per recorded duration.
+def _histogram_values(histogram):
+    values = []
+    for i, count in enumerate(histogram.counts):
+        values.extend([min(1 << i, histogram.max_ns)] * count)
+    return values
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--duration", type=float, default=4.0)
+    parser.add_argument("--interval", type=float, default=0.01)
+    parser.add_argument("--gui-stall-ms", type=float, default=15.0)
+    parser.add_argument("--pointer-delay-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    config.INTERVAL = args.interval
+    gui_stall, pointer_delay = args.gui_stall_ms / 1000.0, args.pointer_delay_ms / 1000.0
+
+    print(f"Slow housekeeping (overlay update stalls {args.gui_stall_ms:g} ms, pointer hop reads "
+          f"{args.pointer_delay_ms:g} ms), interval {args.interval * 1000:g} ms:")
+    single = run_mode("single thread", False, args.duration, gui_stall, pointer_delay)
+    split = run_mode("split sampler", True, args.duration, gui_stall, pointer_delay)
+    print(f"  p99 gap between HP reads: {single / 1e6:.1f} ms -> {split / 1e6:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
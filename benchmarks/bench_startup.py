@@ -0,0 +1,114 @@
+# Benchmarks startup of the headless console mode against the Qt overlay.
+#
+#   python benchmarks/bench_startup.py [--runs 5]
+#
+# Each run is a fresh interpreter that imports the front end the way main.py does,
+# starts it on a simulated game and exits at the first HP read. Reports the front end
+# import time, the time from spawning the process to the first HP sample and the
+# resident memory at that point, without the simulated game's memory image. The overlay
+# run uses the offscreen Qt platform and skips the global hotkeys.
+import json
+from argparse import ArgumentParser
+from os import environ, path
+from subprocess import run
+from sys import executable
+from time import time
+
+from bench_common import rss_kb
+
+
+# Runs inside the child process.
+def child(mode, spawned_at):
+    from threading import Event
+    from time import perf_counter
+
+    import user_config
+    start = perf_counter()
+    if mode == "headless":
+        from headless import HeadlessApp
+    else:
+        from PyQt5.QtWidgets import QApplication
+        from gui_qt import OverlayWindow
+    import_ms = (perf_counter() - start) * 1000
+
+    from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+    # The simulated game's memory image is not part of the tool's footprint.
+    before_game = rss_kb()
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]))
+    game_kb = rss_kb() - before_game
+    first_read = Event()
+    result = {}
+    read_float = game.read_float
+
+    def first_read_float(addr):
+        if not first_read.is_set():
+            result.update(first_sample_ms=(time() - spawned_at) * 1000, rss_kb=rss_kb() - game_kb)
+            first_read.set()
+        return read_float(addr)
+
+    game.read_float = first_read_float
+    user_cfg = user_config.UserConfig({})
+    if mode == "headless":
+        app = HeadlessApp(user_cfg, memory_backend=SimulatedBackend(game), hotkeys=False)
+        app.start()
+        first_read.wait(10.0)
+    else:
+        from worker import AutoPotionWorker
+
+        class BenchOverlay(OverlayWindow):
+            def _register_hotkey(self):
+                self.auto_potion_enabled = True
+
+            def _start_worker(self):
+                self.worker_thread = AutoPotionWorker(None, None, self, add_potion_log_callback=self.add_potion_log,
+                                                      gui=self, user_cfg=self.user_cfg,
+                                                      memory_backend=SimulatedBackend(game))
+                self.worker_thread.daemon = True
+                self.worker_thread.start()
+
+        qt_app = QApplication([])
+        window = BenchOverlay(user_cfg)
+        window.show()
+        while not first_read.wait(0.001):
+            qt_app.processEvents()
+    result["import_ms"] = import_ms
+    print("RESULT " + json.dumps(result), flush=True)
+
+
+def measure(mode, runs):
+    env = dict(environ, QT_QPA_PLATFORM="offscreen")
+    rows = []
+    for _ in range(runs):
+        proc = run([executable, path.abspath(__file__), "--child", mode, str(time())],
+                   capture_output=True, text=True, env=env, timeout=60)
+        line = next((l for l in proc.stdout.splitlines() if l.startswith("RESULT ")), None)
+        if line is None:
+            raise RuntimeError(f"{mode} run failed:\n{proc.stdout}\n{proc.stderr}")
+        rows.append(json.loads(line[7:]))
+    return rows
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "SPAWNED_AT"))
+    args = parser.parse_args()
+    if args.child:
+        child(args.child[0], float(args.child[1]))
+        from os import _exit
+        _exit(0)
+
+    print(f"Startup to the first HP sample ({args.runs} runs each, medians):")
+    for mode in ("headless", "overlay"):
+        try:
+            rows = measure(mode, args.runs)
+        except (RuntimeError, OSError) as e:
+            print(f"  {mode:<9} unavailable: {str(e).strip()[-200:]}")
+            continue
+        median = lambda key: sorted(row[key] for row in rows)[len(rows) // 2]
+        print(f"  {mode:<9} imports {median('import_ms'):7.1f} ms   first HP sample {median('first_sample_ms'):7.1f} ms"
+              f"   RSS {median('rss_kb') / 1024:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
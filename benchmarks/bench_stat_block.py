@@ -0,0 +1,93 @@
+# Benchmarks the stat block read (STAT_BLOCK_FIELDS) against one read_float per value,
+# and shows the max HP learning delay it removes.
+#
+#   python benchmarks/bench_stat_block.py [--iterations 100000]
+#
+# The worker attaches while the character is wounded (700 of 1000 HP) and takes a hit
+# to 500 HP a second later. Learning max HP from stable HP starts from 700, so the
+# threshold sits at 420 and the hit goes unanswered; with max HP in the stat block the
+# threshold is right from the first sample.
+from argparse import ArgumentParser
+from time import perf_counter, perf_counter_ns, sleep
+
+from bench_common import DEFAULT_USER_CFG, AlwaysEnabled, StatusVar
+
+import config
+from input_injector import RecordingInjector
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from stat_block import StatBlockLayout, StatBlockReader
+from worker import AutoPotionWorker
+
+MAX_HP = 1000.0
+FIELDS = {"hp": (0x0, "float"), "max_hp": (0x4, "float"), "ward": (0x10, "float"), "mana": (0x20, "float")}
+# Wounded at attach, a hit at 1 s, regeneration to full HP by 4 s.
+WOUNDED_CURVE = [(0.0, 700.0), (1.0, 700.0), (1.05, 500.0), (1.5, 500.0), (4.0, MAX_HP), (6.0, MAX_HP)]
+
+
+def make_game(curve):
+    game = SimulatedGame(ScriptedHpCurve(curve, loop=False))
+    for name, (offset, _) in FIELDS.items():
+        if name != "hp":
+            game.write_float(game.hp_addr + offset, {"max_hp": MAX_HP, "ward": 120.0, "mana": 80.0}[name])
+    return game
+
+
+def bench_reads(iterations):
+    game = make_game([(0.0, MAX_HP)])
+    process = SimulatedBackend(game).attach(config.PROCESS_NAME)
+    hp_addr = game.hp_addr
+    addresses = [hp_addr + offset for offset, _ in FIELDS.values()]
+
+    start = perf_counter_ns()
+    for _ in range(iterations):
+        values = [process.read_float(addr) for addr in addresses]
+    per_floats = (perf_counter_ns() - start) / iterations
+
+    reader = StatBlockReader(StatBlockLayout(FIELDS), process)
+    start = perf_counter_ns()
+    for _ in range(iterations):
+        block = reader.read(hp_addr)
+    per_block = (perf_counter_ns() - start) / iterations
+    assert list(block) == values
+
+    print(f"  {len(addresses)} x read_float            {per_floats / 1000:8.2f} us/sample, {len(addresses)} reads")
+    print(f"  stat block ({reader.layout.size} bytes)      {per_block / 1000:8.2f} us/sample, 1 read")
+
+
+def run_worker(label, fields, duration=2.5):
+    config.STAT_BLOCK_FIELDS = fields
+    game = make_game(WOUNDED_CURVE)
+    injector = RecordingInjector(clock=perf_counter)
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=dict(DEFAULT_USER_CFG),
+                              memory_backend=SimulatedBackend(game), input_injector=injector)
+    worker.daemon = True
+    worker.start()
+    correct_at = None
+    threshold = MAX_HP * DEFAULT_USER_CFG["THRESHOLD_PCT"]
+    while perf_counter() - game._start_time < duration:
+        if correct_at is None and worker._threshold == threshold:
+            correct_at = perf_counter() - game._start_time
+        sleep(0.001)
+    worker.stop()
+    worker.join()
+    config.STAT_BLOCK_FIELDS = {}
+
+    reacted = [t - game._start_time for t in injector.sent]
+    print(f"  {label}")
+    print(f"    threshold correct after {'never' if correct_at is None else f'{correct_at * 1000:.0f} ms'}"
+          f" (within {duration:g} s), potions at {', '.join(f'{t:.2f}s' for t in reacted) or '-'}")
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=100000)
+    args = parser.parse_args()
+    print("Stat block reads:")
+    bench_reads(args.iterations)
+    print("Attach while wounded, hit below the threshold at 1 s:")
+    run_worker("max HP learned from stable HP", {})
+    run_worker("max HP from the stat block", FIELDS)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Times the vectorized settings sweep (src/tuner.py) over a synthetic 10 Hz trace
+# and cross-checks a few grid points against AutoPotionWorker's own logic.
+#
+#   python benchmarks/bench_tuner.py [--hours 3]
+from argparse import ArgumentParser
+from os import path, remove
+from random import Random
+from tempfile import gettempdir
+from time import perf_counter
+
+from bench_common import DEFAULT_USER_CFG, AlwaysEnabled, StatusVar
+
+from hp_trace import HpTraceReader, HpTraceRecorder
+from input_injector import RecordingInjector
+from tuner import parse_grid, sweep_traces
+from worker import AutoPotionWorker
+
+
+# Full HP with random hits, regeneration, potions in the recording and the odd max HP change.
+def generate_trace(file_path, hours, interval=0.1, seed=7):
+    rng = Random(seed)
+    recorder = HpTraceRecorder(file_path)
+    max_hp = 1000.0
+    hp = max_hp
+    for i in range(int(hours * 3600 / interval)):
+        roll = rng.random()
+        if roll < 0.002:
+            max_hp = round(max_hp * rng.choice((0.9, 1.05, 1.1)))
+        if roll < 0.02:
+            hp -= rng.uniform(0.05, 0.45) * max_hp
+        elif hp < max_hp:
+            hp = min(max_hp, hp + 0.02 * max_hp)
+        if hp <= 0:
+            hp = max_hp
+        recorder.record(i * interval, hp, max_hp, None, False)
+    recorder.close()
+
+
+def replay_worker(file_path, threshold_pct, cooldown, stable_duration):
+    injector = RecordingInjector()
+    user_cfg = dict(DEFAULT_USER_CFG, THRESHOLD_PCT=threshold_pct, POTION_COOLDOWN=cooldown)
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=user_cfg,
+                              input_injector=injector)
+    worker._stable_hp_required_duration = stable_duration
+    with HpTraceReader(file_path) as reader:
+        for timestamp, hp, _, _, _ in reader.iter_raw():
+            if worker._max_hp is None and hp > 0:
+                worker._set_new_max_hp(hp)
+            worker._update_max_hp_logic(hp, now=timestamp)
+            worker._apply_auto_potion_logic(hp, now=timestamp)
+    return len(injector.sent)
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--hours", type=float, default=3.0)
+    args = parser.parse_args()
+
+    file_path = path.join(gettempdir(), "le_autopot_tuner_trace.bin")
+    if path.exists(file_path):
+        remove(file_path)
+    generate_trace(file_path, args.hours)
+
+    thresholds = parse_grid("0.2:0.8:0.01")
+    cooldowns = parse_grid("0.05:2.0:0.05")
+    stable_durations = parse_grid("1:10:1")
+    combos = len(thresholds) * len(cooldowns) * len(stable_durations)
+
+    print(f"Settings sweep over {args.hours:g} h at 10 Hz, {combos} combinations:")
+    started = perf_counter()
+    result = sweep_traces([file_path], thresholds, cooldowns, stable_durations)
+    elapsed = perf_counter() - started
+    print(f"  swept in {elapsed:.2f}s ({elapsed / combos * 1e6:.1f} us/combination)")
+
+    print("  cross-check against AutoPotionWorker:")
+    rng = Random(1)
+    mismatches = 0
+    for _ in range(4):
+        si, ti, ci = (rng.randrange(len(stable_durations)), rng.randrange(len(thresholds)),
+                      rng.randrange(len(cooldowns)))
+        expected = replay_worker(file_path, thresholds[ti], cooldowns[ci], stable_durations[si])
+        swept = int(result["potions"][si, ti, ci])
+        mismatches += expected != swept
+        print(f"    threshold={thresholds[ti]:.2f} cooldown={cooldowns[ci]:.2f} stable={stable_durations[si]:.0f}: "
+              f"worker={expected} sweep={swept} below={result['time_below'][si, ti, ci]:.1f}s "
+              f"minHP={result['min_hp_pct'][si, ti, ci] * 100:.1f}%")
+    print("  OK" if not mismatches else f"  {mismatches} MISMATCHES")
+    remove(file_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# Replays sampled HP traces through the worker's potion decision logic with and
+# without the predictive trigger.
+#
+#   python benchmarks/replay_predictive.py [--interval 0.1]
+#
+# For every episode where HP drops below the threshold, reports how many
+# milliseconds earlier the predictive trigger fired than the plain threshold
+# rule, and how many extra potions the predictive mode used in total.
+from argparse import ArgumentParser
+from time import perf_counter
+
+from bench_common import DEFAULT_USER_CFG, AlwaysEnabled, StatusVar
+
+from input_injector import RecordingInjector
+from memory_backend import ScriptedHpCurve
+from worker import AutoPotionWorker
+
+MAX_HP = 1000.0
+DAMAGE_PROFILES = {
+    "fast burst": [(0.0, MAX_HP), (2.0, MAX_HP), (2.25, 300.0), (3.0, MAX_HP), (5.0, MAX_HP)],
+    "damage over time": [(0.0, MAX_HP), (1.0, MAX_HP), (4.0, 450.0), (4.5, MAX_HP), (6.0, MAX_HP)],
+    "hits then DoT": [(0.0, MAX_HP), (1.0, MAX_HP), (1.05, 820.0), (1.6, 820.0), (1.65, 700.0),
+                      (3.0, 500.0), (3.4, MAX_HP), (5.0, MAX_HP)],
+    "chip damage near threshold": [(0.0, MAX_HP), (1.0, 680.0), (1.5, 640.0), (2.0, 700.0),
+                                   (2.5, 630.0), (3.0, MAX_HP), (4.0, MAX_HP)],
+}
+
+
+def sample_trace(curve, duration, interval):
+    n = int(duration / interval)
+    return [(i * interval, curve(i * interval)) for i in range(n)]
+
+
+# Feeds the samples through _apply_auto_potion_logic and returns the fire times.
+def replay(trace, predictive):
+    current = [0.0]
+    injector = RecordingInjector(clock=lambda: current[0])
+    user_cfg = dict(DEFAULT_USER_CFG, PREDICTIVE_TRIGGER=predictive)
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=user_cfg,
+                              input_injector=injector)
+    worker._set_new_max_hp(MAX_HP)
+    started = perf_counter()
+    for t, hp in trace:
+        current[0] = t
+        worker._apply_auto_potion_logic(hp, now=t)
+    elapsed = perf_counter() - started
+    return injector.sent, worker._threshold, elapsed / len(trace)
+
+
+# (start, end) times of the stretches where HP is below the threshold.
+def episodes(trace, threshold):
+    spans = []
+    start = None
+    for t, hp in trace:
+        if start is None and hp < threshold:
+            start = t
+        elif start is not None and hp >= threshold:
+            spans.append((start, t))
+            start = None
+    if start is not None:
+        spans.append((start, trace[-1][0]))
+    return spans
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--interval", type=float, default=0.1)
+    parser.add_argument("--loops", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"Predictive trigger replay ({1 / args.interval:.0f} Hz samples):")
+    for name, keyframes in DAMAGE_PROFILES.items():
+        trace = sample_trace(ScriptedHpCurve(keyframes), keyframes[-1][0] * args.loops, args.interval)
+        base_fires, threshold, _ = replay(trace, False)
+        pred_fires, _, per_sample = replay(trace, True)
+
+        leads = []
+        spans = episodes(trace, threshold)
+        previous_end = -1.0
+        for start, end in spans:
+            base = [t for t in base_fires if t >= start]
+            pred = [t for t in pred_fires if previous_end < t <= (base[0] if base else start)]
+            if base and pred:
+                leads.append((base[0] - pred[0]) * 1000.0)
+            previous_end = end
+        mean_lead = sum(leads) / len(leads) if leads else 0.0
+        print(f"  {name:<28} earlier by mean={mean_lead:7.1f} ms over {len(leads):3d}/{len(spans):3d} episodes, "
+              f"potions {len(base_fires):4d} -> {len(pred_fires):4d} ({len(pred_fires) - len(base_fires):+d}), "
+              f"decision cost {per_sample * 1e6:.2f} us/sample")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# Replays a recorded HP trace through AutoPotionWorker's decision logic.
+#
+#   python benchmarks/replay_trace.py --trace hp_trace.bin
+#   python benchmarks/replay_trace.py --generate-hours 3 [--record-cooldown 1.0]
+#
+# Traces come from HP_TRACE_FILE in config_user.ini. With --generate-hours a
+# synthetic 10 Hz trace of that length is recorded first, with the potions the worker
+# logic uses at --record-cooldown. Reports open time, replay speed, and potions used in
+# the recording vs. by the current logic and settings.
+from argparse import ArgumentParser
+from os import path, remove
+from tempfile import gettempdir
+from time import perf_counter
+
+from bench_common import DEFAULT_USER_CFG, AlwaysEnabled, StatusVar
+
+from hp_trace import FLAG_POTION_FIRED, HpTraceReader, HpTraceRecorder
+from input_injector import RecordingInjector
+from memory_backend import ScriptedHpCurve
+from worker import AutoPotionWorker
+
+SYNTHETIC_CURVE = [(0.0, 1000.0), (20.0, 1000.0), (20.3, 480.0), (22.0, 1000.0),
+                   (40.0, 1000.0), (46.0, 550.0), (47.0, 1000.0), (60.0, 1000.0)]
+
+
+# Worker whose decisions are recorded instead of pressing a key.
+def decision_worker(user_cfg):
+    injector = RecordingInjector()
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=user_cfg,
+                              input_injector=injector)
+    return worker, injector
+
+
+# Feeds one sample through the worker's max HP and potion logic, as the monitoring loop does.
+def decide(worker, timestamp, hp):
+    if worker._max_hp is None and hp > 0:
+        worker._set_new_max_hp(hp)
+    worker._update_max_hp_logic(hp, now=timestamp)
+    return worker._apply_auto_potion_logic(hp, now=timestamp)
+
+
+# Records a synthetic trace with the potion decisions of the worker logic under user_cfg.
+def generate_trace(file_path, hours, user_cfg, interval=0.1):
+    curve = ScriptedHpCurve(SYNTHETIC_CURVE)
+    worker, _ = decision_worker(user_cfg)
+    n = int(hours * 3600 / interval)
+    samples = []
+    for i in range(n):
+        t = i * interval
+        hp = curve(t)
+        fired = decide(worker, t, hp)
+        samples.append((t, hp, worker._max_hp, worker._threshold, fired))
+
+    recorder = HpTraceRecorder(file_path)
+    started = perf_counter()
+    for sample in samples:
+        recorder.record(*sample)
+    recorder.close()
+    elapsed = perf_counter() - started
+    print(f"  recorded {n} samples in {elapsed:.2f}s ({elapsed / n * 1e6:.2f} us/sample on the calling thread)")
+
+
+def replay(file_path, user_cfg):
+    worker, injector = decision_worker(user_cfg)
+
+    started = perf_counter()
+    reader = HpTraceReader(file_path)
+    opened = perf_counter() - started
+
+    recorded_potions = 0
+    min_hp = None
+    started = perf_counter()
+    for timestamp, hp, max_hp, threshold, flags in reader.iter_raw():
+        if flags & FLAG_POTION_FIRED:
+            recorded_potions += 1
+        decide(worker, timestamp, hp)
+        if min_hp is None or hp < min_hp:
+            min_hp = hp
+    elapsed = perf_counter() - started
+    count = len(reader)
+    reader.close()
+
+    size_mb = path.getsize(file_path) / 1e6
+    print(f"  trace: {count} records, {size_mb:.1f} MB, opened in {opened * 1000:.2f} ms")
+    if count:
+        print(f"  replayed in {elapsed:.2f}s ({count / elapsed:,.0f} records/s)")
+    print(f"  potions: recorded={recorded_potions} replayed={len(injector.sent)}  min HP={min_hp}")
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument("--trace")
+    parser.add_argument("--generate-hours", type=float, default=None)
+    parser.add_argument("--record-cooldown", type=float, default=1.0,
+                        help="POTION_COOLDOWN the synthetic trace is recorded with (replayed with config.py's)")
+    args = parser.parse_args()
+
+    user_cfg = dict(DEFAULT_USER_CFG)
+    print("HP trace replay:")
+    if args.trace:
+        replay(args.trace, user_cfg)
+        return
+    file_path = path.join(gettempdir(), "le_autopot_synthetic_trace.bin")
+    if path.exists(file_path):
+        remove(file_path)
+    generate_trace(file_path, args.generate_hours or 1.0, dict(user_cfg, POTION_COOLDOWN=args.record_cooldown))
+    replay(file_path, user_cfg)
+    remove(file_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,28 @@
 #!/bin/bash
 # Build Last Epoch Auto Potion Release
-pyinstaller \
-  --clean \
-  --onefile \
-  --name="LE-AutoPot-v1.2.1" \
-  --icon=../imgs/PotionIcon.ico \
-  --distpath release \
-  --workpath build \
-  --specpath release \
-  src/main.py
+if [ "$1" == "--headless" ]; then
+  # Headless console build (python src/main.py --headless): no Qt in the bundle,
+  # --onedir so startup skips unpacking the one-file archive. main.py falls back to
+  # headless when PyQt5 is missing.
+  pyinstaller \
+    --clean \
+    --onedir \
+    --console \
+    --exclude-module PyQt5 \
+    --name="LE-AutoPot-v1.2.1-headless" \
+    --icon=../imgs/PotionIcon.ico \
+    --distpath release \
+    --workpath build \
+    --specpath release \
+    src/main.py
+else
+  pyinstaller \
+    --clean \
+    --onefile \
+    --name="LE-AutoPot-v1.2.1" \
+    --icon=../imgs/PotionIcon.ico \
+    --distpath release \
+    --workpath build \
+    --specpath release \
+    src/main.py
+fi
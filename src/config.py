@@ -5,18 +5,42 @@ HOTKEY_TOGGLE = 'num /'           # Enable/disable Auto Potion
 HOTKEY_CLOSE = 'ctrl+alt+num -'   # Close the overlay immediately
 HOTKEY_HIDE_SHOW = 'ctrl+alt+num /'   # Hide/show overlay
 HOTKEY_LOCK_MOVE = 'ctrl+alt+num *'   # Lock/unlock window movement
+HOTKEY_DUMP_STATS = 'ctrl+alt+num +'  # Print latency histograms (developer mode)
 
 # Potion logic
 POTION_KEY = "1"                  # Key used for potion
 POTION_COOLDOWN = 0.2             # Seconds between allowed uses
 THRESHOLD_PCT = 0.6               # HP percent to trigger potion
 STABLE_HP_DURATION = 5.0          # Seconds to consider HP stable
+INPUT_INJECTOR = "auto"           # Potion key presses: "sendinput" (Windows), "keyboard" or "auto"
+MULTIBOX = False                  # Guard every running game client from this one instance
+
+# Adaptive HP sampling (fixed INTERVAL when disabled)
+ADAPTIVE_SAMPLING = False
+SAMPLING_MIN_INTERVAL = 0.005     # Seconds between samples while HP falls or is near the threshold
+SAMPLING_MAX_INTERVAL = 0.1       # Seconds between samples while HP sits at max
+SAMPLING_NEAR_THRESHOLD_PCT = 0.15  # Max HP fraction above the threshold that counts as "near"
+SAMPLING_RAMP_FACTOR = 1.5        # Period multiplier per calm sample when relaxing
+SPLIT_SAMPLER_THREAD = False      # Read HP and press the key on a thread of their own, apart from housekeeping
+
+# Predictive trigger (fires early when HP is projected to cross the threshold)
+PREDICTIVE_TRIGGER = False
+PREDICTION_WINDOW = 6             # Number of recent HP samples used for the slope
+PREDICTION_INPUT_LATENCY = 0.03   # Seconds between key press and the potion taking effect
 
 INITIAL_POS_X = 200              # Initial X position of the overlay window
 INITIAL_POS_Y = 880              # Initial Y position of the overlay window
+OVERLAY_REFRESH_RATE = 20        # Max overlay redraws per second
+SPARKLINE_SECONDS = 20           # Seconds of HP history in the overlay sparkline (0 = off)
+SPARKLINE_RATE = 10              # Sparkline time slots per second
+SPARKLINE_FPS = 5                # Max sparkline repaints per second while HP changes
+SPARKLINE_HEIGHT = 36            # Height of the sparkline in pixels
+HEADLESS = False                 # Run without the overlay (status line in the console, no Qt)
 
 # Developer debug flag (set by user config if available)
 DEVELOPER_DEBUG = False
+HP_TRACE_FILE = ""               # Binary file to record every HP sample to (empty = off)
+METRICS_PORT = 0                 # Localhost port of the OpenMetrics endpoint (0 = off)
 # === Technical/Advanced Settings ===
 APP_VERSION = "1.2.1"
 LAST_EPOCH_VERSION = "1.2.5.2" # offsets version
@@ -28,17 +52,48 @@ MODULE_NAME = "GameAssembly.dll"
 BASE_OFFSET = 0x410C328
 OFFSETS = [0xB8, 0x0, 0xA0, 0x6C]
 
-# Backup pointer 1
-# BASE_OFFSET = 0x44DF308
-# OFFSETS = [0x88, 0xE98, 0x30, 0x6C]
+# All (BASE_OFFSET, OFFSETS) chains to the HP value, in order of preference. They are
+# resolved together; the first one with a plausible HP that agrees with the others is used,
+# and the next ones take over when it stops resolving.
+POINTER_CHAINS = [
+    (BASE_OFFSET, OFFSETS),
+    (0x44DF308, [0x88, 0xE98, 0x30, 0x6C]),     # Backup pointer 1
+    (0x44DF308, [0x88, 0xEA8, 0x178, 0x6C]),    # Backup pointer 2
+]
+
+# Optional stat block around the HP value, read with one memory read per sample:
+# field name -> (offset from the HP address, type: float, double, int32, uint32, ... or a
+# struct format character). Needs an "hp" field at offset 0; a "max_hp" field is used as
+# max HP directly instead of learning it from stable HP. Empty = read the HP float alone.
+# Example: {"hp": (0x0, "float"), "max_hp": (0x4, "float"), "ward": (0x10, "float"), "mana": (0x20, "float")}
+STAT_BLOCK_FIELDS = {}
 
-# Backup pointer 2
-# BASE_OFFSET = 0x44DF308
-# OFFSETS = [0x88, 0xEA8, 0x178, 0x6C]
+# Optional signature mode: derive BASE_OFFSET at attach time from an instruction in
+# GameAssembly.dll's code that references it ("??" = wildcard byte, empty = off).
+# The referenced address is match + BASE_SIGNATURE_INSTR_LENGTH + rel32 at BASE_SIGNATURE_DISP_OFFSET.
+BASE_SIGNATURE = ""
+BASE_SIGNATURE_DISP_OFFSET = 3
+BASE_SIGNATURE_INSTR_LENGTH = 7
+SIGNATURE_CACHE_FILE = "signature_cache.json"  # Scan results per game build
+
+# Pointer scanner limits (python src/pointer_scanner.py)
+POINTER_SCAN_MAX_DEPTH = 5
+POINTER_SCAN_MAX_OFFSET = 0x1000
 
 INTERVAL = 0.1
-WAIT_INTERVAL_PROCESS = 5
+SCHEDULER_SPIN = 0.0002  # Seconds before a sample deadline to stop blocking and busy-wait (0 = never spin)
+SCHEDULER_SPIN_MAX_INTERVAL = 0.01  # Only spin for sample periods up to this (the adaptive sampler's fast periods)
+CONFIG_RELOAD_INTERVAL = 1.0  # Seconds between checks of config_user.ini for changes
+WAIT_INTERVAL_PROCESS = 5  # Seconds between attach attempts when the process watcher is unavailable
 WAIT_INTERVAL_MEMORY = 1
+PROCESS_WATCH_INTERVAL = 0.05  # Seconds between process table checks while waiting for the game
+MODULE_LOAD_POLL_INTERVAL = 0.02  # Seconds between checks for the game module right after attaching
+MULTIBOX_SCAN_INTERVAL = 2.0  # Seconds between looks for new game clients (multibox)
+
+LOG_FILE = "autopot.log"  # Log file next to config_user.ini, rotated at LOG_MAX_BYTES (empty = console only)
+LOG_MAX_BYTES = 1_000_000
+LOG_BACKUP_COUNT = 3
+LOG_RATE_LIMIT = 15  # Seconds a rate-limited message key stays quiet after being logged
 
 LAST_POTION_TIME_INIT = 0  # initial value for the last potion use timestamp
 
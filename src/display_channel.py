@@ -0,0 +1,58 @@
+# Coalesces overlay updates from the worker into one snapshot
+# (HP, max HP, threshold, status text, status color) that is only emitted when a
+# value shown on the overlay actually changes.
+class DisplayChannel:
+    def __init__(self, emit):
+        self._emit = emit
+        self.hp = None
+        self.max_hp = None
+        self.threshold = None
+        self.status = None
+        self.color_key = None
+        self._last_key = None
+
+        # Counters for emitted vs. suppressed updates.
+        self.emitted = 0
+        self.suppressed = 0
+
+    # Updates every displayed value at once.
+    def update(self, hp, max_hp, threshold, status, color_key):
+        self.hp = hp
+        self.max_hp = max_hp
+        self.threshold = threshold
+        self.status = status
+        self.color_key = color_key
+        self._publish()
+
+    # Updates the status only, keeping the last HP values.
+    def update_status(self, status, color_key):
+        self.status = status
+        self.color_key = color_key
+        self._publish()
+
+    # Clears the HP values and sets the status.
+    def clear(self, status, color_key):
+        self.update(None, None, None, status, color_key)
+
+    def snapshot(self):
+        return (self.hp, self.max_hp, self.threshold, self.status, self.color_key)
+
+    # Values at the precision the overlay displays them.
+    def _display_key(self):
+        hp, max_hp, threshold = self.hp, self.max_hp, self.threshold
+        if hp is None:
+            hp_key = None
+        elif max_hp:
+            hp_key = (int(hp), int(max_hp), round(hp * 1000.0 / max_hp))
+        else:
+            hp_key = (int(hp), None, None)
+        return (hp_key, None if threshold is None else int(threshold), self.status, self.color_key)
+
+    def _publish(self):
+        key = self._display_key()
+        if key == self._last_key:
+            self.suppressed += 1
+            return
+        self._last_key = key
+        self.emitted += 1
+        self._emit(self.snapshot())
@@ -0,0 +1,134 @@
+from threading import Thread
+from time import perf_counter, sleep
+
+import logs
+
+log = logs.get_logger("focus")
+
+# Focus trackers tell the worker whether the game window is in the foreground.
+# The hot loop only reads the `is_foreground` boolean; trackers update it when
+# focus changes and call the `on_change` callback given to start().
+
+
+# Tracks foreground changes of the game's windows with a WinEvent hook (Windows only).
+# The hook runs on a dedicated thread with its own message loop; the game's HWND is
+# cached and tied to the attached PID, so no FindWindow title search is needed.
+class WinEventFocusTracker:
+    _EVENT_SYSTEM_FOREGROUND = 0x0003
+    _WINEVENT_OUTOFCONTEXT = 0x0000
+    _WM_QUIT = 0x0012
+
+    def __init__(self, pid, window_title):
+        self.pid = pid
+        self.window_title = window_title
+        self.is_foreground = False
+        self.game_hwnd = None
+        self._on_change = None
+        self._thread = None
+        self._thread_id = None
+        self._stop_requested = False
+
+    def start(self, on_change=None):
+        self._on_change = on_change
+        self._thread = Thread(target=self._run, name="FocusTracker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_requested = True
+        if self._thread_id is not None:
+            import ctypes
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self._WM_QUIT, 0, 0)
+        self._thread = None
+
+    def _run(self):
+        import ctypes
+        from ctypes import wintypes
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+
+        win_event_proc_type = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        self._user32 = user32
+        self._thread_id = kernel32.GetCurrentThreadId()
+        # Keep a reference to the callback for as long as the hook is installed.
+        self._win_event_proc = win_event_proc_type(lambda *args: self._set_foreground_hwnd(args[2]))
+        # Also reports our own windows: the overlay takes the foreground when clicked, which
+        # must pause the worker like any other window that is not the game.
+        hook = user32.SetWinEventHook(
+            self._EVENT_SYSTEM_FOREGROUND, self._EVENT_SYSTEM_FOREGROUND, 0, self._win_event_proc,
+            0, 0, self._WINEVENT_OUTOFCONTEXT)
+        if not hook:
+            log.error("Could not install the foreground WinEvent hook.")
+            return
+
+        self._set_foreground_hwnd(user32.GetForegroundWindow())
+        msg = wintypes.MSG()
+        while not self._stop_requested and user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        user32.UnhookWinEvent(hook)
+        self._thread_id = None
+
+    # Updates the foreground flag for a new foreground window.
+    def _set_foreground_hwnd(self, hwnd):
+        if hwnd and hwnd == self.game_hwnd:
+            focused = True
+        elif hwnd and self._is_game_window(hwnd):
+            self.game_hwnd = hwnd
+            focused = True
+        else:
+            focused = False
+        if focused != self.is_foreground:
+            self.is_foreground = focused
+            if self._on_change is not None:
+                self._on_change()
+
+    # A window belongs to the game if it is owned by the attached PID and has the game title.
+    def _is_game_window(self, hwnd):
+        import ctypes
+        from ctypes import wintypes
+        pid = wintypes.DWORD()
+        self._user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+        if pid.value != self.pid:
+            return False
+        title = ctypes.create_unicode_buffer(256)
+        self._user32.GetWindowTextW(hwnd, title, 256)
+        return title.value == self.window_title
+
+
+# Focus tracker driven by a script, for tests and benchmarks.
+# Focus changes come from set_foreground() or from a played (seconds, focused) schedule.
+class ScriptedFocusTracker:
+    def __init__(self, is_foreground=True):
+        self.is_foreground = is_foreground
+        self._on_change = None
+        self._stopped = False
+
+    def start(self, on_change=None):
+        self._on_change = on_change
+        self._stopped = False
+
+    def stop(self):
+        self._stopped = True
+
+    def set_foreground(self, focused):
+        if focused != self.is_foreground:
+            self.is_foreground = focused
+            if self._on_change is not None and not self._stopped:
+                self._on_change()
+
+    # Applies the (seconds from now, focused) entries on a background thread.
+    def play(self, schedule, clock=perf_counter):
+        def run():
+            start = clock()
+            for at, focused in schedule:
+                delay = start + at - clock()
+                if delay > 0:
+                    sleep(delay)
+                if self._stopped:
+                    return
+                self.set_foreground(focused)
+        thread = Thread(target=run, name="ScriptedFocus", daemon=True)
+        thread.start()
+        return thread
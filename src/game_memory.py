@@ -1,115 +1,307 @@
-from pymem import exception as pymem_exception
-from pymem.process import module_from_name
-from win32gui import FindWindow, GetForegroundWindow
-from time import time
+from math import isfinite
 import config
-from user_config import user_cfg
+import logs
+from memory_backend import MemoryBackendError
+from signature_scan import SignatureError, find_base_offset
 
-# Attempts to find the final memory address of the player's HP using base address and offsets.
-def get_hp_address(pm):
-    if not hasattr(get_hp_address, "last_error"):
-        get_hp_address.last_error = None
-    if not hasattr(get_hp_address, "last_error_time"):
-        get_hp_address.last_error_time = 0
-    if not hasattr(get_hp_address, "last_successful_chain"):
-        get_hp_address.last_successful_chain = None
-    COOLDOWN = 15  # 15 seconds
-
-    def print_error_throttled(error_msg):
-        now = time()
-        if (get_hp_address.last_error != error_msg or 
-            (now - get_hp_address.last_error_time) > COOLDOWN):
-            print(error_msg)
-            get_hp_address.last_error = error_msg
-            get_hp_address.last_error_time = now
-
-    if not hasattr(get_hp_address, "last_debug_error"):
-        get_hp_address.last_debug_error = None
-    if not hasattr(get_hp_address, "last_debug_error_time"):
-        get_hp_address.last_debug_error_time = 0
-
-    def debug_print_throttled(error_msg):
-        now = time()
-        if (get_hp_address.last_debug_error != error_msg or
-            (now - get_hp_address.last_debug_error_time) > COOLDOWN):
-            debug_print(error_msg)
-            get_hp_address.last_debug_error = error_msg
-            get_hp_address.last_debug_error_time = now
-
-    try:
-        # Ensure Pymem object is valid.
-        if pm is None or pm.process_handle is None:
-             return None
- 
-        # Get module information to calculate base address.
-        mod = module_from_name(pm.process_handle, config.MODULE_NAME)
- 
-        if mod is None:
-            error_msg = f"[ERROR] Module not found: {config.MODULE_NAME}"
-            print_error_throttled(error_msg)
+log = logs.get_logger("memory")
+# Resolve errors repeat on every attempt while the game loads; each message is rate limited.
+_NO_PLAUSIBLE_CHAIN = logs.rate_limited("no plausible pointer chain")
+_CHAINS_DISAGREE = logs.rate_limited("pointer chains disagree")
+
+_last_successful_chain = None
+
+
+# Resolves the HP pointer chain of one attached process and keeps it cached.
+# The module base is looked up once for the life of the process; afterwards the
+# chain is revalidated by re-reading the hop values only, and walked again only
+# when one of them has changed. In signature mode (config.BASE_SIGNATURE) the base
+# offset is derived from the module's code on the first resolve.
+class PointerChainResolver:
+    def __init__(self, pm, base_offset=None, offsets=None, module_name=None, verbose=True):
+        self.process = pm
+        self.verbose = verbose
+        if base_offset is None and not config.BASE_SIGNATURE:
+            base_offset = config.BASE_OFFSET
+        self._base_offset = base_offset
+        self._offsets = list(config.OFFSETS if offsets is None else offsets)
+        self._module_name = config.MODULE_NAME if module_name is None else module_name
+        self._module_base = None
+        # Addresses read while walking the chain and the pointer values found there.
+        self._hop_addrs = None
+        self._hop_values = None
+        self.hp_addr = None
+
+        # Counters for verifying the savings per session.
+        self.full_resolves = 0
+        self.revalidations = 0
+        self.invalidations = 0
+
+    # Walks the whole chain from the (cached) module base. Returns the HP address or None.
+    def resolve(self):
+        self.full_resolves += 1
+        self._hop_addrs = None
+        self._hop_values = None
+        self.hp_addr = None
+        try:
+            if self.process is None:
+                return None
+
+            if self._module_base is None:
+                self._module_base = self.process.module_base(self._module_name)
+                if self._module_base is None:
+                    self._report_error("Module not found: %s", self._module_name)
+                    return None
+            if self._base_offset is None:
+                self._base_offset = self._find_base_offset()
+
+            # Calculate the initial address using the module base and a base offset.
+            addr = self._module_base + self._base_offset
+            hop_addrs = []
+            hop_values = []
+            for i, off in enumerate(self._offsets):
+                try:
+                    value = self.process.read_pointer(addr)
+                    next_addr = value + off
+                    if next_addr == off:
+                        self._report_debug("Next address equals offset (%d) at index %d", off, i)
+                        raise Exception(f"Next address equals offset ({off}) at index {i}")
+                    if next_addr < 4096 and i < len(self._offsets) - 1:
+                        self._report_debug("Next address too low (%d) at index %d", next_addr, i)
+                        raise Exception(f"Next address too low ({next_addr}) at index {i}")
+                except MemoryBackendError as e:
+                    self._report_error("MemoryBackendError during pointer chain at index %d: %s", i, e)
+                    return None
+                except Exception as e:
+                    self._report_error("Exception during pointer chain at index %d: %s", i, e)
+                    return None
+                hop_addrs.append(addr)
+                hop_values.append(value)
+                addr = next_addr
+
+            self._hop_addrs = hop_addrs
+            self._hop_values = hop_values
+            self.hp_addr = addr
+            if self.verbose:
+                self.log_chain()
+            return addr
+
+        except MemoryBackendError as e:
+            self._report_error("MemoryBackendError in get_hp_address: %s", e)
+            return None
+        except Exception as e:
+            self._report_error("Exception in get_hp_address: %s", e)
             return None
- 
-        # Calculate the initial address using the module base and a base offset.
-        base_addr = mod.lpBaseOfDll + config.BASE_OFFSET
-        addr = base_addr
-        chain_addresses = [addr]
-        for i, off in enumerate(config.OFFSETS):
+
+    # Prints the resolved chain in developer debug mode, if the pointer path (excluding
+    # the final HP address) differs from the last one printed.
+    def log_chain(self):
+        global _last_successful_chain
+        hop_addrs = self._hop_addrs
+        if hop_addrs is None or not log.isEnabledFor(logs.DEBUG) or _last_successful_chain == tuple(hop_addrs):
+            return
+        log.debug("Pointer chain resolved:")
+        for i, (a, off) in enumerate(zip(hop_addrs + [self.hp_addr], [0] + self._offsets)):
+            log.debug("  Step %d: addr=0x%X offset=0x%X", i, a, off)
+        _last_successful_chain = tuple(hop_addrs)
+
+    # Rate limited per formatted message, since a failing resolve repeats on every attempt:
+    # the same error is logged once per LOG_RATE_LIMIT, a different one (another module,
+    # hop or exception text) at once.
+    def _report_error(self, msg, *args):
+        if self.verbose:
+            log.error(msg, *args, extra=logs.rate_limited(msg % args))
+
+    def _report_debug(self, msg, *args):
+        if self.verbose and log.isEnabledFor(logs.DEBUG):
+            log.debug(msg, *args, extra=logs.rate_limited(msg % args))
+
+    # Base offset from the configured signature, or config.BASE_OFFSET if it does not match.
+    def _find_base_offset(self):
+        try:
+            base_offset = find_base_offset(self.process, self._module_name)
+            log.info("Base offset from signature: 0x%X", base_offset)
+            return base_offset
+        except SignatureError as e:
+            log.error("Signature scan failed: %s Using BASE_OFFSET from config.py.", e)
+            return config.BASE_OFFSET
+
+    # Re-reads only the hop values of the cached chain. Falls back to a full walk
+    # if nothing is cached yet or a hop has changed.
+    def revalidate(self):
+        if self._hop_addrs is None:
+            return self.resolve()
+        try:
+            read_pointer = self.process.read_pointer
+            for addr, value in zip(self._hop_addrs, self._hop_values):
+                if read_pointer(addr) != value:
+                    break
+            else:
+                self.revalidations += 1
+                return self.hp_addr
+        except MemoryBackendError:
+            pass
+        self.invalidations += 1
+        return self.resolve()
+
+    def stats(self):
+        return {
+            "full_resolves": self.full_resolves,
+            "revalidations": self.revalidations,
+            "invalidations": self.invalidations,
+        }
+
+
+# Resolves every configured pointer chain (config.POINTER_CHAINS) and follows the one
+# whose HP value is plausible and agrees with most other chains. The winner is kept and
+# only revalidated; when it fails, the other chains are evaluated again right away.
+class MultiChainResolver:
+    _MAX_PLAUSIBLE_HP = 1e7
+    _AGREE_TOLERANCE = 1.0
+
+    def __init__(self, pm, chains=None, module_name=None):
+        self.process = pm
+        if chains is None:
+            chains = config.POINTER_CHAINS
+            # In signature mode the first chain's base offset comes from the signature.
+            first_base = None if config.BASE_SIGNATURE else chains[0][0]
+            chains = [(first_base, chains[0][1])] + list(chains[1:])
+        self.chains = [(base_offset, list(offsets)) for base_offset, offsets in chains]
+        self._resolvers = [PointerChainResolver(pm, base_offset, offsets, module_name, verbose=False)
+                           for base_offset, offsets in self.chains]
+        self.winner = None
+        self.hp_addr = None
+
+        # Counters for verifying the savings per session, and per chain.
+        self.full_resolves = 0
+        self.revalidations = 0
+        self.invalidations = 0
+        self.failovers = 0
+        # resolve() calls that found no plausible HP address.
+        self.failures = 0
+        self.chain_successes = [0] * len(self.chains)
+        self.chain_failures = [0] * len(self.chains)
+
+    # Evaluates all chains (except `exclude`) and picks the winner. Returns the HP address or None.
+    def resolve(self, exclude=None):
+        self.full_resolves += 1
+        chains_by_addr = {}
+        for i, resolver in enumerate(self._resolvers):
+            if i == exclude:
+                continue
+            addr = resolver.resolve()
             if addr is None:
-                error_msg = f"[ERROR] Address is None at offset index {i}"
-                debug_print_throttled(error_msg)
-                raise Exception(error_msg)
-            try:
-                next_addr = pm.read_ulonglong(addr) + off
-                if next_addr == off:
-                    error_msg = f"[ERROR] Next address equals offset ({off}) at index {i}"
-                    debug_print_throttled(error_msg)
-                    raise Exception(error_msg)
-                if next_addr < 4096 and i < len(config.OFFSETS) -1:
-                    error_msg = f"[ERROR] Next address too low ({next_addr}) at index {i}"
-                    debug_print_throttled(error_msg)
-                    raise Exception(error_msg)
-                addr = next_addr
-                chain_addresses.append(addr)
-            except pymem_exception.PymemError as e:
-                error_msg = f"[ERROR] PymemError during pointer chain at index {i}: {e}"
-                print_error_throttled(error_msg)
-                return None
-            except Exception as e:
-                error_msg = f"[ERROR] Exception during pointer chain at index {i}: {e}"
-                print_error_throttled(error_msg)
-                return None
-        # Only print the pointer chain if the pointer path (excluding the final HP address) is different
-        current_pointer_path = tuple(chain_addresses[:-1])
-        if get_hp_address.last_successful_chain != current_pointer_path:
-            debug_print("[DEBUG] Pointer chain resolved:")
-            for i, (a, off) in enumerate(zip(chain_addresses, [0] + list(config.OFFSETS))):
-                debug_print(f"  Step {i}: addr=0x{a:X} offset=0x{off:X}")
-            get_hp_address.last_successful_chain = current_pointer_path
-        get_hp_address.last_error = None
+                self.chain_failures[i] += 1
+            else:
+                chains_by_addr.setdefault(addr, []).append(i)
+
+        # One read per distinct address; chains reading about the same HP agree.
+        readings = []  # (hp value, chain indexes)
+        for addr, chains in chains_by_addr.items():
+            value = self._plausible_hp(addr)
+            if value is None:
+                for i in chains:
+                    self.chain_failures[i] += 1
+            else:
+                readings.append((value, chains))
+        # HP 0 only counts when no chain reads anything else: stale chains often land on
+        # zeroed memory and would outvote the live one, but a dead character reads 0 on all.
+        live = any(value != 0.0 for value, _ in readings)
+        groups = []  # [hp value, chain indexes]
+        for value, chains in readings:
+            if live and value == 0.0:
+                for i in chains:
+                    self.chain_failures[i] += 1
+                continue
+            for i in chains:
+                self.chain_successes[i] += 1
+            for group in groups:
+                if abs(group[0] - value) <= self._AGREE_TOLERANCE:
+                    group[1].extend(chains)
+                    break
+            else:
+                groups.append([value, list(chains)])
+
+        if not groups:
+            self.winner = None
+            self.hp_addr = None
+            self.failures += 1
+            # Right after the game starts its module is not loaded yet; the worker waits for it.
+            if any(resolver._module_base is not None for resolver in self._resolvers):
+                log.error("No pointer chain resolved to a plausible HP value.", extra=_NO_PLAUSIBLE_CHAIN)
+            return None
+
+        # The largest group wins, ties go to the group with the earlier chain.
+        best = max(groups, key=lambda group: (len(group[1]), -min(group[1])))
+        if len(groups) > 1:
+            log.debug("Pointer chains disagree: %s", _ChainGroups(groups), extra=_CHAINS_DISAGREE)
+        winner = min(best[1])
+        if winner != self.winner:
+            log.info("Using pointer chain #%d of %d.", winner + 1, len(self.chains))
+        self.winner = winner
+        self.hp_addr = self._resolvers[winner].hp_addr
+        self._resolvers[winner].log_chain()
+        return self.hp_addr
+
+    # Re-checks the winning chain only; falls back to the other chains if it fails. HP 0
+    # passes here, so a dead character does not cause a failover.
+    def revalidate(self):
+        if self.winner is None:
+            return self.resolve()
+        resolver = self._resolvers[self.winner]
+        if self._plausible_hp(resolver.revalidate()) is not None:
+            self.revalidations += 1
+            self.chain_successes[self.winner] += 1
+            self.hp_addr = resolver.hp_addr
+            return self.hp_addr
+        self.invalidations += 1
+        return self.failover()
+
+    # Switches to another chain after the winner's address or value became invalid.
+    def failover(self):
+        failed = self.winner
+        if failed is not None:
+            self.chain_failures[failed] += 1
+        self.failovers += 1
+        addr = self.resolve(exclude=failed)
+        if addr is None and failed is not None:
+            addr = self.resolve()
         return addr
- 
-    except pymem_exception.PymemError as e:
-        error_msg = f"[ERROR] PymemError in get_hp_address: {e}"
-        print_error_throttled(error_msg)
-        return None
-    except Exception as e:
-         error_msg = f"[ERROR] Exception in get_hp_address: {e}"
-         print_error_throttled(error_msg)
-         return None
- 
-# Checks if the target game window is currently the foreground (active) window.
-def is_target_window_foreground():
-    # Find the handle of the target window by its title.
-    target_hwnd = FindWindow(None, config.WINDOW_TITLE)
-    if target_hwnd:
-        # Get the handle of the current foreground window.
-        foreground_hwnd = GetForegroundWindow()
-        # Return True if the target window is the foreground window.
-        return target_hwnd == foreground_hwnd
-    # Return False if the target window was not found.
-    return False
-
-
-def debug_print(message):
-    if user_cfg and user_cfg['DEVELOPER_DEBUG']:
-        print('> ' + message)
\ No newline at end of file
+
+    # HP value at the address if it reads as a plausible HP, otherwise None.
+    def _plausible_hp(self, addr):
+        if addr is None:
+            return None
+        try:
+            value = self.process.read_float(addr)
+        except MemoryBackendError:
+            return None
+        if not isfinite(value) or not 0.0 <= value <= self._MAX_PLAUSIBLE_HP:
+            return None
+        return value
+
+    def stats(self):
+        return {
+            "full_resolves": self.full_resolves,
+            "revalidations": self.revalidations,
+            "invalidations": self.invalidations,
+            "failovers": self.failovers,
+            "failures": self.failures,
+            "chains": list(zip(self.chain_successes, self.chain_failures)),
+        }
+
+
+# Log argument formatting the disagreeing chain groups only if the message is written.
+class _ChainGroups:
+    def __init__(self, groups):
+        self.groups = groups
+
+    def __str__(self):
+        return str([(sorted(chains), value) for value, chains in self.groups])
+
+
+# Attempts to find the final memory address of the player's HP using base address and offsets.
+def get_hp_address(pm):
+    return PointerChainResolver(pm).resolve()
+
+
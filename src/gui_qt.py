@@ -1,15 +1,173 @@
-from PyQt5.QtCore import Qt, QPoint, pyqtSignal, pyqtSlot
+from array import array
+from math import isnan
+from time import monotonic
+from PyQt5.QtCore import Qt, QPoint, QPointF, QRect, QTimer, pyqtSignal, pyqtSlot
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel
-from PyQt5.QtGui import QFont, QPalette
+from PyQt5.QtGui import QColor, QFont, QPainter, QPalette, QPen, QPolygonF
 from keyboard import add_hotkey, remove_hotkey
 from worker import AutoPotionWorker
+from user_config import ConfigWatcher
+from metrics import start_metrics_server
+import logs
 import config
 
+# Forwards a client's emits to an overlay signal, tagged with the client's row.
+class _RowSignal:
+    def __init__(self, signal, slot):
+        self._emit = signal.emit
+        self._slot = slot
+
+    def emit(self, *args):
+        self._emit(self._slot, *args)
+
+
+# What a multibox client's AutoPotionWorker sees as its gui: signals that update one overlay row.
+class _ClientRow:
+    def __init__(self, overlay, slot):
+        self.snapshot_signal = _RowSignal(overlay.client_snapshot_signal, slot)
+        self.log_signal = _RowSignal(overlay.client_log_signal, slot)
+
+
+# HP over the last `seconds` as a fraction of max HP, against the threshold line. Drawn as a
+# sweep: a fixed ring of `rate * seconds` time slots is overwritten in place, so a frame
+# repaints only the pixels around the slots written since the previous one. Slots are
+# filled from the clock when a sample or a frame comes in, so frames only set how often the
+# line is repainted: at most SPARKLINE_FPS times per second, mostly while handling the
+# worker's snapshots anyway, and once a second from its own timer while HP is unchanged.
+# Each slot keeps the lowest HP seen during it.
+class HpSparkline(QWidget):
+    def __init__(self, seconds, rate, fps=None, parent=None):
+        super().__init__(parent)
+        self._rate = rate
+        self._size = max(2, int(seconds * rate))
+        self._values = array('f', [float('nan')]) * self._size
+        # Screen points of the slots, rebuilt on resize; a new value only moves its point's y.
+        self._polygon = QPolygonF([QPointF() for _ in range(self._size)])
+        # Slot being filled, counted from the monotonic clock, and the lowest and latest HP seen during it.
+        self._slot = int(monotonic() * rate)
+        self._low = None
+        self._last = float('nan')
+        self._threshold = float('nan')
+        self._dirty_from = None
+        self._frame_interval = 1.0 / (fps or config.SPARKLINE_FPS)
+        self._last_frame = 0.0
+        self._hp_pen = QPen(QColor('#DDDDDD'), 1)
+        self._threshold_pen = QPen(QColor('orange'), 1, Qt.DashLine)
+        self._frame_timer = QTimer(self)
+        self._frame_timer.setSingleShot(True)
+        self._frame_timer.timeout.connect(self.frame)
+        self.setFixedHeight(config.SPARKLINE_HEIGHT)
+
+    # Feeds one worker snapshot's values; cheap enough to call for every snapshot.
+    def add_sample(self, hp, max_hp, threshold):
+        self._fill_slots()
+        if hp is None or not max_hp:
+            self._last = float('nan')
+            return
+        fraction = hp / max_hp
+        self._last = fraction
+        if self._low is None or fraction < self._low:
+            self._low = fraction
+        threshold = float('nan') if threshold is None else threshold / max_hp
+        if threshold != self._threshold and not (isnan(threshold) and isnan(self._threshold)):
+            self._threshold = threshold
+            self.update()
+        if not self.isVisible():
+            return
+        wait = self._last_frame + self._frame_interval - monotonic()
+        if wait <= 0:
+            self.frame()
+        elif not self._frame_timer.isActive() or self._frame_timer.remainingTime() > wait * 1000:
+            self._frame_timer.start(int(wait * 1000) + 1)
+
+    # Writes the slots that ended since the last call: the lowest HP seen during the slot,
+    # or the latest HP for slots without a sample.
+    def _fill_slots(self):
+        now = int(monotonic() * self._rate)
+        if now == self._slot:
+            return
+        if self._dirty_from is None:
+            self._dirty_from = self._slot
+        first = max(self._slot, now - self._size)
+        for slot in range(first, now):
+            value = self._last if self._low is None else self._low
+            self._low = None
+            i = slot % self._size
+            self._values[i] = value
+            if not isnan(value):
+                self._polygon.replace(i, QPointF(self._polygon.at(i).x(), self._y(value)))
+        self._slot = now
+
+    # Repaints the slots written since the previous frame; the next frame comes within a
+    # second unless there is no HP or the sparkline is hidden.
+    def frame(self):
+        self._fill_slots()
+        self._last_frame = monotonic()
+        if self._dirty_from is not None:
+            self._update_slots(self._dirty_from, self._slot)
+            self._dirty_from = None
+        if isnan(self._last) or not self.isVisible():
+            self._frame_timer.stop()
+        else:
+            self._frame_timer.start(1000)
+
+    # Repaints from the slot before `first` (its segment into `first` changes) to slot `end`.
+    def _update_slots(self, first, end):
+        if end - first + 1 >= self._size or (first - 1) % self._size > end % self._size:
+            self.update()
+            return
+        left = int(self._polygon.at((first - 1) % self._size).x()) - 1
+        right = int(self._polygon.at(end % self._size).x()) + 2
+        self.update(QRect(left, 0, right - left, self.height()))
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.frame()
+
+    def _y(self, fraction):
+        return 1 + (self.height() - 3) * (1.0 - min(1.0, max(0.0, fraction)))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        step = (self.width() - 1) / (self._size - 1)
+        for i, value in enumerate(self._values):
+            self._polygon.replace(i, QPointF(i * step, self._y(0.0 if isnan(value) else value)))
+
+    # Draws the slots under the dirty rectangle, in runs split at empty slots and at the
+    # slot being filled, which separates the newest values from the oldest.
+    def paintEvent(self, event):
+        rect = event.rect()
+        painter = QPainter(self)
+        if not isnan(self._threshold):
+            painter.setPen(self._threshold_pen)
+            y = int(self._y(self._threshold))
+            painter.drawLine(rect.left(), y, rect.right(), y)
+        step = (self.width() - 1) / (self._size - 1)
+        first = max(0, int(rect.left() / step) - 1)
+        last = min(self._size - 1, int(rect.right() / step) + 2)
+        painter.setPen(self._hp_pen)
+        values, polygon, head = self._values, self._polygon, self._slot % self._size
+        start = None
+        for i in range(first, last + 1):
+            if isnan(values[i]) or i == head:
+                if start is not None and i - start > 1:
+                    painter.drawPolyline(polygon.mid(start, i - start))
+                start = None if isnan(values[i]) else i
+            elif start is None:
+                start = i
+        if start is not None and last + 1 - start > 1:
+            painter.drawPolyline(polygon.mid(start, last + 1 - start))
+        painter.end()
+
+
 class OverlayWindow(QWidget):
-    status_signal = pyqtSignal(str, str)
-    hp_signal = pyqtSignal(float, float)
-    threshold_signal = pyqtSignal(float)
-    log_signal = pyqtSignal(float, float)
+    # (hp, max_hp, threshold, status text, status color) from the worker's DisplayChannel.
+    snapshot_signal = pyqtSignal(object)
+    # (hp, max_hp) of a potion use; max_hp is None when a rule fires before max HP is known.
+    log_signal = pyqtSignal(float, object)
+    # Multibox: (row, snapshot) and (row, hp, max_hp) of one game client.
+    client_snapshot_signal = pyqtSignal(int, object)
+    client_log_signal = pyqtSignal(int, float, object)
 
     def __init__(self, user_cfg):
         self.user_cfg = user_cfg
@@ -27,10 +185,25 @@ class OverlayWindow(QWidget):
             config.COLOR_PAUSED: "blue"
         }
         self._default_status_color = "white"
-        self.status_signal.connect(self.set_status)
-        self.hp_signal.connect(self.set_hp)
-        self.threshold_signal.connect(self.set_threshold)
+        self._status_text = None
+        self._status_color_key = None
+        self._status_color = None
+        # Latest snapshot from the worker and the one currently shown.
+        self._pending_snapshot = None
+        self._shown_snapshot = (None, None, None, None, None)
+        # Multibox rows: latest snapshot per row and the row labels.
+        self._pending_client_rows = {}
+        self._client_rows = {}
+        self.sparkline = None
+        refresh_rate = float(self.user_cfg.get('OVERLAY_REFRESH_RATE', config.OVERLAY_REFRESH_RATE))
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(max(1, int(1000 / refresh_rate)) if refresh_rate > 0 else 0)
+        self._refresh_timer.timeout.connect(self._apply_pending_snapshot)
+        self.snapshot_signal.connect(self.queue_snapshot)
         self.log_signal.connect(self.add_potion_log)
+        self.client_snapshot_signal.connect(self.queue_client_snapshot)
+        self.client_log_signal.connect(self.add_client_potion_log)
         self.move_locked = True
         self.init_ui()
         self._register_hotkey()
@@ -43,6 +216,8 @@ class OverlayWindow(QWidget):
         print(f"  {self.user_cfg['HOTKEY_HIDE_SHOW']:<20} - Show/Hide Overlay")
         print(f"  {self.user_cfg['HOTKEY_CLOSE']:<20} - Close overlay")
         print(f"  {self.user_cfg['HOTKEY_LOCK_MOVE']:<20} - Lock/Unlock movement")
+        if self.user_cfg['DEVELOPER_DEBUG']:
+            print(f"  {self._dump_stats_hotkey():<20} - Print latency histograms")
         print("\nAuto Potion configuration:")
         print(f"  Potion Key: {self.user_cfg['POTION_KEY']}")
         print(f"  Threshold: {int(float(self.user_cfg['THRESHOLD_PCT'])*100)}%")
@@ -72,7 +247,6 @@ class OverlayWindow(QWidget):
         self.setAttribute(Qt.WA_TranslucentBackground)
         pos_x = int(self.user_cfg['INITIAL_POS_X'])
         pos_y = int(self.user_cfg['INITIAL_POS_Y'])
-        self.setFixedSize(182, 170)
         self.move(pos_x, pos_y)
 
         # Palette for white text
@@ -101,6 +275,12 @@ class OverlayWindow(QWidget):
         self.threshold_label.setStyleSheet('color: white;')
         self.layout.addWidget(self.threshold_label)
 
+        sparkline_seconds = float(self.user_cfg.get('SPARKLINE_SECONDS', config.SPARKLINE_SECONDS))
+        if sparkline_seconds > 0 and not self.user_cfg.get('MULTIBOX', config.MULTIBOX):
+            self.sparkline = HpSparkline(sparkline_seconds, config.SPARKLINE_RATE)
+            self.layout.addWidget(self.sparkline)
+        self._fit_client_rows()
+
         self.log_labels = []
         for _ in range(self._max_logs):
             log_label = QLabel('')
@@ -111,12 +291,92 @@ class OverlayWindow(QWidget):
 
         self.setLayout(self.layout)
         self.update_log(["..."]*self._max_logs)
+        if self.user_cfg.get('MULTIBOX', config.MULTIBOX):
+            # One row per game client instead.
+            self.hp_label.hide()
+            self.threshold_label.hide()
+
+    # Stores the latest worker snapshot; it is shown at most OVERLAY_REFRESH_RATE times per second, and not while hidden.
+    @pyqtSlot(object)
+    def queue_snapshot(self, snapshot):
+        self._pending_snapshot = snapshot
+        if self.sparkline is not None:
+            self.sparkline.add_sample(snapshot[0], snapshot[1], snapshot[2])
+        if self.isVisible() and not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+
+    # Stores the latest snapshot of one multibox client; shown with the next refresh.
+    @pyqtSlot(int, object)
+    def queue_client_snapshot(self, slot, snapshot):
+        self._pending_client_rows[slot] = snapshot
+        if self.isVisible() and not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+
+    def _apply_pending_snapshot(self):
+        if not self.isVisible():
+            return
+        if self._pending_client_rows:
+            rows, self._pending_client_rows = self._pending_client_rows, {}
+            for slot, row_snapshot in rows.items():
+                self._set_client_row(slot, row_snapshot)
+        snapshot = self._pending_snapshot
+        if snapshot is None:
+            return
+        self._pending_snapshot = None
+        hp, max_hp, threshold, status_text, color_key = snapshot
+        shown_hp, shown_max_hp, shown_threshold, _, _ = self._shown_snapshot
+        if status_text != self._status_text or color_key != self._status_color_key:
+            self.set_status(status_text, color_key)
+        if hp != shown_hp or max_hp != shown_max_hp:
+            self.set_hp(hp, max_hp)
+        if threshold != shown_threshold:
+            self.set_threshold(threshold)
+        self._shown_snapshot = snapshot
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self._pending_snapshot is not None or self._pending_client_rows:
+            self._apply_pending_snapshot()
+
+    # Shows one multibox client as "#n hp/max (pct%)" in its status color; a snapshot
+    # without a status removes the row.
+    def _set_client_row(self, slot, snapshot):
+        hp, max_hp, _, status_text, color_key = snapshot
+        label = self._client_rows.get(slot)
+        if status_text is None:
+            if label is not None:
+                del self._client_rows[slot]
+                self.layout.removeWidget(label)
+                label.deleteLater()
+                self._fit_client_rows()
+            return
+        if label is None:
+            label = self._client_rows[slot] = QLabel('')
+            label.setFont(QFont('Segoe UI', 11))
+            position = self.layout.indexOf(self.threshold_label) + 1 + sum(1 for s in self._client_rows if s < slot)
+            self.layout.insertWidget(position, label)
+            self._fit_client_rows()
+        if hp is not None and max_hp:
+            label.setText(f'#{slot + 1}  {int(hp)}/{int(max_hp)} ({hp / max_hp * 100:5.1f}%)')
+        else:
+            label.setText(f'#{slot + 1}  {status_text}')
+        label.setStyleSheet(f'color: {self._status_color_mapping.get(color_key, self._default_status_color)};')
+
+    # Grows the window for the sparkline and for more than two client rows (the hidden HP
+    # and threshold lines hold two).
+    def _fit_client_rows(self):
+        sparkline_height = config.SPARKLINE_HEIGHT + self.layout.spacing() if self.sparkline is not None else 0
+        self.setFixedSize(182, 170 + sparkline_height + 24 * max(0, len(self._client_rows) - 2))
 
     @pyqtSlot(str, str)
     def set_status(self, status_text, color_key):
         self.status_label.setText(f'Status: {status_text}')
+        self._status_text = status_text
+        self._status_color_key = color_key
         color = self._status_color_mapping.get(color_key, self._default_status_color)
-        self.status_label.setStyleSheet(f'color: {color};')
+        if color != self._status_color:
+            self.status_label.setStyleSheet(f'color: {color};')
+            self._status_color = color
 
     @pyqtSlot(float, float)
     def set_hp(self, current_hp, max_hp):
@@ -133,8 +393,8 @@ class OverlayWindow(QWidget):
         else:
             self.threshold_label.setText('Threshold: -')
 
-    @pyqtSlot(float, float)
-    def add_potion_log(self, hp_value, max_hp=None):
+    @pyqtSlot(float, object)
+    def add_potion_log(self, hp_value, max_hp=None, label=None):
         from datetime import datetime
         timestamp = datetime.now().strftime("%H:%M:%S")
         if max_hp is not None and max_hp > 0:
@@ -142,10 +402,16 @@ class OverlayWindow(QWidget):
             log_entry = f"{timestamp}   {int(hp_value):>5}   {hp_pct:5.1f}%"
         else:
             log_entry = f"{timestamp}   {int(hp_value):>5}"
+        if label is not None:
+            log_entry = f"{label} {log_entry}"
         self._potion_logs.insert(0, log_entry)
         self._potion_logs = self._potion_logs[:self._max_logs]
         self.update_log(self._potion_logs)
 
+    @pyqtSlot(int, float, object)
+    def add_client_potion_log(self, slot, hp_value, max_hp):
+        self.add_potion_log(hp_value, max_hp, label=f"#{slot + 1}")
+
     def update_log(self, log_lines):
         for i, label in enumerate(self.log_labels):
             label.setText(log_lines[i] if i < len(log_lines) else '')
@@ -156,18 +422,31 @@ class OverlayWindow(QWidget):
             self.set_status("ON", config.COLOR_ON)
         else:
             self.set_status("OFF", config.COLOR_OFF)
+        if hasattr(self, 'worker_thread'):
+            self.worker_thread.wake()
 
     def _register_hotkey(self):
         add_hotkey(self.user_cfg['HOTKEY_TOGGLE'], self.toggle_auto_potion)
         add_hotkey(self.user_cfg['HOTKEY_CLOSE'], self._close_via_hotkey)
         add_hotkey(self.user_cfg['HOTKEY_HIDE_SHOW'], self.toggle_visibility)
         add_hotkey(self.user_cfg['HOTKEY_LOCK_MOVE'], self.toggle_move_lock)
+        if self.user_cfg['DEVELOPER_DEBUG']:
+            add_hotkey(self._dump_stats_hotkey(), self._dump_latency_stats)
 
     def _unregister_hotkey(self):
         remove_hotkey(self.user_cfg['HOTKEY_TOGGLE'])
         remove_hotkey(self.user_cfg['HOTKEY_CLOSE'])
         remove_hotkey(self.user_cfg['HOTKEY_HIDE_SHOW'])
         remove_hotkey(self.user_cfg['HOTKEY_LOCK_MOVE'])
+        if self.user_cfg['DEVELOPER_DEBUG']:
+            remove_hotkey(self._dump_stats_hotkey())
+
+    def _dump_stats_hotkey(self):
+        return self.user_cfg.get('HOTKEY_DUMP_STATS', config.HOTKEY_DUMP_STATS)
+
+    def _dump_latency_stats(self):
+        if hasattr(self, 'worker_thread'):
+            self.worker_thread.dump_latency_stats()
 
     def _close_via_hotkey(self):
         self.close()
@@ -185,16 +464,31 @@ class OverlayWindow(QWidget):
         print(f"[Overlay] Move lock: {'ON' if self.move_locked else 'OFF'}")
 
     def _start_worker(self):
-        self.worker_thread = AutoPotionWorker(
-            status_text_var=None,
-            status_color_var=None,
-            enabled_flag=self,
-            add_potion_log_callback=self.add_potion_log,
-            gui=self,
-            user_cfg=self.user_cfg
-        )
+        if self.user_cfg.get('MULTIBOX', config.MULTIBOX):
+            from multibox import MultiboxWorker
+            self.worker_thread = MultiboxWorker(None, None, self, gui=self, user_cfg=self.user_cfg,
+                                                client_view=self._client_view)
+        else:
+            self.worker_thread = AutoPotionWorker(
+                status_text_var=None,
+                status_color_var=None,
+                enabled_flag=self,
+                add_potion_log_callback=self.add_potion_log,
+                gui=self,
+                user_cfg=self.user_cfg
+            )
         self.worker_thread.daemon = True
         self.worker_thread.start()
+        # Hands config_user.ini changes to the worker (hotkeys and overlay settings need a restart).
+        self.config_watcher = ConfigWatcher(self.worker_thread.apply_user_config)
+        self.config_watcher.start()
+        self.metrics_server = start_metrics_server(self.worker_thread, self.user_cfg.get('METRICS_PORT', config.METRICS_PORT))
+
+    # AutoPotionWorker arguments of multibox client `slot`: updates go to its overlay row.
+    def _client_view(self, slot):
+        row = _ClientRow(self, slot)
+        return {"status_text_var": None, "status_color_var": None, "gui": row,
+                "add_potion_log_callback": row.log_signal.emit}
 
     # Allow dragging the window
     def mousePressEvent(self, event):
@@ -220,7 +514,10 @@ class OverlayWindow(QWidget):
         self._unregister_hotkey()
         if hasattr(self, 'worker_thread') and self.worker_thread.is_alive():
             self.worker_thread.signal_shutdown()
+            # Lets the worker close its HP trace before the process ends.
+            self.worker_thread.join(2.0)
         event.accept()
+        logs.stop()
         import os
         os._exit(0)
 
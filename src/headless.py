@@ -0,0 +1,178 @@
+from collections import deque
+from datetime import datetime
+from sys import stdout
+from threading import Thread, Event
+
+import config
+from worker import AutoPotionWorker
+
+# Headless front end: no Qt, the worker's non-GUI status path shown as a single console
+# status line. The worker only stores the latest status text and queues potion log lines;
+# a console thread writes them at most OVERLAY_REFRESH_RATE times per second, so the
+# worker never waits on the console.
+
+
+# Status text/color variables of the worker's non-GUI path, drawn as one console line.
+class ConsoleStatusLine(Thread):
+    def __init__(self, refresh_rate=None, stream=stdout):
+        super().__init__(name="ConsoleStatus", daemon=True)
+        refresh_rate = config.OVERLAY_REFRESH_RATE if refresh_rate is None else refresh_rate
+        self._period = 1.0 / refresh_rate if refresh_rate > 0 else 0.05
+        self._stream = stream
+        self._text = None
+        self._shown = None
+        self._width = 0
+        self._log_lines = deque()
+        self._stop_event = Event()
+        self.writes = 0
+
+    # Worker side: status text variable.
+    def set(self, text):
+        self._text = text
+
+    def get(self):
+        return self._text
+
+    # Worker side: queues one potion log line (label: the multibox client).
+    def add_potion_log(self, hp_value, max_hp=None, label=None):
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        prefix = "[Potion]" if label is None else f"[Potion {label}]"
+        if max_hp:
+            self._log_lines.append(f"{prefix} {timestamp}   {int(hp_value):>5}   {hp_value / max_hp * 100:5.1f}%")
+        else:
+            self._log_lines.append(f"{prefix} {timestamp}   {int(hp_value):>5}")
+
+    def run(self):
+        while not self._stop_event.wait(self._period):
+            self._flush()
+        self._flush()
+
+    def _flush(self):
+        text = self._text
+        if text == self._shown and not self._log_lines:
+            return
+        out = []
+        while self._log_lines:
+            # Log lines scroll above the status line.
+            out.append("\r" + self._log_lines.popleft().ljust(self._width) + "\n")
+        if text is not None:
+            out.append("\r" + text.ljust(self._width))
+            self._width = max(self._width, len(text))
+        self._shown = text
+        self._stream.write("".join(out))
+        self._stream.flush()
+        self.writes += 1
+
+    def stop(self):
+        self._stop_event.set()
+
+
+# Color variable of the non-GUI path; the console line has no colors.
+class _IgnoredStatusColor:
+    def set(self, value):
+        pass
+
+
+# Enabled flag toggled by the toggle hotkey.
+class EnabledFlag:
+    def __init__(self, enabled):
+        self.enabled = enabled
+
+    def get(self):
+        return self.enabled
+
+
+# Worker plus console status line, without Qt. memory_backend and hotkeys=False are for benchmarks.
+class HeadlessApp:
+    def __init__(self, user_cfg, memory_backend=None, hotkeys=True, start_enabled=True):
+        self.user_cfg = user_cfg
+        self.status = ConsoleStatusLine(user_cfg.OVERLAY_REFRESH_RATE)
+        self.enabled = EnabledFlag(start_enabled)
+        if user_cfg.MULTIBOX:
+            from multibox import MultiboxWorker, StatusSlots
+            self._status_slots = StatusSlots(self.status)
+            self.worker = MultiboxWorker(self._status_slots.slot(-1), _IgnoredStatusColor(), self.enabled,
+                                         user_cfg=user_cfg, memory_backend=memory_backend,
+                                         client_view=self._client_view)
+        else:
+            self.worker = AutoPotionWorker(self.status, _IgnoredStatusColor(), self.enabled,
+                                           add_potion_log_callback=self.status.add_potion_log,
+                                           user_cfg=user_cfg, memory_backend=memory_backend)
+        self.worker.daemon = True
+        self._hotkeys = hotkeys
+        self._closed = Event()
+        self._watcher = None
+        self._metrics = None
+
+    # AutoPotionWorker arguments of multibox client `slot`: its part of the status line.
+    def _client_view(self, slot):
+        label = f"#{slot + 1}"
+        add_potion_log = self.status.add_potion_log
+        return {"status_text_var": self._status_slots.slot(slot, label + " "),
+                "status_color_var": _IgnoredStatusColor(),
+                "add_potion_log_callback": lambda hp_value, max_hp: add_potion_log(hp_value, max_hp, label)}
+
+    def toggle(self):
+        self.enabled.enabled = not self.enabled.enabled
+        self.worker.wake()
+
+    def close(self):
+        self._closed.set()
+
+    def start(self):
+        user_cfg = self.user_cfg
+        print(f"\n[Last Epoch Auto Potion - v{config.APP_VERSION} (headless)]")
+        print(f"  Potion Key: {user_cfg.POTION_KEY}, Threshold: {int(user_cfg.THRESHOLD_PCT * 100)}%, "
+              f"Cooldown: {int(user_cfg.POTION_COOLDOWN * 1000)} ms")
+        if self._hotkeys:
+            self._register_hotkeys()
+        print(f"  Auto Potion starts {'ON' if self.enabled.enabled else 'OFF'}.")
+        print("--------------------------------------------------------")
+        from user_config import ConfigWatcher
+        self._watcher = ConfigWatcher(self.worker.apply_user_config)
+        self.status.start()
+        self.worker.start()
+        self._watcher.start()
+        from metrics import start_metrics_server
+        self._metrics = start_metrics_server(self.worker, user_cfg.METRICS_PORT)
+
+    def _register_hotkeys(self):
+        user_cfg = self.user_cfg
+        try:
+            from keyboard import add_hotkey
+            add_hotkey(user_cfg.HOTKEY_TOGGLE, self.toggle)
+            add_hotkey(user_cfg.HOTKEY_CLOSE, self.close)
+            if user_cfg.DEVELOPER_DEBUG:
+                add_hotkey(user_cfg.HOTKEY_DUMP_STATS, self.worker.dump_latency_stats)
+        except Exception as e:
+            print(f"[ERROR] Hotkeys unavailable ({str(e)[:100] or type(e).__name__}); Ctrl+C closes.")
+            return
+        print(f"  {user_cfg.HOTKEY_TOGGLE:<20} - Toggle Auto Potion")
+        print(f"  {user_cfg.HOTKEY_CLOSE:<20} - Close")
+
+    # Blocks until close() (the close hotkey) or Ctrl+C, then stops everything.
+    def wait(self):
+        try:
+            while not self._closed.wait(1.0):
+                pass
+        except KeyboardInterrupt:
+            pass
+        self.stop()
+
+    def stop(self):
+        if self._watcher is not None:
+            self._watcher.stop()
+        if self._metrics is not None:
+            self._metrics.stop()
+        self.worker.signal_shutdown()
+        self.worker.join(2.0)
+        self.status.stop()
+        if self.status.is_alive():
+            self.status.join()
+        print()
+
+
+def run_headless(user_cfg):
+    app = HeadlessApp(user_cfg)
+    app.start()
+    app.wait()
@@ -0,0 +1,150 @@
+from math import isnan, nan
+from mmap import ACCESS_READ, mmap
+from os import path
+from queue import Queue
+from struct import Struct
+from threading import Thread
+
+# HP trace file: a header followed by fixed-size little-endian records of
+# (monotonic seconds, HP, max HP, threshold, flags). Unknown max HP / threshold
+# are stored as NaN. The file is append-only; new sessions add records at the end.
+TRACE_MAGIC = b"LEHPTRC1"
+TRACE_VERSION = 1
+HEADER = Struct("<8sII")            # magic, version, record size
+RECORD = Struct("<dfffB3x")         # timestamp, hp, max_hp, threshold, flags
+FLAG_POTION_FIRED = 0x01
+
+# numpy dtype matching RECORD, for zero-copy column access.
+RECORD_DTYPE_FIELDS = {
+    "names": ["timestamp", "hp", "max_hp", "threshold", "flags"],
+    "formats": ["<f8", "<f4", "<f4", "<f4", "u1"],
+    "offsets": [0, 8, 12, 16, 20],
+    "itemsize": RECORD.size,
+}
+
+
+# Records HP samples into preallocated batch buffers on the hot thread and
+# writes full batches to disk from a background thread. A batch is also handed
+# over once it holds samples older than flush_interval seconds, so a crash loses
+# at most that much of the trace.
+class HpTraceRecorder:
+    def __init__(self, file_path, batch_records=4096, spare_buffers=3, flush_interval=1.0):
+        self.file_path = file_path
+        self.flush_interval = flush_interval
+        self._batch_size = batch_records * RECORD.size
+        self._batch_started = None
+        self._free_buffers = Queue()
+        for _ in range(spare_buffers):
+            self._free_buffers.put(bytearray(self._batch_size))
+        self._buffer = bytearray(self._batch_size)
+        self._offset = 0
+        self._pending = Queue()
+        self.records_written = 0
+
+        new_file = not path.exists(file_path) or path.getsize(file_path) == 0
+        if not new_file:
+            with open(file_path, "rb") as f:
+                magic, version, record_size = HEADER.unpack(f.read(HEADER.size))
+            if magic != TRACE_MAGIC or record_size != RECORD.size:
+                raise ValueError(f"Not a compatible HP trace file: {file_path}")
+        self._file = open(file_path, "ab")
+        if new_file:
+            self._file.write(HEADER.pack(TRACE_MAGIC, TRACE_VERSION, RECORD.size))
+
+        self._writer = Thread(target=self._write_batches, name="HpTraceWriter", daemon=True)
+        self._writer.start()
+
+    # Appends one sample. Only packs into the current buffer; never touches the file.
+    def record(self, timestamp, hp, max_hp, threshold, potion_fired):
+        if not self._offset:
+            self._batch_started = timestamp
+        RECORD.pack_into(self._buffer, self._offset, timestamp, hp,
+                         nan if max_hp is None else max_hp,
+                         nan if threshold is None else threshold,
+                         FLAG_POTION_FIRED if potion_fired else 0)
+        self._offset += RECORD.size
+        if self._offset == self._batch_size or timestamp - self._batch_started >= self.flush_interval:
+            self.flush()
+
+    # Hands the records buffered so far to the writer thread.
+    def flush(self):
+        if not self._offset:
+            return
+        self._pending.put((self._buffer, self._offset))
+        self.records_written += self._offset // RECORD.size
+        self._buffer = self._free_buffers.get() if not self._free_buffers.empty() else bytearray(self._batch_size)
+        self._offset = 0
+
+    def close(self):
+        self.flush()
+        self._pending.put(None)
+        self._writer.join()
+        self._file.close()
+
+    def _write_batches(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            buffer, length = item
+            with memoryview(buffer) as view:
+                self._file.write(view[:length])
+            self._file.flush()
+            self._free_buffers.put(buffer)
+
+
+# Memory-mapped, zero-copy reader for HP trace files.
+class HpTraceReader:
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, "rb") as f:
+            self._mmap = mmap(f.fileno(), 0, access=ACCESS_READ)
+        magic, version, record_size = HEADER.unpack_from(self._mmap, 0)
+        if magic != TRACE_MAGIC or record_size != RECORD.size:
+            self._mmap.close()
+            raise ValueError(f"Not a compatible HP trace file: {file_path}")
+        self.version = version
+        self._count = (len(self._mmap) - HEADER.size) // RECORD.size
+        self._view = memoryview(self._mmap)[HEADER.size:HEADER.size + self._count * RECORD.size]
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Returns (timestamp, hp, max_hp, threshold, potion_fired); unknown values are None.
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("HP trace record index out of range")
+        return _decode(RECORD.unpack_from(self._view, index * RECORD.size))
+
+    def __iter__(self):
+        for raw in RECORD.iter_unpack(self._view):
+            yield _decode(raw)
+
+    # Raw record tuples (NaN for unknown values, flags as an int), without per-field conversion.
+    def iter_raw(self):
+        return RECORD.iter_unpack(self._view)
+
+    # Structured numpy array viewing the mapped file (no copy).
+    def as_numpy(self):
+        import numpy
+        return numpy.frombuffer(self._view, dtype=numpy.dtype(RECORD_DTYPE_FIELDS), count=self._count)
+
+    def close(self):
+        self._view.release()
+        self._mmap.close()
+
+
+def _decode(raw):
+    timestamp, hp, max_hp, threshold, flags = raw
+    return (timestamp, hp,
+            None if isnan(max_hp) else max_hp,
+            None if isnan(threshold) else threshold,
+            bool(flags & FLAG_POTION_FIRED))
@@ -0,0 +1,162 @@
+import sys
+from time import perf_counter_ns
+
+import config
+import logs
+from instrumentation import LatencyHistogram
+
+log = logs.get_logger("input")
+
+# Input injectors press the potion key. inject(decided_ns) sends one key press and
+# records the time from the potion decision (a perf_counter_ns timestamp) until the
+# key was sent in the injector's "decision -> key sent" histogram.
+
+
+# Presses the key through the `keyboard` library (any platform it supports).
+class KeyboardLibInjector:
+    def __init__(self, key):
+        from keyboard import send
+        self.key = str(key)
+        self._send = send
+        self.latency = LatencyHistogram("decision -> key sent")
+
+    def inject(self, decided_ns):
+        self._send(self.key)
+        sent_ns = perf_counter_ns()
+        self.latency.record(sent_ns - decided_ns)
+        return sent_ns
+
+
+# Presses the key with a single SendInput call (Windows only). The key-down and
+# key-up INPUT structures are built once, so injecting is one ctypes call.
+class SendInputInjector:
+    _INPUT_KEYBOARD = 1
+    _KEYEVENTF_KEYUP = 0x0002
+    _KEYEVENTF_SCANCODE = 0x0008
+    _KEYEVENTF_EXTENDEDKEY = 0x0001
+
+    def __init__(self, key):
+        import ctypes
+        from ctypes import wintypes
+        from keyboard import key_to_scan_codes
+
+        class KEYBDINPUT(ctypes.Structure):
+            _fields_ = [("wVk", wintypes.WORD), ("wScan", wintypes.WORD), ("dwFlags", wintypes.DWORD),
+                        ("time", wintypes.DWORD), ("dwExtraInfo", ctypes.c_size_t)]
+
+        # Sized like the INPUT union (MOUSEINPUT is the largest member).
+        class INPUT(ctypes.Structure):
+            _fields_ = [("type", wintypes.DWORD), ("ki", KEYBDINPUT), ("_pad", ctypes.c_ubyte * 8)]
+
+        self.key = str(key)
+        scan_code = key_to_scan_codes(self.key)[0]
+        flags = self._KEYEVENTF_SCANCODE
+        if scan_code > 0xFF:
+            flags |= self._KEYEVENTF_EXTENDEDKEY
+            scan_code &= 0xFF
+        self._inputs = (INPUT * 2)(
+            INPUT(self._INPUT_KEYBOARD, KEYBDINPUT(0, scan_code, flags, 0, 0)),
+            INPUT(self._INPUT_KEYBOARD, KEYBDINPUT(0, scan_code, flags | self._KEYEVENTF_KEYUP, 0, 0)),
+        )
+        self._input_size = ctypes.sizeof(INPUT)
+        self._send_input = ctypes.windll.user32.SendInput
+        self.latency = LatencyHistogram("decision -> key sent")
+        self.failures = 0
+
+    def inject(self, decided_ns):
+        if self._send_input(2, self._inputs, self._input_size) != 2:
+            self.failures += 1
+        sent_ns = perf_counter_ns()
+        self.latency.record(sent_ns - decided_ns)
+        return sent_ns
+
+
+# Posts the key to one game client's window (Windows only), so it reaches that client
+# whether or not it is in the foreground (multibox). The window is looked up by process id
+# and title on first use and again whenever it goes away.
+class WindowMessageInjector:
+    _WM_KEYDOWN = 0x0100
+    _WM_KEYUP = 0x0101
+
+    def __init__(self, key, pid, window_title=config.WINDOW_TITLE):
+        import ctypes
+        from ctypes import wintypes
+        from keyboard import key_to_scan_codes
+
+        self.key = str(key)
+        self.pid = pid
+        self.window_title = window_title
+        scan_code = key_to_scan_codes(self.key)[0]
+        user32 = ctypes.windll.user32
+        virtual_key = user32.MapVirtualKeyW(scan_code & 0xFF, 1)  # MAPVK_VSC_TO_VK
+        extended = 1 << 24 if scan_code > 0xFF else 0
+        self._down = (virtual_key, 1 | (scan_code & 0xFF) << 16 | extended)
+        self._up = (virtual_key, 1 | (scan_code & 0xFF) << 16 | extended | 0xC0000000)
+        self._user32 = user32
+        self._ctypes = ctypes
+        self._enum_proc_type = ctypes.WINFUNCTYPE(wintypes.BOOL, wintypes.HWND, wintypes.LPARAM)
+        self._hwnd = None
+        self.latency = LatencyHistogram("decision -> key sent")
+        self.failures = 0
+
+    def _find_window(self):
+        ctypes = self._ctypes
+        user32 = self._user32
+        found = []
+        pid = ctypes.c_ulong()
+        title = ctypes.create_unicode_buffer(256)
+
+        def check(hwnd, _):
+            user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+            if pid.value == self.pid:
+                user32.GetWindowTextW(hwnd, title, 256)
+                if title.value == self.window_title:
+                    found.append(hwnd)
+                    return False
+            return True
+
+        user32.EnumWindows(self._enum_proc_type(check), 0)
+        return found[0] if found else None
+
+    def inject(self, decided_ns):
+        hwnd = self._hwnd
+        if hwnd is None or not self._user32.IsWindow(hwnd):
+            hwnd = self._hwnd = self._find_window()
+        if hwnd is None or not (self._user32.PostMessageW(hwnd, self._WM_KEYDOWN, *self._down) and
+                                self._user32.PostMessageW(hwnd, self._WM_KEYUP, *self._up)):
+            self.failures += 1
+        sent_ns = perf_counter_ns()
+        self.latency.record(sent_ns - decided_ns)
+        return sent_ns
+
+
+# Records key presses instead of sending them, for tests and benchmarks.
+# `sent` holds one clock() value per injected key press.
+class RecordingInjector:
+    def __init__(self, key=config.POTION_KEY, clock=None):
+        self.key = str(key)
+        self.clock = clock
+        self.sent = []
+        self.latency = LatencyHistogram("decision -> key sent")
+
+    def inject(self, decided_ns):
+        sent_ns = perf_counter_ns()
+        self.sent.append(sent_ns if self.clock is None else self.clock())
+        self.latency.record(sent_ns - decided_ns)
+        return sent_ns
+
+
+# Builds the injector selected by INPUT_INJECTOR: "sendinput", "keyboard" or "auto"
+# (SendInput on Windows, the keyboard library elsewhere or if SendInput is unavailable).
+def create_injector(key, kind=None):
+    kind = (config.INPUT_INJECTOR if kind is None else kind).lower()
+    if kind == "keyboard":
+        return KeyboardLibInjector(key)
+    if kind == "sendinput" or (kind == "auto" and sys.platform == "win32"):
+        try:
+            return SendInputInjector(key)
+        except Exception as e:
+            if kind == "sendinput":
+                raise
+            log.error("SendInput injector unavailable (%s); using the keyboard library.", e)
+    return KeyboardLibInjector(key)
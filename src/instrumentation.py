@@ -0,0 +1,85 @@
+from array import array
+from time import perf_counter_ns
+
+
+# Fixed-size latency histogram with power-of-two nanosecond buckets.
+# Bucket i counts durations in [2**(i-1), 2**i) ns, so recording is O(1) and
+# the memory use never grows.
+class LatencyHistogram:
+    BUCKETS = 48  # Up to 2**47 ns (about 39 hours)
+
+    def __init__(self, name):
+        self.name = name
+        self.counts = array('Q', bytes(8 * self.BUCKETS))
+        self.reset()
+
+    def reset(self):
+        for i in range(self.BUCKETS):
+            self.counts[i] = 0
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, duration_ns):
+        bucket = duration_ns.bit_length()
+        if bucket >= self.BUCKETS:
+            bucket = self.BUCKETS - 1
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+    # Upper bound (in ns) of the bucket holding the given percentile.
+    def percentile(self, pct):
+        if not self.count:
+            return 0
+        target = self.count * pct / 100.0
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(1 << i, self.max_ns)
+        return self.max_ns
+
+    def mean_ns(self):
+        return self.total_ns / self.count if self.count else 0.0
+
+    def format_line(self):
+        if not self.count:
+            return f"{self.name:<22} -"
+        return (f"{self.name:<22} n={self.count:<8} mean={self.mean_ns() / 1000:9.1f}us "
+                f"p50<={self.percentile(50) / 1000:9.1f}us p99<={self.percentile(99) / 1000:9.1f}us "
+                f"max={self.max_ns / 1000:9.1f}us")
+
+
+# Per-stage latency histograms for the HP monitoring hot path.
+class LatencyInstrumentation:
+    def __init__(self):
+        self.pointer_check = LatencyHistogram("pointer re-resolution")
+        self.focus_check = LatencyHistogram("focus check")
+        self.hp_read = LatencyHistogram("read_float")
+        self.max_hp_logic = LatencyHistogram("max HP logic")
+        self.gui_update = LatencyHistogram("GUI update")
+        self.key_send = LatencyHistogram("key send")
+        self.tick = LatencyHistogram("whole tick")
+        # Sample read below the threshold -> potion key sent.
+        self.crossing_to_key = LatencyHistogram("crossing -> key sent")
+
+    def histograms(self):
+        return (self.pointer_check, self.focus_check, self.hp_read, self.max_hp_logic,
+                self.gui_update, self.key_send, self.tick, self.crossing_to_key)
+
+    def reset(self):
+        for histogram in self.histograms():
+            histogram.reset()
+
+    def format_report(self):
+        return [histogram.format_line() for histogram in self.histograms()]
+
+
+# Records the time since start_ns into the histogram and returns the current time.
+def lap(histogram, start_ns):
+    now_ns = perf_counter_ns()
+    histogram.record(now_ns - start_ns)
+    return now_ns
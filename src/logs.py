@@ -0,0 +1,115 @@
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from queue import SimpleQueue
+from sys import stdout
+from time import monotonic
+
+import config
+
+# Logging of the worker side. Calls use %-style arguments, so a message is only formatted
+# if it is written, and a debug call returns right after the level check while developer
+# debug is off. Records go unformatted through a queue to a listener thread that writes
+# the console and the rotating LOG_FILE, so the caller never waits on I/O. Messages that
+# can repeat every tick pass extra=rate_limited(key): a key is logged at most once per
+# LOG_RATE_LIMIT seconds. The key is the caller's choice, not the message: records with
+# the same key are limited together whatever their arguments.
+
+DEBUG = logging.DEBUG
+LOGGER_NAME = "autopot"
+_root = logging.getLogger(LOGGER_NAME)
+_root.setLevel(logging.INFO)
+# Until start() (benchmarks and the command line tools never call it), only warnings and
+# errors are written, by the logging module's last-resort stderr handler.
+_listener = None
+_queue_handler = None
+
+
+def get_logger(name):
+    return _root.getChild(name)
+
+
+# Debug records pass only in developer debug mode; takes effect on the next call everywhere.
+def set_debug(enabled):
+    _root.setLevel(logging.DEBUG if enabled else logging.INFO)
+
+
+def rate_limited(key):
+    return {"rate_key": key}
+
+
+# Drops a record whose rate_key was let through less than `interval` seconds ago. Runs on
+# the caller's thread before the record is queued; a rare race only lets a duplicate through.
+class RateLimitFilter(logging.Filter):
+    def __init__(self, interval=None):
+        super().__init__()
+        self.interval = config.LOG_RATE_LIMIT if interval is None else interval
+        self._last = {}
+        self.suppressed = 0
+
+    def filter(self, record):
+        key = getattr(record, "rate_key", None)
+        if key is None:
+            return True
+        now = monotonic()
+        last = self._last.get(key)
+        if last is not None and now - last < self.interval:
+            self.suppressed += 1
+            return False
+        self._last[key] = now
+        return True
+
+
+# Queues records as they are: no formatting on the caller's thread (QueueHandler.prepare
+# would format the message there). Records stay in this process, so nothing is pickled.
+class _LazyQueueHandler(QueueHandler):
+    def prepare(self, record):
+        return record
+
+
+# Console lines keep the tags of the old print() output.
+class _ConsoleFormatter(logging.Formatter):
+    _PREFIXES = {logging.DEBUG: "> [DEBUG] ", logging.INFO: "", logging.WARNING: "[WARNING] "}
+
+    def format(self, record):
+        message = super().format(record)
+        return self._PREFIXES.get(record.levelno, "[ERROR] ") + message
+
+
+# Starts the listener thread; safe to call again (later calls only update the debug level).
+# stream is the console (default stdout).
+def start(debug=False, log_file=None, stream=None):
+    global _listener, _queue_handler
+    set_debug(debug)
+    if _listener is not None:
+        return
+    console = logging.StreamHandler(stdout if stream is None else stream)
+    console.setFormatter(_ConsoleFormatter())
+    handlers = [console]
+    log_file = config.LOG_FILE if log_file is None else log_file
+    if log_file:
+        try:
+            file_handler = RotatingFileHandler(log_file, maxBytes=config.LOG_MAX_BYTES,
+                                               backupCount=config.LOG_BACKUP_COUNT, encoding="utf-8")
+        except OSError as e:
+            console.handle(logging.makeLogRecord({"msg": f"Could not open log file '{log_file}': {e}",
+                                                  "levelno": logging.ERROR}))
+        else:
+            file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)-7s %(threadName)s: %(message)s"))
+            handlers.append(file_handler)
+    queue = SimpleQueue()
+    _queue_handler = _LazyQueueHandler(queue)
+    _queue_handler.addFilter(RateLimitFilter())
+    _root.addHandler(_queue_handler)
+    _root.propagate = False
+    _listener = QueueListener(queue, *handlers)
+    _listener.start()
+
+
+# Writes out what is still queued and stops the listener thread.
+def stop():
+    global _listener, _queue_handler
+    if _listener is not None:
+        _root.removeHandler(_queue_handler)
+        _listener.stop()
+        _listener = None
+        _queue_handler = None
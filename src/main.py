@@ -1,10 +1,32 @@
 from sys import argv
-from PyQt5.QtWidgets import QApplication
+import logs
 import user_config
-from gui_qt import OverlayWindow
 
+# The overlay needs PyQt5; headless mode (--headless or HEADLESS in config_user.ini)
+# never imports it.
 def main():
+    # Started first, so errors in config_user.ini go to the console and LOG_FILE too.
+    logs.start()
     user_cfg = user_config.load_user_config()
+    logs.set_debug(user_cfg.DEVELOPER_DEBUG)
+    try:
+        run(user_cfg)
+    finally:
+        logs.stop()
+
+def run(user_cfg):
+    if "--headless" in argv[1:] or user_cfg.HEADLESS:
+        from headless import run_headless
+        run_headless(user_cfg)
+        return
+    try:
+        from PyQt5.QtWidgets import QApplication
+    except ImportError:
+        # Headless build (build_release.sh --headless) ships without Qt.
+        from headless import run_headless
+        run_headless(user_cfg)
+        return
+    from gui_qt import OverlayWindow
     app = QApplication(argv)
     window = OverlayWindow(user_cfg)
     window.show()
@@ -0,0 +1,484 @@
+from bisect import bisect_right
+from ctypes import c_char
+from os import path
+from struct import Struct
+from time import perf_counter, time
+
+import config
+
+_U64 = Struct("<Q")
+_F32 = Struct("<f")
+
+
+# Raised by every backend when the process, a module or a memory read is unavailable.
+class MemoryBackendError(Exception):
+    pass
+
+
+# Backend that attaches to the real game process through pymem (Windows only).
+class PymemBackend:
+    # Opens the target process (the first one with that name, or the given pid).
+    # Raises MemoryBackendError if it is not running.
+    def attach(self, process_name, pid=None):
+        from pymem import Pymem
+        from pymem.exception import PymemError
+        try:
+            if pid is None:
+                return PymemProcess(Pymem(process_name))
+            pm = Pymem()
+            pm.open_process_from_id(pid)
+            return PymemProcess(pm)
+        except PymemError as e:
+            raise MemoryBackendError(str(e)) from e
+
+    # Process ids of every running process with that name.
+    def process_ids(self, process_name):
+        from pymem.process import list_processes
+        name = process_name.lower().encode()
+        return [entry.th32ProcessID for entry in list_processes() if entry.szExeFile.lower() == name]
+
+    def process_table(self):
+        return Win32ProcessTable()
+
+
+# Process tables let the process watcher diff the running processes cheaply: pids()
+# returns the set of running process ids, describe(pid) the (executable name, start time
+# as a time() value) of one process, or None if it cannot be queried.
+
+
+# Process table from EnumProcesses (one call for all pids); names and start times are
+# only queried for the pids asked about (Windows only).
+class Win32ProcessTable:
+    _PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+    # Seconds between the FILETIME epoch (1601) and the Unix epoch.
+    _FILETIME_EPOCH = 11644473600
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        self._ctypes = ctypes
+        self._kernel32 = ctypes.windll.kernel32
+        self._dword = wintypes.DWORD
+        self._pids = (wintypes.DWORD * 1024)()
+        self._needed = wintypes.DWORD()
+        self._name = ctypes.create_unicode_buffer(1024)
+        self._name_size = wintypes.DWORD()
+        self._times = (wintypes.FILETIME * 4)()
+
+    def pids(self):
+        ctypes = self._ctypes
+        while True:
+            size = ctypes.sizeof(self._pids)
+            if not self._kernel32.K32EnumProcesses(self._pids, size, ctypes.byref(self._needed)):
+                raise MemoryBackendError("EnumProcesses failed.")
+            if self._needed.value < size:
+                return set(self._pids[:self._needed.value // 4])
+            self._pids = (self._dword * (len(self._pids) * 2))()
+
+    def describe(self, pid):
+        ctypes = self._ctypes
+        kernel32 = self._kernel32
+        handle = kernel32.OpenProcess(self._PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return None
+        try:
+            self._name_size.value = len(self._name)
+            if not kernel32.QueryFullProcessImageNameW(handle, 0, self._name, ctypes.byref(self._name_size)):
+                return None
+            created = self._times[0]
+            if not kernel32.GetProcessTimes(handle, ctypes.byref(created), ctypes.byref(self._times[1]),
+                                            ctypes.byref(self._times[2]), ctypes.byref(self._times[3])):
+                return None
+            ticks = created.dwHighDateTime << 32 | created.dwLowDateTime
+            return path.basename(self._name.value), ticks / 1e7 - self._FILETIME_EPOCH
+        finally:
+            kernel32.CloseHandle(handle)
+
+
+# Attached game process backed by a Pymem handle.
+class PymemProcess:
+    _MAX_USER_ADDRESS = 0x7FFF_FFFF_0000
+    _MEM_COMMIT = 0x1000
+    _PAGE_GUARD = 0x100
+    # PAGE_READONLY | PAGE_READWRITE | PAGE_WRITECOPY | PAGE_EXECUTE_READ(WRITE) | PAGE_EXECUTE_WRITECOPY
+    _READABLE = 0x02 | 0x04 | 0x08 | 0x20 | 0x40 | 0x80
+
+    def __init__(self, pm):
+        from pymem.exception import PymemError
+        from pymem.process import module_from_name
+        from pymem.ressources.kernel32 import ReadProcessMemory
+        self._pm = pm
+        self._pymem_error = PymemError
+        self._module_from_name = module_from_name
+        self._read_process_memory = ReadProcessMemory
+        # Buffers passed to read_into, with the ctypes view that exposes their address.
+        self._read_into_views = {}
+        self.pid = pm.process_id
+
+    # Returns the base address of a loaded module, or None if it is not loaded.
+    def module_base(self, module_name):
+        try:
+            mod = self._module_from_name(self._pm.process_handle, module_name)
+        except self._pymem_error as e:
+            raise MemoryBackendError(str(e)) from e
+        return mod.lpBaseOfDll if mod is not None else None
+
+    # Returns (base address, image size) of a loaded module, or None if it is not loaded.
+    def module_range(self, module_name):
+        try:
+            mod = self._module_from_name(self._pm.process_handle, module_name)
+        except self._pymem_error as e:
+            raise MemoryBackendError(str(e)) from e
+        return (mod.lpBaseOfDll, mod.SizeOfImage) if mod is not None else None
+
+    # Committed, readable (start, size) regions of the process address space.
+    def memory_regions(self):
+        from pymem.memory import virtual_query
+        regions = []
+        addr = 0
+        while addr < self._MAX_USER_ADDRESS:
+            try:
+                info = virtual_query(self._pm.process_handle, addr)
+            except Exception:
+                break
+            size = info.RegionSize
+            if not size:
+                break
+            if info.State == self._MEM_COMMIT and info.Protect & self._READABLE and not info.Protect & self._PAGE_GUARD:
+                regions.append((info.BaseAddress, size))
+            addr = info.BaseAddress + size
+        return regions
+
+    def read_bytes(self, addr, size):
+        try:
+            return self._pm.read_bytes(addr, size)
+        except self._pymem_error as e:
+            raise MemoryBackendError(str(e)) from e
+
+    # Reads len(buffer) bytes straight into a preallocated bytearray (one ReadProcessMemory call, no copies).
+    def read_into(self, addr, buffer):
+        entry = self._read_into_views.get(id(buffer))
+        if entry is None or entry[0] is not buffer:
+            entry = self._read_into_views[id(buffer)] = (buffer, (c_char * len(buffer)).from_buffer(buffer))
+        if not self._read_process_memory(self._pm.process_handle, addr, entry[1], len(buffer), None):
+            raise MemoryBackendError(f"Could not read memory at: 0x{addr:X}, length: {len(buffer)}")
+
+    # Reads a 64-bit pointer value.
+    def read_pointer(self, addr):
+        try:
+            return self._pm.read_ulonglong(addr)
+        except self._pymem_error as e:
+            raise MemoryBackendError(str(e)) from e
+
+    # Reads a 32-bit float value.
+    def read_float(self, addr):
+        try:
+            return self._pm.read_float(addr)
+        except self._pymem_error as e:
+            raise MemoryBackendError(str(e)) from e
+
+    # Creates a tracker for the foreground state of this process's game window.
+    def create_focus_tracker(self, window_title):
+        from focus_tracker import WinEventFocusTracker
+        return WinEventFocusTracker(self._pm.process_id, window_title)
+
+    def close(self):
+        self._pm.close_process()
+
+
+# Piecewise-linear HP curve through (seconds, hp) keyframes, optionally looped.
+class ScriptedHpCurve:
+    def __init__(self, keyframes, loop=True):
+        if not keyframes:
+            raise ValueError("ScriptedHpCurve needs at least one keyframe.")
+        self._times = [float(t) for t, _ in keyframes]
+        self._values = [float(hp) for _, hp in keyframes]
+        self._duration = self._times[-1]
+        self._loop = loop and self._duration > 0
+
+    def __call__(self, t):
+        if self._loop:
+            t %= self._duration
+        i = bisect_right(self._times, t)
+        if i == 0:
+            return self._values[0]
+        if i >= len(self._times):
+            return self._values[-1]
+        t0, t1 = self._times[i - 1], self._times[i]
+        v0, v1 = self._values[i - 1], self._values[i]
+        return v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+
+
+# In-process stand-in for the game: a fake module image plus heap blocks holding
+# the configured pointer chain, with HP driven by a scripted curve.
+class SimulatedGame:
+    _HEAP_BASE = 0x0000_0200_0000_0000
+    _HEAP_BLOCK_SIZE = 0x1000
+    _HEAP_STRIDE = 0x10000
+
+    def __init__(self, hp_curve, base_offset=config.BASE_OFFSET, offsets=config.OFFSETS,
+                 process_name=config.PROCESS_NAME, module_name=config.MODULE_NAME,
+                 window_title=config.WINDOW_TITLE, module_base=0x7FF6_0000_0000,
+                 module_size=None, loaded_module_count=150, pid=4242, clock=perf_counter):
+        self.hp_curve = hp_curve
+        self.base_offset = base_offset
+        self.offsets = list(offsets)
+        self.process_name = process_name
+        self.module_name = module_name
+        self.window_title = window_title
+        self.module_base = module_base
+        self.clock = clock
+        self.pid = pid
+        self.started_at = time()
+        self.running = True
+        self.foreground = True
+        self._focus_trackers = []
+
+        # Sorted list of (start, end, bytearray) memory regions.
+        self._regions = []
+        self._next_heap_addr = self._HEAP_BASE
+        if module_size is None:
+            module_size = (base_offset + 0x1000) & ~0xFFF
+        self.module_image = self.map_region(module_base, module_size)
+        # Loaded module list, walked by name like the real module enumeration.
+        self.modules = [(f"module{i}.dll", 0x7FF7_0000_0000 + i * 0x100000) for i in range(loaded_module_count)]
+        self.modules.append((module_name, module_base))
+
+        self._start_time = clock()
+        self.hp_addr = None
+        self._build_pointer_chain()
+
+    # Maps a zero-filled memory region and returns its backing buffer.
+    def map_region(self, start, size):
+        buf = bytearray(size)
+        self._regions.append((start, start + size, buf))
+        self._regions.sort(key=lambda region: region[0])
+        return buf
+
+    # Allocates a new heap block large enough for any chain offset.
+    def _alloc_heap_block(self):
+        addr = self._next_heap_addr
+        self._next_heap_addr += self._HEAP_STRIDE
+        self.map_region(addr, self._HEAP_BLOCK_SIZE)
+        return addr
+
+    # Lays out one heap block per hop so that walking OFFSETS from the base lands on HP.
+    def _build_pointer_chain(self):
+        self.chain_blocks = [self._alloc_heap_block() for _ in self.offsets]
+        addr = self.module_base + self.base_offset
+        for block, off in zip(self.chain_blocks, self.offsets):
+            self.write_pointer(addr, block)
+            addr = block + off
+        self.hp_addr = addr
+        self._refresh_hp()
+
+    # Adds another chain from the module image to the current HP address, like a backup pointer.
+    # Hops already holding a pointer are shared; the last pointer targets the player object,
+    # so the chain breaks when that object moves.
+    def add_chain(self, base_offset, offsets):
+        addr = self.module_base + base_offset
+        for off in offsets[:-1]:
+            block = self.read_pointer(addr)
+            if not block:
+                block = self._alloc_heap_block()
+                self.write_pointer(addr, block)
+            addr = block + off
+        self.write_pointer(addr, self.hp_addr - offsets[-1])
+
+    # Simulates a patch moving the static pointer at base_offset away.
+    def break_chain(self, base_offset):
+        self.write_pointer(self.module_base + base_offset, 0)
+
+    # Simulates the game reallocating the object at the given hop (default: the player object).
+    def relocate_hop(self, hop_index=-1):
+        hop_index %= len(self.offsets)
+        new_block = self._alloc_heap_block()
+        self.chain_blocks[hop_index] = new_block
+        if hop_index == 0:
+            holder = self.module_base + self.base_offset
+        else:
+            holder = self.chain_blocks[hop_index - 1] + self.offsets[hop_index - 1]
+        self.write_pointer(holder, new_block)
+        addr = new_block + self.offsets[hop_index]
+        for i in range(hop_index + 1, len(self.offsets)):
+            self.write_pointer(addr, self.chain_blocks[i])
+            addr = self.chain_blocks[i] + self.offsets[i]
+        self.hp_addr = addr
+        self._refresh_hp()
+
+    # Current scripted HP value.
+    def current_hp(self):
+        return float(self.hp_curve(self.clock() - self._start_time))
+
+    def _refresh_hp(self):
+        self.write_float(self.hp_addr, self.current_hp())
+
+    # Mapped (start, size) regions.
+    def memory_regions(self):
+        return [(start, end - start) for start, end, _ in self._regions]
+
+    def _locate(self, addr, size):
+        for start, end, buf in self._regions:
+            if start <= addr and addr + size <= end:
+                return buf, addr - start
+        raise MemoryBackendError(f"Could not read memory at: 0x{addr:X}, length: {size}")
+
+    def read_bytes(self, addr, size):
+        if not self.running:
+            raise MemoryBackendError("Process is not running.")
+        self._refresh_hp()
+        buf, pos = self._locate(addr, size)
+        return bytes(buf[pos:pos + size])
+
+    def read_into(self, addr, buffer):
+        if not self.running:
+            raise MemoryBackendError("Process is not running.")
+        self._refresh_hp()
+        size = len(buffer)
+        buf, pos = self._locate(addr, size)
+        buffer[:] = memoryview(buf)[pos:pos + size]
+
+    def read_pointer(self, addr):
+        if not self.running:
+            raise MemoryBackendError("Process is not running.")
+        buf, pos = self._locate(addr, 8)
+        return _U64.unpack_from(buf, pos)[0]
+
+    def read_float(self, addr):
+        if not self.running:
+            raise MemoryBackendError("Process is not running.")
+        self._refresh_hp()
+        buf, pos = self._locate(addr, 4)
+        return _F32.unpack_from(buf, pos)[0]
+
+    def write_pointer(self, addr, value):
+        buf, pos = self._locate(addr, 8)
+        _U64.pack_into(buf, pos, value)
+
+    def write_float(self, addr, value):
+        buf, pos = self._locate(addr, 4)
+        _F32.pack_into(buf, pos, value)
+
+    # Simulates the game window gaining or losing focus.
+    def set_foreground(self, focused):
+        self.foreground = focused
+        for tracker in self._focus_trackers:
+            tracker.set_foreground(self.running and focused)
+
+    # Simulates the game starting (again); without module_loaded, the game module only shows
+    # up at load_game_module().
+    def launch(self, module_loaded=True):
+        self.started_at = time()
+        self.running = True
+        if not module_loaded:
+            self.modules = [module for module in self.modules if module[0] != self.module_name]
+
+    def load_game_module(self):
+        self.modules.append((self.module_name, self.module_base))
+
+    # Simulates the game closing.
+    def terminate(self):
+        self.running = False
+        for tracker in self._focus_trackers:
+            tracker.set_foreground(False)
+
+
+# Backend that attaches to one or more SimulatedGame instances.
+class SimulatedBackend:
+    def __init__(self, *games):
+        self.games = list(games)
+        self.table = None
+
+    def attach(self, process_name, pid=None):
+        for game in self.games:
+            if game.running and game.process_name == process_name and pid in (None, game.pid):
+                return SimulatedProcess(game)
+        raise MemoryBackendError(f"Could not find process: {process_name}")
+
+    def process_ids(self, process_name):
+        return [game.pid for game in self.games if game.running and game.process_name == process_name]
+
+    def process_table(self):
+        if self.table is None:
+            self.table = SimulatedProcessTable(self)
+        return self.table
+
+
+# Process table of the simulated backend: its running games plus unrelated processes that
+# start() and exit(), so the process watcher can be exercised on any platform.
+class SimulatedProcessTable:
+    def __init__(self, backend, background_processes=250):
+        self.backend = backend
+        self._next_pid = 100000
+        self._others = {}
+        for _ in range(background_processes):
+            self.start("background.exe")
+
+    def start(self, name):
+        pid = self._next_pid
+        self._next_pid += 4
+        self._others[pid] = (name, time())
+        return pid
+
+    def exit(self, pid):
+        self._others.pop(pid, None)
+
+    def pids(self):
+        pids = set(self._others)
+        pids.update(game.pid for game in self.backend.games if game.running)
+        return pids
+
+    def describe(self, pid):
+        for game in self.backend.games:
+            if game.pid == pid and game.running:
+                return game.process_name, game.started_at
+        return self._others.get(pid)
+
+
+# Attached simulated game process. Mirrors the PymemProcess interface.
+class SimulatedProcess:
+    def __init__(self, game):
+        self.game = game
+        self.pid = game.pid
+
+    def module_base(self, module_name):
+        if not self.game.running:
+            raise MemoryBackendError("Process is not running.")
+        for name, base in self.game.modules:
+            if name.lower() == module_name.lower():
+                return base
+        return None
+
+    def module_range(self, module_name):
+        base = self.module_base(module_name)
+        if base is None:
+            return None
+        if module_name.lower() == self.game.module_name.lower():
+            return base, len(self.game.module_image)
+        return base, 0x100000
+
+    def memory_regions(self):
+        if not self.game.running:
+            raise MemoryBackendError("Process is not running.")
+        return self.game.memory_regions()
+
+    def read_bytes(self, addr, size):
+        return self.game.read_bytes(addr, size)
+
+    def read_into(self, addr, buffer):
+        self.game.read_into(addr, buffer)
+
+    def read_pointer(self, addr):
+        return self.game.read_pointer(addr)
+
+    def read_float(self, addr):
+        return self.game.read_float(addr)
+
+    def create_focus_tracker(self, window_title):
+        from focus_tracker import ScriptedFocusTracker
+        tracker = ScriptedFocusTracker(self.game.running and self.game.foreground and window_title == self.game.window_title)
+        self.game._focus_trackers.append(tracker)
+        return tracker
+
+    def close(self):
+        pass
@@ -0,0 +1,113 @@
+from bisect import bisect_right
+from mmap import ACCESS_READ, mmap
+from struct import Struct
+
+from memory_backend import MemoryBackendError
+
+# Memory dump file: a header, a table of (start address, size, file offset) entries
+# and the raw bytes of every region. Region data is 8-byte aligned in the file so it
+# can be viewed as pointer or float arrays directly from the mapping.
+DUMP_MAGIC = b"LEMEMDP1"
+DUMP_VERSION = 1
+HEADER = Struct("<8sII64sQQ")       # magic, version, region count, module name, module base, module size
+REGION = Struct("<QQQ")             # start address, size, file offset
+CHUNK_SIZE = 16 * 1024 * 1024
+PAGE_SIZE = 0x1000
+
+_U64 = Struct("<Q")
+_F32 = Struct("<f")
+
+
+# Writes the given (start, size) regions of an attached process (all readable
+# regions by default) to a dump file. Regions are read in bulk chunks; chunks that
+# can no longer be read are stored as zeros.
+def capture(process, file_path, module_name, regions=None, chunk_size=CHUNK_SIZE):
+    module = process.module_range(module_name)
+    if module is None:
+        raise MemoryBackendError(f"Module {module_name} not found.")
+    if regions is None:
+        regions = process.memory_regions()
+    regions = sorted(regions)
+
+    table = []
+    offset = HEADER.size + REGION.size * len(regions)
+    for start, size in regions:
+        offset = (offset + 7) & ~7
+        table.append((start, size, offset))
+        offset += size
+
+    with open(file_path, "wb") as f:
+        f.write(HEADER.pack(DUMP_MAGIC, DUMP_VERSION, len(table), module_name.encode()[:64], module[0], module[1]))
+        for entry in table:
+            f.write(REGION.pack(*entry))
+        for start, size, file_offset in table:
+            f.write(bytes(file_offset - f.tell()))
+            for chunk_start in range(start, start + size, chunk_size):
+                length = min(chunk_size, start + size - chunk_start)
+                try:
+                    f.write(process.read_bytes(chunk_start, length))
+                except MemoryBackendError:
+                    f.write(bytes(length))
+    return file_path
+
+
+# Page-aligned (start, size) regions covering the given addresses, merged when adjacent.
+def pages_covering(addresses, value_size=8):
+    pages = sorted({addr & ~(PAGE_SIZE - 1) for addr in addresses} |
+                   {(addr + value_size - 1) & ~(PAGE_SIZE - 1) for addr in addresses})
+    regions = []
+    for page in pages:
+        if regions and regions[-1][0] + regions[-1][1] == page:
+            regions[-1] = (regions[-1][0], regions[-1][1] + PAGE_SIZE)
+        else:
+            regions.append((page, PAGE_SIZE))
+    return regions
+
+
+# Read-only, memory-mapped view of a dump file.
+class MemoryImage:
+    def __init__(self, file_path):
+        self.file_path = file_path
+        with open(file_path, "rb") as f:
+            self._mmap = mmap(f.fileno(), 0, access=ACCESS_READ)
+        magic, version, count, module_name, module_base, module_size = HEADER.unpack_from(self._mmap, 0)
+        if magic != DUMP_MAGIC:
+            self._mmap.close()
+            raise ValueError(f"Not a memory dump file: {file_path}")
+        self.version = version
+        self.module_name = module_name.rstrip(b"\0").decode()
+        self.module_base = module_base
+        self.module_size = module_size
+        # Sorted (start, size, file offset) entries.
+        self.regions = [REGION.unpack_from(self._mmap, HEADER.size + i * REGION.size) for i in range(count)]
+        self._starts = [start for start, _, _ in self.regions]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def total_size(self):
+        return sum(size for _, size, _ in self.regions)
+
+    def _locate(self, addr, size):
+        i = bisect_right(self._starts, addr) - 1
+        if i >= 0:
+            start, region_size, file_offset = self.regions[i]
+            if addr + size <= start + region_size:
+                return file_offset + addr - start
+        raise MemoryBackendError(f"Address 0x{addr:X} is not in the dump.")
+
+    def read_bytes(self, addr, size):
+        pos = self._locate(addr, size)
+        return self._mmap[pos:pos + size]
+
+    def read_pointer(self, addr):
+        return _U64.unpack_from(self._mmap, self._locate(addr, 8))[0]
+
+    def read_float(self, addr):
+        return _F32.unpack_from(self._mmap, self._locate(addr, 4))[0]
+
+    def close(self):
+        self._mmap.close()
@@ -0,0 +1,121 @@
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from threading import Thread
+
+import logs
+
+# Optional OpenMetrics endpoint (METRICS_PORT) for scraping the worker's health. The
+# worker only bumps plain counters it alone writes (samples, potions, resolver counters,
+# paused time, tick histogram), so the hot loop takes no lock and does no formatting;
+# everything is read and rendered here, on the server's own thread, when scraped.
+# Reads of several counters are not atomic together, which is fine for monitoring.
+
+log = logs.get_logger("metrics")
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PHASES = ("off", "attaching", "resolving", "monitoring")
+# Tick histogram buckets: the power-of-two nanosecond buckets from 1 us to 17 s.
+_TICK_BUCKETS = range(10, 35)
+
+
+def _labels(label, **extra):
+    pairs = ([("client", label)] if label is not None else []) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+
+def _family(lines, name, kind, help_text, samples):
+    lines.append(f"# TYPE {name} {kind}")
+    lines.append(f"# HELP {name} {help_text}")
+    lines.extend(samples)
+
+
+# OpenMetrics text of a worker (AutoPotionWorker or MultiboxWorker).
+def render_metrics(worker):
+    clients = worker.metric_clients()
+    lines = []
+    _family(lines, "leautopot_samples", "counter", "HP samples read.",
+            [f"leautopot_samples_total{_labels(label)} {client.sampling_stats.total_samples}"
+             for label, client in clients])
+    _family(lines, "leautopot_samples_per_second", "gauge", "HP sample rate of the current monitoring session.",
+            [f"leautopot_samples_per_second{_labels(label)} {client.sampling_stats.samples_per_second():.3f}"
+             for label, client in clients])
+    _family(lines, "leautopot_potions", "counter",
+            "Potion keys pressed, by the main threshold rule or by the [Rules] engine.",
+            [f"leautopot_potions_total{_labels(label, source=source)} {count}" for label, client in clients
+             for source, count in (("threshold", client.potions_used), ("rules", client.rule_keys_sent))])
+    pointer_counts = [(label, client.pointer_counts()) for label, client in clients]
+    _family(lines, "leautopot_pointer_reresolutions", "counter", "Periodic re-checks of the HP pointer chain.",
+            [f"leautopot_pointer_reresolutions_total{_labels(label)} {counts[0]}" for label, counts in pointer_counts])
+    _family(lines, "leautopot_pointer_failovers", "counter", "Switches to another pointer chain.",
+            [f"leautopot_pointer_failovers_total{_labels(label)} {counts[1]}" for label, counts in pointer_counts])
+    _family(lines, "leautopot_hp_address_failures", "counter", "HP address searches that found no plausible HP.",
+            [f"leautopot_hp_address_failures_total{_labels(label)} {counts[2]}" for label, counts in pointer_counts])
+    _family(lines, "leautopot_paused_seconds", "counter", "Time paused because the game was not focused.",
+            [f"leautopot_paused_seconds_total{_labels(label)} {client.paused_seconds_total():.3f}"
+             for label, client in clients])
+    # The worker's own phase, and each multibox client's.
+    phase_sources = [(None, worker)] + [(label, client) for label, client in clients if client is not worker]
+    _family(lines, "leautopot_phase", "stateset", "Current phase of the monitoring loop.",
+            [f"leautopot_phase{_labels(label, leautopot_phase=phase)} {int(client.phase == phase)}"
+             for label, client in phase_sources for phase in PHASES])
+
+    histogram = worker.scheduler.busy
+    counts = list(histogram.counts)
+    samples = []
+    cumulative = sum(counts[:_TICK_BUCKETS.start])
+    for i in _TICK_BUCKETS:
+        cumulative += counts[i]
+        samples.append(f'leautopot_tick_seconds_bucket{{le="{(1 << i) / 1e9:.9g}"}} {cumulative}')
+    total = sum(counts)
+    samples.append(f'leautopot_tick_seconds_bucket{{le="+Inf"}} {total}')
+    samples.append(f"leautopot_tick_seconds_sum {histogram.total_ns / 1e9:.9f}")
+    samples.append(f"leautopot_tick_seconds_count {total}")
+    _family(lines, "leautopot_tick_seconds", "histogram", "Work time of one monitoring tick.", samples)
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render_metrics(self.server.worker).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# Serves render_metrics(worker) on 127.0.0.1:port from its own thread.
+class MetricsServer(Thread):
+    def __init__(self, worker, port):
+        super().__init__(name="MetricsServer", daemon=True)
+        self._server = HTTPServer(("127.0.0.1", port), _MetricsHandler)
+        self._server.worker = worker
+        self.port = self._server.server_address[1]
+
+    def run(self):
+        self._server.serve_forever(poll_interval=0.5)
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# Starts the endpoint if METRICS_PORT is set; None if it is off or the port is taken.
+def start_metrics_server(worker, port):
+    if not port:
+        return None
+    try:
+        server = MetricsServer(worker, port)
+    except OSError as e:
+        log.error("Metrics endpoint unavailable on port %d: %.100s", port, e)
+        return None
+    server.start()
+    log.info("Metrics at http://127.0.0.1:%d/metrics", server.port)
+    return server
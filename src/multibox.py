@@ -0,0 +1,473 @@
+import sys
+from math import isfinite
+from os import path
+from threading import Thread, Lock, Event
+from time import time, sleep, perf_counter, monotonic
+
+import logs
+from memory_backend import MemoryBackendError, PymemBackend
+from display_channel import DisplayChannel
+from hp_trace import HpTraceRecorder
+from input_injector import WindowMessageInjector, create_injector
+from process_watcher import ProcessWatcher
+from sampling import DeadlineScheduler
+from user_config import UserConfig
+from worker import AutoPotionWorker
+import config
+
+log = logs.get_logger("multibox")
+
+# Multibox mode (MULTIBOX): one thread guards every running game client. Each client is an
+# AutoPotionWorker whose thread never runs; it only holds that client's state (pointer
+# resolver, max HP and threshold, cooldown, predictor, rules, injector, status row). Every
+# tick this thread reads the HP of all clients back to back, lets each one decide and
+# press its key into its own window, and then does the per-client bookkeeping (max HP
+# learning, status rows). Looking for new clients and resolving or re-checking their
+# pointers runs between ticks, every MULTIBOX_SCAN_INTERVAL seconds, and at once when the
+# process watcher sees a client start.
+
+
+# Status text/color variable that discards what it is given.
+class _DiscardedStatus:
+    def set(self, value):
+        pass
+
+    def get(self):
+        return None
+
+
+# Shares one status text variable (the headless console line) between the multibox
+# status and its clients: each one sets its own part and the variable shows them joined.
+# Setting a part to None removes it.
+class StatusSlots:
+    def __init__(self, status_var):
+        self._status_var = status_var
+        self._parts = {}
+
+    def slot(self, key, label=""):
+        return _StatusSlot(self, key, label)
+
+    def _set(self, key, text):
+        if text is None:
+            self._parts.pop(key, None)
+        else:
+            self._parts[key] = text
+        self._status_var.set(" | ".join(self._parts[k] for k in sorted(self._parts)))
+
+
+class _StatusSlot:
+    def __init__(self, slots, key, label):
+        self._slots = slots
+        self._key = key
+        self._label = label
+        self._text = None
+
+    def set(self, text):
+        self._text = text
+        self._slots._set(self._key, None if text is None else self._label + text)
+
+    def get(self):
+        return self._text
+
+
+# Posts the client's keys to its own window; without window messages (not Windows) the
+# keys go to the foreground window like in single mode.
+def _window_injector(process, key, kind):
+    if sys.platform == "win32":
+        return WindowMessageInjector(key, process.pid, config.WINDOW_TITLE)
+    return create_injector(key, kind)
+
+
+# HP trace file of client `slot`: hp_trace.bin -> hp_trace.client1.bin.
+def _client_trace_file(file_path, slot):
+    root, ext = path.splitext(file_path)
+    return f"{root}.client{slot + 1}{ext}"
+
+
+class MultiboxWorker(Thread):
+    _ERROR_RECOVERY_PAUSE = 0.5
+    # Upper bound for a single blocking wait, in case the enabled flag is flipped without calling wake().
+    _MAX_BLOCKING_WAIT = 1.0
+
+    # client_view(slot) returns the AutoPotionWorker keyword arguments that show client
+    # `slot` (status_text_var, status_color_var, add_potion_log_callback, gui).
+    # injector_factory(process, key, kind) builds the client's injectors (default: _window_injector).
+    def __init__(self, status_text_var, status_color_var, enabled_flag, gui=None, user_cfg=None,
+                 memory_backend=None, client_view=None, focus_tracker_factory=None, injector_factory=None):
+        super().__init__(name="Multibox")
+        self._running = True
+        self._shutting_down = False
+        self._memory_backend = memory_backend if memory_backend is not None else PymemBackend()
+        self._client_view = client_view or (lambda slot: {"status_text_var": _DiscardedStatus(),
+                                                          "status_color_var": _DiscardedStatus()})
+        self._focus_tracker_factory = focus_tracker_factory
+        self._injector_factory = injector_factory or _window_injector
+
+        self.status_text_var = status_text_var
+        self.status_color_var = status_color_var
+        self.enabled_flag = enabled_flag
+        self.gui = gui
+        self._display = DisplayChannel(gui.snapshot_signal.emit) if gui is not None else None
+
+        self.user_cfg = user_cfg if isinstance(user_cfg, UserConfig) else UserConfig(user_cfg)
+        self._pending_user_cfg = None
+        # Like the single worker, the trace file is read once (restart to apply).
+        self._trace_file = self.user_cfg.HP_TRACE_FILE
+        self._lock = Lock()
+        self._wake_event = Event()
+
+        # One AutoPotionWorker per overlay row; None marks a free row.
+        self.clients = []
+        self._active = []
+        self._hp = []
+        self._paused = False
+        self._next_scan = 0.0
+        self._scan_requested = False
+        self._process_watcher = None
+        self.scheduler = DeadlineScheduler()
+        # Phase shown by the metrics endpoint: off, or monitoring while guarding clients.
+        self.phase = "off"
+        self._update_status("Auto Potion: OFF", config.COLOR_OFF)
+
+    # Hands a reloaded user config to every client. Thread-safe.
+    def apply_user_config(self, cfg):
+        with self._lock:
+            self._pending_user_cfg = cfg
+        self.wake()
+
+    def _swap_pending_user_config(self):
+        with self._lock:
+            cfg, self._pending_user_cfg = self._pending_user_cfg, None
+        changed = cfg.changed_keys(self.user_cfg)
+        self.user_cfg = cfg
+        for client in self.clients:
+            if client is not None:
+                client._apply_user_config(cfg)
+        log.info("User config reloaded (%s).", ", ".join(sorted(changed)) or "no changes")
+
+    def wake(self):
+        self._wake_event.set()
+
+    def _update_status(self, text, color_key):
+        if self._shutting_down:
+            return
+        if self._display is not None:
+            self._display.update_status(text, color_key)
+        else:
+            self.status_text_var.set(text)
+            self.status_color_var.set(color_key)
+
+    def _get_is_enabled(self):
+        if self._shutting_down:
+            return False
+        try:
+            return self.enabled_flag.get()
+        except Exception:
+            self.signal_shutdown()
+            return False
+
+    # Waits until a perf_counter deadline like AutoPotionWorker._wait_until; returns False
+    # early on stop, disable or a pending config.
+    def _wait_until(self, deadline):
+        spin = self.scheduler.spin
+        while True:
+            self._wake_event.clear()
+            if not self._running or self._shutting_down: return False
+            if not self._get_is_enabled() or self._pending_user_cfg is not None: return False
+            if self._scan_requested: return False
+            remaining = deadline - perf_counter() - spin
+            if remaining <= 0: break
+            self._wake_event.wait(min(remaining, self._MAX_BLOCKING_WAIT))
+        self.scheduler.spin_until(deadline)
+        return True
+
+    # Attaches to game clients that are not guarded yet.
+    def _attach_new_clients(self):
+        attached = {client._process.pid for client in self.clients if client is not None}
+        watcher = self._start_process_watcher()
+        if watcher is not None:
+            running = watcher.matches
+        else:
+            running = dict.fromkeys(self._memory_backend.process_ids(config.PROCESS_NAME))
+        for pid, launched_at in running.items():
+            if pid in attached:
+                continue
+            try:
+                process = self._memory_backend.attach(config.PROCESS_NAME, pid)
+            except MemoryBackendError:
+                continue
+            self._add_client(process, launched_at)
+
+    # Starts the process watcher; None (look every MULTIBOX_SCAN_INTERVAL) if the backend
+    # has no process table here.
+    def _start_process_watcher(self):
+        if self._process_watcher is None:
+            try:
+                watcher = ProcessWatcher(self._memory_backend.process_table(), config.PROCESS_NAME,
+                                         self._request_scan)
+                watcher.start()
+            except Exception as e:
+                if not self._shutting_down:
+                    log.error("Process watcher unavailable: %.100s", e)
+                return None
+            self._process_watcher = watcher
+        return self._process_watcher
+
+    def _stop_process_watcher(self):
+        if self._process_watcher is not None:
+            self._process_watcher.stop()
+            self._process_watcher = None
+
+    # Process watcher side: a game client started.
+    def _request_scan(self):
+        self._scan_requested = True
+        self.wake()
+
+    def _add_client(self, process, launched_at=None):
+        slot = self.clients.index(None) if None in self.clients else len(self.clients)
+        factory = self._injector_factory
+        client = AutoPotionWorker(enabled_flag=self.enabled_flag, user_cfg=self.user_cfg,
+                                  memory_backend=self._memory_backend,
+                                  injector_factory=lambda key, kind: factory(process, key, kind),
+                                  **self._client_view(slot))
+        client._process = process
+        client._process_launched_at = launched_at
+        if self._focus_tracker_factory is not None:
+            client._focus_tracker = self._focus_tracker_factory(process)
+        else:
+            client._focus_tracker = process.create_focus_tracker(config.WINDOW_TITLE)
+        client._focus_tracker.start(self.wake)
+        self._open_client_trace(slot, client)
+        client._is_active_logic_running = True
+        client.phase = "resolving"
+        client._update_status("Searching for HP address...", config.COLOR_WAITING)
+        if slot == len(self.clients):
+            self.clients.append(client)
+        else:
+            self.clients[slot] = client
+        log.info("Game client #%d (pid %d) attached.", slot + 1, process.pid)
+
+    # Records the client's HP samples when HP_TRACE_FILE is set, one file per overlay row.
+    def _open_client_trace(self, slot, client):
+        if not self._trace_file:
+            return
+        file_path = _client_trace_file(self._trace_file, slot)
+        try:
+            client._trace_recorder = HpTraceRecorder(file_path)
+            log.info("Game client #%d: recording HP trace to '%s'.", slot + 1, file_path)
+        except Exception as e:
+            log.error("Game client #%d: could not open HP trace file: %.100s", slot + 1, e)
+
+    @staticmethod
+    def _close_client_trace(client):
+        if client._trace_recorder is not None:
+            client._trace_recorder.close()
+            client._trace_recorder = None
+
+    def _drop_client(self, slot, reason):
+        client = self.clients[slot]
+        self.clients[slot] = None
+        log.debug("Game client #%d: %s", slot + 1, reason)
+        self._print_client_stats(slot, client)
+        client._detach_process()
+        self._close_client_trace(client)
+        # A client without a status has no row.
+        client._update_status(None, None)
+
+    # Resolves the pointers of new clients and re-checks the others; drops closed clients.
+    # Returns the seconds until the next scan: short while a new client loads its module.
+    def _scan_clients(self):
+        self._scan_requested = False
+        self._attach_new_clients()
+        next_scan = config.MULTIBOX_SCAN_INTERVAL
+        for slot, client in enumerate(self.clients):
+            if client is None:
+                continue
+            try:
+                resolver = client._get_pointer_resolver()
+                if client._hp_final_addr is None:
+                    addr = resolver.resolve()
+                    if addr is None:
+                        # Raises if the process is gone; otherwise the game is still loading.
+                        if client._process.module_base(config.MODULE_NAME) is None:
+                            next_scan = config.MODULE_LOAD_POLL_INTERVAL
+                        continue
+                    client._hp_final_addr = addr
+                    client.phase = "monitoring"
+                    log.info("Game client #%d: HP address found: 0x%X", slot + 1, addr)
+                    client._perform_initial_hp_read_and_setup()
+                else:
+                    addr = resolver.revalidate()
+                    if addr is None:
+                        raise MemoryBackendError("HP pointer chain could not be re-resolved.")
+                    client._hp_final_addr = addr
+            except MemoryBackendError as e:
+                self._lose_client_address(slot, client, e)
+            except Exception as e:
+                self._drop_client(slot, f"error {str(e)[:100]}")
+        self._active = [client for client in self.clients if client is not None and client._hp_final_addr is not None]
+        self._hp = [None] * len(self._active)
+        return next_scan
+
+    # After a failed read or re-resolution: searches the address again at the next scan,
+    # or drops the client if its process is gone.
+    def _lose_client_address(self, slot, client, error):
+        try:
+            client._process.module_base(config.MODULE_NAME)
+        except Exception:
+            self._drop_client(slot, "process closed.")
+            return
+        log.debug("Game client #%d: %.100s. Searching for HP address...", slot + 1, error)
+        client._hp_final_addr = None
+        client.phase = "resolving"
+        client._max_hp = None
+        client._threshold = None
+        client._last_read_hp = None
+        client._stable_hp_timestamp = None
+        client.stat_values = None
+        if client._adaptive_sampler is not None:
+            client._adaptive_sampler.reset()
+        if client._predictor is not None:
+            client._predictor.reset()
+        client._update_status("Searching for HP address...", config.COLOR_WAITING)
+
+    # Pauses every client while no game client is in the foreground.
+    def _any_client_focused(self):
+        focused = any(client._focus_tracker.is_foreground for client in self.clients if client is not None)
+        if focused == (not self._paused):
+            return focused
+        self._paused = not focused
+        for client in self._active:
+            client._set_paused_by_window(self._paused)
+            client._last_read_hp = None
+            client._stable_hp_timestamp = None
+            if client._predictor is not None:
+                client._predictor.reset()
+            if self._paused:
+                client._update_status("PAUSED", config.COLOR_PAUSED)
+        return focused
+
+    # One tick: reads every client, then decides for each, then does the bookkeeping.
+    # Returns the delay before the next tick.
+    def _tick(self):
+        active, hp_values = self._active, self._hp
+        for i, client in enumerate(active):
+            try:
+                hp_values[i] = client._read_hp_sample(client._hp_final_addr)
+            except MemoryBackendError:
+                hp_values[i] = None
+        now = time()
+        for client, current_hp in zip(active, hp_values):
+            if current_hp is not None and isfinite(current_hp):
+                potion_fired = client._apply_auto_potion_logic(current_hp, now)
+                recorder = client._trace_recorder
+                if recorder is not None:
+                    recorder.record(monotonic(), current_hp, client._max_hp, client._threshold, potion_fired)
+
+        interval = None
+        for i, client in enumerate(active):
+            current_hp = hp_values[i]
+            if current_hp is None or not isfinite(current_hp):
+                self._fail_over_client(client)
+                continue
+            client._update_max_hp_logic(current_hp, now=now)
+            client._update_hp_status_display(current_hp)
+            client_interval = client._next_sample_interval(current_hp)
+            if interval is None or client_interval < interval:
+                interval = client_interval
+        return config.INTERVAL if interval is None else interval
+
+    def _fail_over_client(self, client):
+        slot = self.clients.index(client)
+        try:
+            client._fail_over_hp_address()
+        except MemoryBackendError as e:
+            self._lose_client_address(slot, client, e)
+            self._active = [c for c in self._active if c is not client]
+            self._hp = [None] * len(self._active)
+
+    def _handle_disabled_state(self):
+        if any(client is not None for client in self.clients):
+            for slot, client in enumerate(self.clients):
+                if client is not None:
+                    self._drop_client(slot, "guard turned off.")
+            self.clients = []
+            self._active = []
+            self._hp = []
+            self._next_scan = 0.0
+            self._paused = False
+            if log.isEnabledFor(logs.DEBUG):
+                log.debug("Multibox schedule: %s", self.scheduler.format_line())
+        self._stop_process_watcher()
+        self.phase = "off"
+        self._update_status("Auto Potion: OFF", config.COLOR_OFF)
+        self._wake_event.clear()
+        if self._get_is_enabled() or not self._running: return
+        self._wake_event.wait(self._MAX_BLOCKING_WAIT)
+
+    def _print_client_stats(self, slot, client):
+        stats = client.sampling_stats
+        if stats.samples:
+            log.debug("Game client #%d: %.1f samples/s, %d threshold crossings, detection latency max %.1f ms",
+                      slot + 1, stats.samples_per_second(), stats.crossings, stats.detection_latency_max * 1000)
+
+    def run(self):
+        log.info("Multibox worker started.")
+        while self._running and not self._shutting_down:
+            if self._pending_user_cfg is not None:
+                self._swap_pending_user_config()
+            if not self._get_is_enabled():
+                self._handle_disabled_state()
+                continue
+            self.phase = "monitoring"
+            try:
+                if self._scan_requested or perf_counter() >= self._next_scan:
+                    self._next_scan = perf_counter() + self._scan_clients()
+                    count = len(self._active)
+                    if count:
+                        self._update_status(f"ON ({count} client{'s' if count > 1 else ''})", config.COLOR_ON)
+                    else:
+                        self._update_status("Waiting for game clients...", config.COLOR_WAITING)
+                if not self._active or not self._any_client_focused():
+                    # Nothing to sample until the next scan or a focus change.
+                    self.scheduler.rearm()
+                    self._wait_until(self._next_scan)
+                    continue
+                self.scheduler.begin_tick()
+                interval = self._tick()
+            except Exception as e:
+                if not self._shutting_down:
+                    log.error("Multibox error: %.100s", e)
+                self._next_scan = 0.0
+                sleep(self._ERROR_RECOVERY_PAUSE)
+                continue
+            if not self._wait_until(self.scheduler.schedule(interval)):
+                self.scheduler.rearm()
+        for slot, client in enumerate(self.clients):
+            if client is not None:
+                self._print_client_stats(slot, client)
+                client._detach_process()
+                self._close_client_trace(client)
+        self._stop_process_watcher()
+        self.phase = "off"
+        log.info("Multibox worker stopped.")
+
+    # Prints the latency histograms of every client (developer mode only). Safe to call from any thread.
+    def dump_latency_stats(self):
+        for slot, client in enumerate(list(self.clients)):
+            if client is not None:
+                log.info("Game client #%d (pid %d):", slot + 1, client._process.pid)
+                client.dump_latency_stats()
+
+    # (label, AutoPotionWorker) of every guarded client, for the metrics endpoint.
+    def metric_clients(self):
+        return [(str(slot + 1), client) for slot, client in enumerate(list(self.clients)) if client is not None]
+
+    def stop(self):
+        self._running = False
+        self.wake()
+
+    def signal_shutdown(self):
+        self._shutting_down = True
+        self._running = False
+        self.wake()
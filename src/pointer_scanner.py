@@ -0,0 +1,284 @@
+# Pointer scanner: recovers a BASE_OFFSET / OFFSETS chain to the HP value after a
+# game patch. Works on memory dumps (memory_dump.py), so it runs the same against
+# the live game, a saved dump or a SimulatedGame.
+#
+#   python src/pointer_scanner.py --live
+#   python src/pointer_scanner.py --snapshot first.dmp 1250 --snapshot second.dmp 980
+#
+# 1. scan_value() finds every aligned float equal to the current HP. Later calls
+#    with a new HP (and a newer dump) only keep the candidates that changed with it.
+# 2. find_paths() builds a sorted reverse-pointer index (pointer value -> holder
+#    address) over the whole dump and walks backwards from the candidates until a
+#    holder lies in the module's static image.
+# 3. narrow_paths() drops chains that do not lead to the HP value in another dump.
+# Chunk scans and path searches run in a process pool; the index is handed to each
+# worker once through the pool initializer.
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count, path, remove
+from tempfile import gettempdir
+
+import numpy
+
+import config
+from memory_backend import MemoryBackendError
+from memory_dump import CHUNK_SIZE, MemoryImage, capture, pages_covering
+
+# Per-worker state: open dumps by path and the reverse-pointer index.
+_worker_images = {}
+_worker_index = None
+
+
+def _worker_view(file_path):
+    image = _worker_images.get(file_path)
+    if image is None:
+        image = _worker_images[file_path] = MemoryImage(file_path)
+    return image._mmap
+
+
+def _init_search_worker(values, holders, module_lo, module_hi):
+    global _worker_index
+    _worker_index = (values, holders, module_lo, module_hi)
+
+
+# Chunk tasks of (file path, start address, file offset, length), 8-byte aligned.
+def _chunk_tasks(image, chunk_size=CHUNK_SIZE):
+    tasks = []
+    for start, size, file_offset in image.regions:
+        for pos in range(0, size - size % 8, chunk_size):
+            length = min(chunk_size, size - size % 8 - pos)
+            tasks.append((image.file_path, start + pos, file_offset + pos, length))
+    return tasks
+
+
+def _scan_value_chunk(task, hp, tolerance):
+    file_path, start, file_offset, length = task
+    floats = numpy.frombuffer(_worker_view(file_path), dtype="<f4", count=length // 4, offset=file_offset)
+    hits = numpy.flatnonzero(numpy.abs(floats - numpy.float32(hp)) <= tolerance)
+    return numpy.uint64(start) + hits.astype(numpy.uint64) * numpy.uint64(4)
+
+
+# Pointer values in a chunk that point into any dumped region, with their holder addresses.
+def _index_chunk(task, region_starts, region_ends):
+    file_path, start, file_offset, length = task
+    values = numpy.frombuffer(_worker_view(file_path), dtype="<u8", count=length // 8, offset=file_offset)
+    region = numpy.searchsorted(region_starts, values, side="right") - 1
+    valid = (region >= 0) & (values < region_ends[numpy.maximum(region, 0)])
+    hits = numpy.flatnonzero(valid)
+    return values[hits], numpy.uint64(start) + hits.astype(numpy.uint64) * numpy.uint64(8)
+
+
+# Walks backwards from the target addresses through the reverse-pointer index.
+# Returns (base offset, offsets) chains ending in the module's static image.
+def _search_paths(targets, max_depth, max_offset, max_nodes):
+    values, holders, module_lo, module_hi = _worker_index
+    frontier = numpy.asarray(targets, dtype=numpy.uint64)
+    levels = []  # Per depth: (holder, parent index in the previous frontier, offset)
+    found = []
+    max_offset = numpy.uint64(max_offset)
+    for depth in range(max_depth):
+        if not len(frontier):
+            break
+        low = numpy.where(frontier > max_offset, frontier - max_offset, numpy.uint64(0))
+        lo = numpy.searchsorted(values, low, side="left")
+        hi = numpy.searchsorted(values, frontier, side="right")
+        counts = hi - lo
+        total = int(counts.sum())
+        if not total:
+            break
+        parent = numpy.repeat(numpy.arange(len(frontier)), counts)
+        idx = numpy.repeat(lo - numpy.cumsum(counts) + counts, counts) + numpy.arange(total)
+        holder = holders[idx]
+        offset = frontier[parent] - values[idx]
+        levels.append((holder, parent, offset))
+
+        static = (holder >= module_lo) & (holder < module_hi)
+        for i in numpy.flatnonzero(static):
+            found.append(_build_chain(levels, depth, int(i), module_lo))
+
+        # Keep expanding the non-static holders; the frontier indexes into this level.
+        keep = numpy.flatnonzero(~static)[:max_nodes]
+        levels[-1] = (holder[keep], parent[keep], offset[keep])
+        frontier = holder[keep]
+    return found
+
+
+def _build_chain(levels, depth, index, module_lo):
+    base_offset = int(levels[depth][0][index]) - int(module_lo)
+    offsets = []
+    for d in range(depth, -1, -1):
+        _, parent, offset = levels[d]
+        offsets.append(int(offset[index]))
+        index = int(parent[index])
+    return base_offset, offsets
+
+
+class PointerScanner:
+    def __init__(self, max_depth=config.POINTER_SCAN_MAX_DEPTH, max_offset=config.POINTER_SCAN_MAX_OFFSET,
+                 workers=None, tolerance=0.5, max_nodes=200000):
+        self.max_depth = max_depth
+        self.max_offset = max_offset
+        self.workers = workers or cpu_count() or 1
+        self.tolerance = tolerance
+        self.max_nodes = max_nodes
+        self.candidates = None  # numpy uint64 array of HP candidate addresses
+        self.paths = []         # (base offset, offsets) chains
+
+    # Finds (first call) or narrows (later calls) the addresses holding the HP value.
+    def scan_value(self, image, hp):
+        if self.candidates is None:
+            with ProcessPoolExecutor(self.workers) as pool:
+                tasks = _chunk_tasks(image)
+                parts = list(pool.map(_scan_value_chunk, tasks, [hp] * len(tasks), [self.tolerance] * len(tasks)))
+            self.candidates = numpy.concatenate(parts) if parts else numpy.empty(0, dtype=numpy.uint64)
+        else:
+            found = _values_at(image, self.candidates, "<f4")
+            self.candidates = self.candidates[numpy.abs(found - numpy.float32(hp)) <= self.tolerance]
+        return len(self.candidates)
+
+    # Searches pointer chains from the module's static image to the current candidates.
+    def find_paths(self, image, max_results=None):
+        region_starts = numpy.array([start for start, _, _ in image.regions], dtype=numpy.uint64)
+        region_ends = numpy.array([start + size for start, size, _ in image.regions], dtype=numpy.uint64)
+        with ProcessPoolExecutor(self.workers) as pool:
+            tasks = _chunk_tasks(image)
+            parts = list(pool.map(_index_chunk, tasks, [region_starts] * len(tasks), [region_ends] * len(tasks)))
+        values = numpy.concatenate([v for v, _ in parts]) if parts else numpy.empty(0, dtype=numpy.uint64)
+        holders = numpy.concatenate([h for _, h in parts]) if parts else numpy.empty(0, dtype=numpy.uint64)
+        order = numpy.argsort(values, kind="stable")
+        values, holders = values[order], holders[order]
+        self.index_size = len(values)
+
+        module_lo = numpy.uint64(image.module_base)
+        module_hi = numpy.uint64(image.module_base + image.module_size)
+        batches = numpy.array_split(self.candidates, min(len(self.candidates), self.workers * 4) or 1)
+        with ProcessPoolExecutor(self.workers, initializer=_init_search_worker,
+                                 initargs=(values, holders, module_lo, module_hi)) as pool:
+            results = pool.map(_search_paths, batches, [self.max_depth] * len(batches),
+                               [self.max_offset] * len(batches), [self.max_nodes] * len(batches))
+            paths = {(base, tuple(offsets)) for found in results for base, offsets in found}
+        # Shortest chains with the smallest offsets first.
+        self.paths = sorted(([base, list(offsets)] for base, offsets in paths),
+                            key=lambda p: (len(p[1]), sum(p[1]), p[0]))
+        if max_results is not None:
+            self.paths = self.paths[:max_results]
+        return self.paths
+
+    # Keeps the chains that resolve to the HP value in another dump.
+    def narrow_paths(self, image, hp):
+        kept = []
+        for base_offset, offsets in self.paths:
+            value = _chain_value(image, base_offset, offsets)
+            if value is not None and abs(value - hp) <= self.tolerance:
+                kept.append([base_offset, offsets])
+        self.paths = kept
+        return self.paths
+
+
+# Values of the given dtype at each (dtype-aligned) address; NaN where the dump has no data.
+def _values_at(image, addresses, dtype):
+    result = numpy.full(len(addresses), numpy.nan, dtype=numpy.float64)
+    item = numpy.dtype(dtype).itemsize
+    for start, size, file_offset in image.regions:
+        inside = numpy.flatnonzero((addresses >= start) & (addresses + numpy.uint64(item) <= start + size))
+        if not len(inside):
+            continue
+        region = numpy.frombuffer(image._mmap, dtype=dtype, count=size // item, offset=file_offset)
+        result[inside] = region[(addresses[inside] - numpy.uint64(start)) // numpy.uint64(item)]
+    return result
+
+
+# Follows a chain the way PointerChainResolver does; None if a hop leaves the dump.
+def _chain_value(image, base_offset, offsets):
+    try:
+        addr = image.module_base + base_offset
+        for offset in offsets:
+            addr = image.read_pointer(addr) + offset
+        return image.read_float(addr)
+    except MemoryBackendError:
+        return None
+
+
+def format_chain(base_offset, offsets):
+    return f"BASE_OFFSET = 0x{base_offset:X}\nOFFSETS = [{', '.join(f'0x{o:X}' for o in offsets)}]"
+
+
+def _print_paths(paths, limit):
+    print(f"{len(paths)} pointer chain(s) found.")
+    for base_offset, offsets in paths[:limit]:
+        print()
+        print(format_chain(base_offset, offsets))
+
+
+# Interactive scan against the running game: dumps memory, asks for the HP shown
+# in game after each change and narrows until the chain is found.
+def scan_live(scanner, backend, limit):
+    process = backend.attach(config.PROCESS_NAME)
+    first_dump = path.join(gettempdir(), "le_autopot_scan_first.dmp")
+    dumps = [first_dump]
+    try:
+        hp = float(input("Current HP shown in game: "))
+        print("Dumping process memory...")
+        capture(process, first_dump, config.MODULE_NAME)
+        with MemoryImage(first_dump) as image:
+            print(f"{scanner.scan_value(image, hp)} candidate address(es).")
+        step = 0
+        while len(scanner.candidates) > 1:
+            answer = input("Change your HP, then enter the new value (empty to search now): ").strip()
+            if not answer:
+                break
+            step += 1
+            page_dump = path.join(gettempdir(), f"le_autopot_scan_pages{step}.dmp")
+            dumps.append(page_dump)
+            capture(process, page_dump, config.MODULE_NAME, regions=pages_covering(scanner.candidates.tolist()))
+            with MemoryImage(page_dump) as image:
+                print(f"{scanner.scan_value(image, float(answer))} candidate address(es).")
+        hp = float(input("Current HP shown in game (for the chain search): "))
+        final_dump = path.join(gettempdir(), "le_autopot_scan_final.dmp")
+        dumps.append(final_dump)
+        print("Dumping process memory...")
+        capture(process, final_dump, config.MODULE_NAME)
+        with MemoryImage(final_dump) as image:
+            scanner.scan_value(image, hp)
+            scanner.find_paths(image)
+            scanner.narrow_paths(image, hp)
+        _print_paths(scanner.paths, limit)
+    finally:
+        process.close()
+        for dump in dumps:
+            if path.exists(dump):
+                remove(dump)
+
+
+def main():
+    parser = ArgumentParser(description="Find pointer chains to the HP value.")
+    parser.add_argument("--live", action="store_true", help="scan the running game interactively")
+    parser.add_argument("--snapshot", nargs=2, action="append", metavar=("DUMP", "HP"),
+                        help="dump file and the HP it was taken at (repeat to narrow; the last one is searched)")
+    parser.add_argument("--max-depth", type=int, default=config.POINTER_SCAN_MAX_DEPTH)
+    parser.add_argument("--max-offset", type=lambda v: int(v, 0), default=config.POINTER_SCAN_MAX_OFFSET)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--show", type=int, default=10)
+    args = parser.parse_args()
+
+    scanner = PointerScanner(args.max_depth, args.max_offset, args.workers)
+    if args.live:
+        from memory_backend import PymemBackend
+        scan_live(scanner, PymemBackend(), args.show)
+        return
+    if not args.snapshot:
+        parser.error("use --live or at least one --snapshot")
+    for dump, hp in args.snapshot:
+        with MemoryImage(dump) as image:
+            print(f"{dump}: {scanner.scan_value(image, float(hp))} candidate address(es).")
+    dump, hp = args.snapshot[-1]
+    with MemoryImage(dump) as image:
+        scanner.find_paths(image)
+    for dump, hp in args.snapshot:
+        with MemoryImage(dump) as image:
+            scanner.narrow_paths(image, float(hp))
+    _print_paths(scanner.paths, args.show)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import config
+
+
+# Rolling least-squares HP slope over the last few samples, updated in O(1) per
+# sample from running sums over fixed-size ring buffers (no per-sample allocation).
+# Every time the ring wraps, timestamps are rebased to the oldest sample and all sums
+# are recomputed from the ring, so neither the time base nor rounding errors of the
+# incremental updates build up over multi-hour sessions.
+class HpTrendPredictor:
+    _EWMA_ALPHA = 0.2
+
+    def __init__(self, window=None, input_latency=None):
+        self.window = max(2, int(config.PREDICTION_WINDOW if window is None else window))
+        self.input_latency = float(config.PREDICTION_INPUT_LATENCY if input_latency is None else input_latency)
+        self._times = [0.0] * self.window
+        self._values = [0.0] * self.window
+        self.reset()
+
+    def reset(self):
+        self._count = 0
+        self._index = 0
+        self._ref_time = None
+        self._last_time = None
+        self._sum_t = self._sum_h = self._sum_tt = self._sum_th = 0.0
+        # Measured sample period and key-send duration (exponentially weighted).
+        self.sample_period = 0.0
+        self.send_duration = 0.0
+
+    def add_sample(self, now, hp):
+        if self._ref_time is None:
+            self._ref_time = now
+        elif now > self._last_time:
+            period = now - self._last_time
+            self.sample_period = period if self.sample_period == 0.0 else \
+                self.sample_period + self._EWMA_ALPHA * (period - self.sample_period)
+        self._last_time = now
+
+        t = now - self._ref_time
+        i = self._index
+        if self._count == self.window:
+            old_t = self._times[i]
+            old_h = self._values[i]
+            self._sum_t -= old_t
+            self._sum_h -= old_h
+            self._sum_tt -= old_t * old_t
+            self._sum_th -= old_t * old_h
+        else:
+            self._count += 1
+        self._times[i] = t
+        self._values[i] = hp
+        self._sum_t += t
+        self._sum_h += hp
+        self._sum_tt += t * t
+        self._sum_th += t * hp
+        self._index = i + 1
+        if self._index == self.window:
+            self._index = 0
+            self._rebase()
+
+    # Moves the time reference to the oldest sample and recomputes the sums.
+    def _rebase(self):
+        times = self._times
+        values = self._values
+        shift = times[self._index]
+        self._ref_time += shift
+        sum_t = sum_h = sum_tt = sum_th = 0.0
+        for i in range(self._count):
+            t = times[i] - shift
+            h = values[i]
+            times[i] = t
+            sum_t += t
+            sum_h += h
+            sum_tt += t * t
+            sum_th += t * h
+        self._sum_t = sum_t
+        self._sum_h = sum_h
+        self._sum_tt = sum_tt
+        self._sum_th = sum_th
+
+    # HP change per second over the window, or 0.0 with too few samples.
+    def slope(self):
+        n = self._count
+        if n < 2:
+            return 0.0
+        denom = n * self._sum_tt - self._sum_t * self._sum_t
+        if denom <= 0.0:
+            return 0.0
+        return (n * self._sum_th - self._sum_t * self._sum_h) / denom
+
+    def record_send_duration(self, duration):
+        self.send_duration = duration if self.send_duration == 0.0 else \
+            self.send_duration + self._EWMA_ALPHA * (duration - self.send_duration)
+
+    # Seconds until a potion pressed now would take effect at the earliest next decision.
+    def lead_time(self):
+        return self.sample_period + self.send_duration + self.input_latency
+
+    # True if HP is falling and projected to be below the threshold within the lead time.
+    def predicts_crossing(self, current_hp, threshold):
+        slope = self.slope()
+        return slope < 0.0 and current_hp + slope * self.lead_time() < threshold
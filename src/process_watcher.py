@@ -0,0 +1,74 @@
+from threading import Thread, Event
+
+from memory_backend import MemoryBackendError
+import config
+
+# Watches for the game process starting, instead of walking the full process list by
+# name every WAIT_INTERVAL_PROCESS. Each poll takes the set of running pids from the
+# backend's process table (one call) and diffs it against the previous poll; only pids
+# that are new since then are looked up by name, so a poll costs next to nothing while
+# the game is closed and PROCESS_WATCH_INTERVAL can be short.
+
+
+class ProcessWatcher(Thread):
+    def __init__(self, table, process_name, on_start=None, interval=None):
+        super().__init__(name="ProcessWatcher", daemon=True)
+        self.table = table
+        self.process_name = process_name.lower()
+        self.interval = config.PROCESS_WATCH_INTERVAL if interval is None else interval
+        self._on_start = on_start
+        self._known = set()
+        # Running processes with the watched name: pid -> start time (time() value), None
+        # for processes already running at the first poll. Replaced, never mutated, so
+        # other threads can read it without a lock.
+        self.matches = {}
+        # Matching processes seen so far; waiters compare it to notice a new one.
+        self.found = 0
+        self.polls = 0
+        self.lookups = 0
+        self._stop_event = Event()
+
+    # The first poll runs on the caller's thread, so a running game is attached at once.
+    def start(self):
+        self.poll(initial=True)
+        super().start()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.poll()
+            except MemoryBackendError:
+                pass
+
+    def poll(self, initial=False):
+        pids = self.table.pids()
+        matches = self.matches
+        changed = any(pid not in pids for pid in matches)
+        if changed:
+            matches = {pid: started for pid, started in matches.items() if pid in pids}
+        started = False
+        # Pids that could not be described yet (e.g. denied while the process starts up)
+        # stay unknown, so the next poll looks them up again.
+        unresolved = set()
+        for pid in pids - self._known:
+            self.lookups += 1
+            info = self.table.describe(pid)
+            if info is None:
+                unresolved.add(pid)
+            elif info[0].lower() == self.process_name:
+                if not changed:
+                    matches = dict(matches)
+                    changed = True
+                matches[pid] = None if initial else info[1]
+                started = True
+        self._known = pids - unresolved if unresolved else pids
+        self.polls += 1
+        if changed:
+            self.matches = matches
+        if started:
+            self.found += 1
+            if self._on_start is not None:
+                self._on_start()
+
+    def stop(self):
+        self._stop_event.set()
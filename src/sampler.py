@@ -0,0 +1,165 @@
+from collections import deque
+from math import isfinite
+from threading import Thread, Event
+from time import time, monotonic, perf_counter, perf_counter_ns
+
+from memory_backend import MemoryBackendError
+from instrumentation import lap
+from stat_block import StatBlockReader
+import config
+
+# Hot tier of the split monitoring loop (SPLIT_SAMPLER_THREAD). The sampler thread only
+# reads HP, decides and presses the potion key; the worker thread keeps everything slow
+# (pointer re-resolution, focus tracking, max HP learning, overlay updates).
+# Both sides exchange immutable snapshots by plain reference assignment, each written by
+# one thread only: the worker publishes a SamplerTarget, the sampler publishes HpSamples.
+
+
+# What the sampler should read and the limits it decides against. Written by the worker.
+class SamplerTarget:
+    __slots__ = ("process", "hp_addr", "max_hp", "threshold", "active")
+
+    def __init__(self, process, hp_addr, max_hp, threshold, active):
+        self.process = process
+        self.hp_addr = hp_addr
+        self.max_hp = max_hp
+        self.threshold = threshold
+        self.active = active
+
+    def same_as(self, process, hp_addr, max_hp, threshold, active):
+        return (self.process is process and self.hp_addr == hp_addr and self.max_hp == max_hp
+                and self.threshold == threshold and self.active == active)
+
+
+# Latest HP read. hp is None if the read at hp_addr failed; values holds the decoded
+# stat block (STAT_BLOCK_FIELDS) or None. Written by the sampler.
+class HpSample:
+    __slots__ = ("seq", "hp", "timestamp", "hp_addr", "values")
+
+    def __init__(self, seq, hp, timestamp, hp_addr, values=None):
+        self.seq = seq
+        self.hp = hp
+        self.timestamp = timestamp
+        self.hp_addr = hp_addr
+        self.values = values
+
+
+# Samples HP on its own thread for one monitoring cycle of the worker. While it runs it
+# owns the worker's adaptive sampler, predictor, sampling stats, trace recorder and the
+# potion decision state (including the rule table); the worker gets them back after join().
+class HpSampler(Thread):
+    # Upper bound for one wait while there is nothing to sample.
+    _MAX_BLOCKING_WAIT = 1.0
+
+    def __init__(self, worker):
+        super().__init__(name="HpSampler", daemon=True)
+        self._worker = worker
+        self._running = True
+        self._target_event = Event()
+        self.target = None
+        self.latest = None
+        # (hp, max_hp) of every potion used, drained by the worker for the potion log.
+        self.potion_events = deque()
+        # Unexpected exception that stopped the sampler, re-raised by the worker.
+        self.error = None
+        self.read_failures = 0
+
+    # Hands a new target to the sampler. Called from the worker thread only.
+    def publish(self, target):
+        self.target = target
+        self._target_event.set()
+
+    def stop(self):
+        self._running = False
+        self._target_event.set()
+
+    def run(self):
+        try:
+            self._sample_loop()
+        except Exception as e:
+            self.error = e
+            self._worker.wake()
+
+    def _sample_loop(self):
+        worker = self._worker
+        latency = worker._latency
+        recorder = worker._trace_recorder
+        stats = worker.sampling_stats
+        adaptive_sampler = worker._adaptive_sampler
+        predictor = worker._predictor
+        layout = worker._stat_layout
+        rules = worker._rules
+        stat_reader = None
+        values = None
+        event = self._target_event
+        scheduler = worker.scheduler
+        failed_target = None
+        paused = False
+        seq = 0
+
+        while self._running:
+            target = self.target
+            if target is None or not target.active or target is failed_target:
+                if target is not None and not target.active and not paused:
+                    # Samples from before the pause say nothing about the HP trend after it.
+                    paused = True
+                    if predictor is not None: predictor.reset()
+                    if adaptive_sampler is not None: adaptive_sampler.reset()
+                scheduler.rearm()
+                event.clear()
+                if self._running and target is self.target:
+                    event.wait(self._MAX_BLOCKING_WAIT)
+                continue
+            paused = False
+
+            scheduler.begin_tick()
+            tick_start_ns = perf_counter_ns()
+            try:
+                if layout is None:
+                    current_hp = target.process.read_float(target.hp_addr)
+                else:
+                    if stat_reader is None or stat_reader.process is not target.process:
+                        stat_reader = StatBlockReader(layout, target.process)
+                    values = stat_reader.read(target.hp_addr)
+                    current_hp = float(values[layout.hp_index])
+            except MemoryBackendError:
+                current_hp = None
+            if latency is not None: worker._sample_read_ns = lap(latency.hp_read, tick_start_ns)
+            now = time()
+            seq += 1
+            if current_hp is None or not isfinite(current_hp):
+                # The worker fails over to another chain and publishes a new target.
+                self.read_failures += 1
+                self.latest = HpSample(seq, None, now, target.hp_addr)
+                failed_target = target
+                scheduler.rearm()
+                worker.wake()
+                continue
+
+            potion_fired = worker._decide_and_inject(current_hp, target.max_hp, target.threshold, now)
+            if rules is not None and worker._apply_trigger_rules(current_hp, values, target.max_hp, now):
+                potion_fired = True
+            if potion_fired:
+                self.potion_events.append((current_hp, target.max_hp))
+            self.latest = HpSample(seq, current_hp, now, target.hp_addr, values)
+            if recorder is not None:
+                recorder.record(monotonic(), current_hp, target.max_hp, target.threshold, potion_fired)
+            stats.record_sample(current_hp, target.threshold)
+            if adaptive_sampler is None:
+                interval = config.INTERVAL
+            else:
+                interval = adaptive_sampler.next_interval(current_hp, target.max_hp, target.threshold)
+            if latency is not None: lap(latency.tick, tick_start_ns)
+
+            # A new target (pause, new address or max HP) cuts the wait short and starts a
+            # new schedule.
+            deadline = scheduler.schedule(interval)
+            event.clear()
+            if self._running and target is self.target:
+                remaining = deadline - perf_counter() - scheduler.spin
+                if remaining > 0:
+                    event.wait(remaining)
+                if self._running and target is self.target:
+                    scheduler.spin_until(deadline)
+                else:
+                    scheduler.rearm()
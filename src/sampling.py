@@ -0,0 +1,175 @@
+from time import perf_counter
+
+import config
+from instrumentation import LatencyHistogram
+
+
+# Picks the delay before the next HP sample from the HP trajectory.
+# Falling HP or HP close to the threshold drops straight to the minimum period;
+# otherwise the period ramps up by a factor per sample, up to the base INTERVAL
+# while HP is below max, and up to the maximum period while HP sits at max.
+class AdaptiveSampler:
+    _HP_EPSILON = 0.01
+
+    def __init__(self, min_interval, max_interval, near_threshold_pct, ramp_factor, base_interval=None):
+        self.min_interval = float(min_interval)
+        self.max_interval = float(max_interval)
+        self.near_threshold_pct = float(near_threshold_pct)
+        self.ramp_factor = max(1.0, float(ramp_factor))
+        self.base_interval = float(config.INTERVAL if base_interval is None else base_interval)
+        self.reset()
+
+    # Builds a sampler from the [Sampling] section of the user config.
+    @classmethod
+    def from_user_config(cls, user_cfg):
+        user_cfg = user_cfg or {}
+        return cls(
+            user_cfg.get('SAMPLING_MIN_INTERVAL', config.SAMPLING_MIN_INTERVAL),
+            user_cfg.get('SAMPLING_MAX_INTERVAL', config.SAMPLING_MAX_INTERVAL),
+            user_cfg.get('SAMPLING_NEAR_THRESHOLD_PCT', config.SAMPLING_NEAR_THRESHOLD_PCT),
+            user_cfg.get('SAMPLING_RAMP_FACTOR', config.SAMPLING_RAMP_FACTOR),
+        )
+
+    def reset(self):
+        self._last_hp = None
+        self._interval = self.base_interval
+
+    # Returns the delay in seconds before the next sample.
+    def next_interval(self, current_hp, max_hp, threshold):
+        last_hp = self._last_hp
+        self._last_hp = current_hp
+        if max_hp is None or threshold is None or max_hp <= 0:
+            self._interval = self.base_interval
+            return self._interval
+
+        falling = last_hp is not None and current_hp < last_hp - self._HP_EPSILON
+        if falling or current_hp <= threshold + self.near_threshold_pct * max_hp:
+            self._interval = self.min_interval
+        elif current_hp >= max_hp - self._HP_EPSILON:
+            self._interval = min(self._interval * self.ramp_factor, self.max_interval)
+        else:
+            self._interval = min(self._interval * self.ramp_factor, max(self.base_interval, self.min_interval))
+        return self._interval
+
+
+# Effective sample rate and threshold-crossing detection latency of one session.
+# The detection latency of a crossing is the time between the last sample above
+# the threshold and the first sample below it, i.e. the worst-case delay before
+# the worker can react.
+class SamplingStats:
+    def __init__(self):
+        # Samples over the worker's lifetime; not cleared by reset().
+        self.total_samples = 0
+        self.reset()
+
+    def reset(self):
+        self.samples = 0
+        self.crossings = 0
+        self.detection_latency_total = 0.0
+        self.detection_latency_max = 0.0
+        self._first_sample_time = None
+        self._last_sample_time = None
+        self._was_above_threshold = False
+
+    def record_sample(self, current_hp, threshold, now=None):
+        if now is None:
+            now = perf_counter()
+        if self._first_sample_time is None:
+            self._first_sample_time = now
+        if threshold is not None:
+            above = current_hp >= threshold
+            if self._was_above_threshold and not above:
+                latency = now - self._last_sample_time
+                self.crossings += 1
+                self.detection_latency_total += latency
+                if latency > self.detection_latency_max:
+                    self.detection_latency_max = latency
+            self._was_above_threshold = above
+        self.samples += 1
+        self.total_samples += 1
+        self._last_sample_time = now
+
+    def samples_per_second(self):
+        if self.samples < 2:
+            return 0.0
+        elapsed = self._last_sample_time - self._first_sample_time
+        return (self.samples - 1) / elapsed if elapsed > 0 else 0.0
+
+    def mean_detection_latency(self):
+        return self.detection_latency_total / self.crossings if self.crossings else 0.0
+
+
+# Runs monitoring ticks on absolute perf_counter deadlines: each deadline is the previous
+# one plus the interval, so the work time of a tick does not stretch the period. The
+# caller blocks until spin seconds before the deadline and spins the rest; spin is only
+# nonzero for periods up to SCHEDULER_SPIN_MAX_INTERVAL, where the wakeup error of a
+# blocking wait is a noticeable part of the period. A tick that
+# overruns one or more deadlines skips them (counted as missed) instead of running the
+# late ones back to back. Records how late each tick starts and the period jitter, the
+# difference between the actual and the scheduled period, and how long each tick works
+# (begin_tick to schedule; kept over the scheduler's lifetime for the metrics endpoint).
+class DeadlineScheduler:
+    def __init__(self, spin=None):
+        self._spin = float(config.SCHEDULER_SPIN if spin is None else spin)
+        # Spin margin before the deadline returned by the last schedule().
+        self.spin = 0.0
+        self.lateness = LatencyHistogram("tick start lateness")
+        self.jitter = LatencyHistogram("period jitter")
+        self.busy = LatencyHistogram("tick")
+        self._tick_start = None
+        self.reset()
+
+    def reset(self):
+        self.lateness.reset()
+        self.jitter.reset()
+        self.ticks = 0
+        self.missed = 0
+        self.rearm()
+
+    # Forgets the deadline (after a pause or a cut-short wait); the next tick starts a new schedule.
+    def rearm(self):
+        self._deadline = None
+        self._prev_deadline = None
+        self._prev_start = None
+
+    # Marks the start of a tick and returns the current perf_counter time.
+    def begin_tick(self):
+        now = perf_counter()
+        deadline = self._deadline
+        if deadline is None:
+            self._deadline = now
+        else:
+            self.lateness.record(int((now - deadline) * 1e9) if now > deadline else 0)
+            if self._prev_start is not None:
+                self.jitter.record(int(abs((now - self._prev_start) - (deadline - self._prev_deadline)) * 1e9))
+        self._prev_deadline = self._deadline
+        self._prev_start = self._tick_start = now
+        self.ticks += 1
+        return now
+
+    # Returns the deadline of the next tick, interval after the current one, skipping
+    # the deadlines that have already passed, and sets the spin margin for it.
+    def schedule(self, interval):
+        self.spin = self._spin if interval <= config.SCHEDULER_SPIN_MAX_INTERVAL else 0.0
+        deadline = self._deadline + interval
+        now = perf_counter()
+        if self._tick_start is not None:
+            self.busy.record(int((now - self._tick_start) * 1e9))
+            self._tick_start = None
+        if now > deadline and interval > 0:
+            skipped = int((now - deadline) / interval) + 1
+            self.missed += skipped
+            deadline += skipped * interval
+        self._deadline = deadline
+        return deadline
+
+    # Busy-waits for the last moment before the deadline.
+    @staticmethod
+    def spin_until(deadline):
+        while perf_counter() < deadline:
+            pass
+
+    def format_line(self):
+        return (f"{self.ticks} ticks, {self.missed} missed deadlines, period jitter "
+                f"p99<={self.jitter.percentile(99) / 1000:.1f}us max={self.jitter.max_ns / 1000:.1f}us, "
+                f"late starts p99<={self.lateness.percentile(99) / 1000:.1f}us")
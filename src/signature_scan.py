@@ -0,0 +1,175 @@
+import json
+from os import path
+from struct import Struct
+
+import config
+import logs
+from memory_backend import MemoryBackendError
+
+log = logs.get_logger("signature")
+
+# Signature (array of bytes) scanning of a module's code sections.
+# A signature is hex bytes with "??" wildcards, e.g. "48 8B 05 ?? ?? ?? ?? 48 8B 88".
+# The matched instruction holds a RIP-relative rel32 displacement at disp_offset;
+# the referenced address is match + instruction_length + rel32.
+
+_PE_HEADER_READ = 0x1000
+_SECTION = Struct("<8sIIIIIIHHI")   # name, virtual size, virtual address, ..., characteristics
+_IMAGE_SCN_CNT_CODE = 0x00000020
+_IMAGE_SCN_MEM_EXECUTE = 0x20000000
+_CHUNK_SIZE = 16 * 1024 * 1024
+_I32 = Struct("<i")
+
+
+class SignatureError(Exception):
+    pass
+
+
+# Parses "48 8B ?? 05" into (pattern bytes, wildcard mask). Wildcard bytes are zero in the pattern.
+def parse_signature(text):
+    pattern = bytearray()
+    mask = []
+    for token in text.split():
+        if token in ("?", "??"):
+            pattern.append(0)
+            mask.append(False)
+        else:
+            pattern.append(int(token, 16))
+            mask.append(True)
+    if not any(mask):
+        raise SignatureError(f"Signature has no fixed bytes: {text!r}")
+    return bytes(pattern), mask
+
+
+# Compiled signature: the longest wildcard-free run is the search anchor, found with
+# bytes.find (CPython's skip-table search); the remaining fixed bytes are checked on
+# a memoryview of each anchor hit.
+class Signature:
+    def __init__(self, text):
+        self.text = text
+        self.pattern, self.mask = parse_signature(text)
+        best_start, best_len, start = 0, 0, None
+        for i, fixed in enumerate(self.mask + [False]):
+            if fixed and start is None:
+                start = i
+            elif not fixed and start is not None:
+                if i - start > best_len:
+                    best_start, best_len = start, i - start
+                start = None
+        self.anchor = self.pattern[best_start:best_start + best_len]
+        self.anchor_pos = best_start
+        # (position, byte) pairs outside the anchor that must match.
+        self.checks = [(i, b) for i, (b, fixed) in enumerate(zip(self.pattern, self.mask))
+                       if fixed and not best_start <= i < best_start + best_len]
+
+    def __len__(self):
+        return len(self.pattern)
+
+    # Offsets of all matches in data (bytes-like).
+    def find_all(self, data):
+        view = memoryview(data)
+        size = len(self.pattern)
+        anchor, anchor_pos, checks = self.anchor, self.anchor_pos, self.checks
+        matches = []
+        pos = data.find(anchor, anchor_pos)
+        while pos != -1:
+            start = pos - anchor_pos
+            if start + size <= len(data):
+                window = view[start:start + size]
+                if all(window[i] == b for i, b in checks):
+                    matches.append(start)
+            pos = data.find(anchor, pos + 1)
+        view.release()
+        return matches
+
+
+# (virtual address, virtual size) of the executable sections, plus the PE timestamp,
+# parsed from the module header in process memory.
+def code_sections(process, module_base):
+    header = process.read_bytes(module_base, _PE_HEADER_READ)
+    if header[:2] != b"MZ":
+        raise SignatureError("Module has no MZ header.")
+    pe = _I32.unpack_from(header, 0x3C)[0]
+    if header[pe:pe + 4] != b"PE\0\0":
+        raise SignatureError("Module has no PE header.")
+    section_count = int.from_bytes(header[pe + 6:pe + 8], "little")
+    timestamp = int.from_bytes(header[pe + 8:pe + 12], "little")
+    optional_size = int.from_bytes(header[pe + 20:pe + 22], "little")
+    table = pe + 24 + optional_size
+    sections = []
+    for i in range(section_count):
+        name, virtual_size, virtual_address, *_, characteristics = _SECTION.unpack_from(header, table + i * _SECTION.size)
+        if characteristics & (_IMAGE_SCN_CNT_CODE | _IMAGE_SCN_MEM_EXECUTE):
+            sections.append((virtual_address, virtual_size))
+    return sections, timestamp
+
+
+# Scans the module's code sections in bulk chunks (overlapping by the signature length)
+# and returns the module-relative offsets of all matches.
+def scan_module(process, module_base, signature, sections, chunk_size=_CHUNK_SIZE):
+    matches = []
+    overlap = len(signature) - 1
+    for virtual_address, virtual_size in sections:
+        section_start = module_base + virtual_address
+        for pos in range(0, virtual_size, chunk_size):
+            length = min(chunk_size + overlap, virtual_size - pos)
+            data = process.read_bytes(section_start + pos, length)
+            for match in signature.find_all(data):
+                if match < chunk_size:
+                    matches.append(virtual_address + pos + match)
+    return matches
+
+
+# Derives the base offset (RVA) referenced by the configured signature. Results are
+# cached per module size and PE timestamp, so later launches of the same game
+# build skip the scan. Raises SignatureError if the signature does not match once.
+def find_base_offset(process, module_name=None, signature_text=None, disp_offset=None,
+                     instruction_length=None, cache_file=None):
+    module_name = config.MODULE_NAME if module_name is None else module_name
+    signature_text = config.BASE_SIGNATURE if signature_text is None else signature_text
+    disp_offset = config.BASE_SIGNATURE_DISP_OFFSET if disp_offset is None else disp_offset
+    instruction_length = config.BASE_SIGNATURE_INSTR_LENGTH if instruction_length is None else instruction_length
+    cache_file = config.SIGNATURE_CACHE_FILE if cache_file is None else cache_file
+
+    module = process.module_range(module_name)
+    if module is None:
+        raise MemoryBackendError(f"Module not found: {module_name}")
+    module_base, module_size = module
+    sections, timestamp = code_sections(process, module_base)
+    cache_key = f"{module_name}|{module_size}|{timestamp}|{signature_text}|{disp_offset}|{instruction_length}"
+
+    cache = _load_cache(cache_file)
+    if cache_key in cache:
+        return cache[cache_key]
+
+    signature = Signature(signature_text)
+    matches = scan_module(process, module_base, signature, sections)
+    if len(matches) != 1:
+        raise SignatureError(f"Signature matched {len(matches)} times in {module_name}, expected 1.")
+    match = matches[0]
+    displacement = _I32.unpack(process.read_bytes(module_base + match + disp_offset, 4))[0]
+    base_offset = match + instruction_length + displacement
+
+    cache[cache_key] = base_offset
+    _save_cache(cache_file, cache)
+    return base_offset
+
+
+def _load_cache(cache_file):
+    if not cache_file or not path.exists(cache_file):
+        return {}
+    try:
+        with open(cache_file) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(cache_file, cache):
+    if not cache_file:
+        return
+    try:
+        with open(cache_file, "w") as f:
+            json.dump(cache, f, indent=2)
+    except OSError as e:
+        log.error("Could not write signature cache: %s", e)
@@ -0,0 +1,75 @@
+from struct import Struct, calcsize
+
+import config
+
+# Stat block around the HP value (STAT_BLOCK_FIELDS): several fields of the player's
+# stats read with one memory read per sample into a preallocated buffer and decoded
+# with one precompiled Struct, instead of one read_float per value.
+
+# Accepted field types: struct format characters plus readable aliases.
+_TYPE_ALIASES = {
+    "float": "f", "double": "d",
+    "int8": "b", "uint8": "B", "int16": "h", "uint16": "H",
+    "int32": "i", "uint32": "I", "int64": "q", "uint64": "Q",
+}
+_FORMAT_CHARS = "fdbBhHiIqQ"
+
+
+class StatBlockError(ValueError):
+    pass
+
+
+# Compiled layout: the fields sorted by offset, with padding between them, as one
+# little-endian Struct starting at the lowest field offset (relative to the HP address).
+class StatBlockLayout:
+    def __init__(self, fields):
+        if "hp" not in fields:
+            raise StatBlockError("STAT_BLOCK_FIELDS needs an 'hp' field.")
+        if int(fields["hp"][0]) != 0:
+            raise StatBlockError("The 'hp' stat block field must be at offset 0 (the HP address).")
+        items = sorted((int(offset), name, _format_char(name, type_name)) for name, (offset, type_name) in fields.items())
+        self.start = items[0][0]
+        fmt = "<"
+        pos = self.start
+        for offset, name, char in items:
+            if offset < pos:
+                raise StatBlockError(f"Stat block field '{name}' at 0x{offset:X} overlaps the previous field.")
+            if offset > pos:
+                fmt += f"{offset - pos}x"
+            fmt += char
+            pos = offset + calcsize("<" + char)
+        self.struct = Struct(fmt)
+        self.size = self.struct.size
+        self.names = tuple(name for _, name, _ in items)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.hp_index = self.index["hp"]
+        self.max_hp_index = self.index.get("max_hp")
+
+    # Layout from config.STAT_BLOCK_FIELDS, or None if no stat block is configured.
+    @classmethod
+    def from_config(cls, fields=None):
+        fields = config.STAT_BLOCK_FIELDS if fields is None else fields
+        return cls(fields) if fields else None
+
+
+def _format_char(name, type_name):
+    char = _TYPE_ALIASES.get(type_name, type_name)
+    if char not in _FORMAT_CHARS:
+        raise StatBlockError(f"Unknown type {type_name!r} for stat block field '{name}'.")
+    return char
+
+
+# Reads the stat block of one process. read() fills the same buffer every time and
+# returns the decoded values in layout.names order.
+class StatBlockReader:
+    def __init__(self, layout, process):
+        self.layout = layout
+        self.process = process
+        self.buffer = bytearray(layout.size)
+        self._start = layout.start
+        self._read_into = process.read_into
+        self._unpack_from = layout.struct.unpack_from
+
+    def read(self, hp_addr):
+        self._read_into(hp_addr + self._start, self.buffer)
+        return self._unpack_from(self.buffer)
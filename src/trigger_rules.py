@@ -0,0 +1,129 @@
+import config
+from input_injector import create_injector
+
+# Extra potion rules from the [Rules] section of config_user.ini, next to the main
+# THRESHOLD_PCT / POTION_KEY rule:
+#
+#   RULE_<n> = <field> <comparator> <value>[%] <key> <cooldown seconds>
+#   RULE_1 = hp < 30% 2 0.5
+#   RULE_2 = mana < 40 3 1.0
+#
+# field is "hp" or a STAT_BLOCK_FIELDS name, the comparator one of < <= > >=, and a
+# value with % is a fraction of max HP (hp rules only). The rules are compiled once into
+# flat per-rule lists that evaluate() walks in a single pass per sample.
+
+_COMPARATORS = ("<", "<=", ">", ">=")
+
+
+class RuleError(ValueError):
+    pass
+
+
+# One parsed rule line.
+class TriggerRule:
+    __slots__ = ("name", "field", "comparator", "value", "percent", "key", "cooldown")
+
+    def __init__(self, name, field, comparator, value, percent, key, cooldown):
+        self.name = name
+        self.field = field
+        self.comparator = comparator
+        self.value = value
+        self.percent = percent
+        self.key = key
+        self.cooldown = cooldown
+
+    def describe(self):
+        value = f"{self.value * 100:g}%" if self.percent else f"{self.value:g}"
+        return f"{self.field} {self.comparator} {value} -> key {self.key} every {self.cooldown:g}s"
+
+
+def parse_rule(name, text):
+    tokens = str(text).split()
+    if len(tokens) < 5:
+        raise RuleError(f"{name}: expected '<field> <comparator> <value>[%] <key> <cooldown>', got {text!r}")
+    field, comparator, value_text, cooldown_text = tokens[0].lower(), tokens[1], tokens[2], tokens[-1]
+    key = " ".join(tokens[3:-1])
+    if comparator not in _COMPARATORS:
+        raise RuleError(f"{name}: unknown comparator {comparator!r} (use {' '.join(_COMPARATORS)})")
+    percent = value_text.endswith("%")
+    try:
+        value = float(value_text.rstrip("%"))
+        cooldown = float(cooldown_text)
+    except ValueError:
+        raise RuleError(f"{name}: value and cooldown must be numbers, got {text!r}") from None
+    if percent:
+        if field != "hp":
+            raise RuleError(f"{name}: % values are only supported for hp (fraction of max HP)")
+        value /= 100.0
+    return TriggerRule(name, field, comparator, value, percent, key, cooldown)
+
+
+# RULE_<n> entries of a user config, in rule number order.
+def rules_from_user_config(user_cfg):
+    rules = []
+    for name, text in (user_cfg or {}).items():
+        if name.upper().startswith("RULE_") and str(text).strip():
+            number = name[5:]
+            rules.append((int(number) if number.isdigit() else float("inf"), name, text))
+    return [parse_rule(name, text) for _, name, text in sorted(rules)]
+
+
+# Compiled rule table. Each rule i is the entry i of the parallel lists: index of its
+# field in the sample values, sign (+1 for < <=, -1 for > >= so every test is "below"),
+# inclusive flag, limit (pre-signed; % rules are rescaled on max HP changes only),
+# injector, cooldown and the time it last fired.
+class RuleEngine:
+    def __init__(self, rules, field_index, injector_factory=None):
+        injector_factory = injector_factory or (lambda key: create_injector(key))
+        self.rules = list(rules)
+        self.count = len(self.rules)
+        self.fired = [0] * self.count
+        self._field = []
+        self._sign = []
+        self._inclusive = []
+        self._limit = []
+        self._injector = []
+        self._cooldown = []
+        self._last = []
+        injectors = {}
+        for rule in self.rules:
+            if rule.field not in field_index:
+                raise RuleError(f"{rule.name}: unknown field '{rule.field}' (available: {', '.join(field_index)})")
+            if rule.key not in injectors:
+                injectors[rule.key] = injector_factory(rule.key)
+            sign = 1.0 if rule.comparator[0] == "<" else -1.0
+            self._field.append(field_index[rule.field])
+            self._sign.append(sign)
+            self._inclusive.append(rule.comparator.endswith("="))
+            # % rules stay disarmed until max HP is known.
+            self._limit.append(float("-inf") if rule.percent else sign * rule.value)
+            self._injector.append(injectors[rule.key])
+            self._cooldown.append(rule.cooldown)
+            self._last.append(float(config.LAST_POTION_TIME_INIT))
+        self.injectors = list(injectors.values())
+
+    # Rescales the % rules to a new max HP (None disarms them).
+    def set_max_hp(self, max_hp):
+        for i, rule in enumerate(self.rules):
+            if rule.percent:
+                self._limit[i] = float("-inf") if max_hp is None else self._sign[i] * rule.value * max_hp
+
+    # Forgets when the rules last fired.
+    def reset(self):
+        for i in range(self.count):
+            self._last[i] = float(config.LAST_POTION_TIME_INIT)
+
+    # Tests every rule against one sample and presses the keys of the ones that match
+    # and are off cooldown. Returns the number of keys sent.
+    def evaluate(self, values, now, decided_ns):
+        sent = 0
+        field, sign, inclusive, limit = self._field, self._sign, self._inclusive, self._limit
+        cooldown, last = self._cooldown, self._last
+        for i in range(self.count):
+            value = values[field[i]] * sign[i]
+            if (value < limit[i] or (value == limit[i] and inclusive[i])) and now - last[i] >= cooldown[i]:
+                self._injector[i].inject(decided_ns)
+                last[i] = now
+                self.fired[i] += 1
+                sent += 1
+        return sent
@@ -0,0 +1,189 @@
+# Offline tuner: evaluates THRESHOLD_PCT x POTION_COOLDOWN x STABLE_HP_DURATION
+# combinations against recorded HP traces (see HP_TRACE_FILE). The work is vectorized
+# over the settings grid: max HP learning and time below threshold are whole-trace numpy
+# passes, but the cooldown is still simulated by a Python loop over the samples below the
+# highest threshold, each step updating every grid point at once.
+#
+#   python src/tuner.py hp_trace.bin [more.bin ...] --thresholds 0.4:0.8:0.05 \
+#       --cooldowns 0.1:1.0:0.1 --stable 2:10:1
+#
+# The traces are open-loop: recorded HP does not react to simulated potions, so
+# "min HP" is the lowest HP relative to the learned max HP while the policy is armed.
+from argparse import ArgumentParser
+from time import perf_counter
+
+import numpy
+
+import config
+from hp_trace import HpTraceReader
+
+_HP_EPSILON = 0.01
+_MAX_SAMPLE_GAP = 1.0  # Seconds; longer gaps (pauses, restarts) are not counted as time below threshold
+
+
+# Max HP the worker would have learned at every sample for one STABLE_HP_DURATION,
+# following AutoPotionWorker._update_max_hp_logic. NaN while no max HP is known.
+def learned_max_hp(timestamps, hp, stable_duration, quick_stable_duration=1.0):
+    n = len(hp)
+    positive = hp > 0
+    prev_hp = numpy.empty(n)
+    prev_hp[0] = numpy.nan
+    prev_hp[1:] = hp[:-1]
+    prev_positive = numpy.zeros(n, dtype=bool)
+    prev_positive[1:] = positive[:-1]
+
+    # Stable-HP segments restart whenever HP changes or comes back from <= 0.
+    starts = positive & (~prev_positive | (numpy.abs(hp - prev_hp) > _HP_EPSILON))
+    segment = numpy.cumsum(starts)
+    start_times = numpy.zeros(segment[-1] + 1 if n else 1)
+    start_times[segment[starts]] = timestamps[starts]
+    elapsed = timestamps - start_times[segment]
+    in_segment = positive & (segment > 0)
+
+    def first_in_segment(mask):
+        idx = numpy.flatnonzero(mask)
+        if not len(idx):
+            return idx
+        keep = numpy.ones(len(idx), dtype=bool)
+        keep[1:] = segment[idx[1:]] != segment[idx[:-1]]
+        return idx[keep]
+
+    raise_idx = first_in_segment(in_segment & ~starts & (elapsed >= quick_stable_duration))
+    set_idx = first_in_segment(in_segment & ~starts & (elapsed >= stable_duration))
+
+    is_set = numpy.zeros(n, dtype=bool)
+    is_set[set_idx] = True
+    is_raise = numpy.zeros(n, dtype=bool)
+    is_raise[raise_idx] = True
+    if n and positive[0]:
+        is_set[0] = True  # Initial read after the address is found.
+    elif len(raise_idx) and not is_set[:raise_idx[0]].any():
+        is_set[raise_idx[0]] = True  # No initial max HP: the first stable read sets it.
+
+    # Running max of event values, restarted at every set event (offset trick:
+    # each set event lifts its group above all earlier groups).
+    values = numpy.where(is_set | is_raise, hp, -numpy.inf)
+    group = numpy.cumsum(is_set).astype(numpy.float64)
+    offset = 2.0 * (numpy.abs(hp).max() if n else 0.0) + 1.0
+    running = numpy.maximum.accumulate(values + group * offset) - group * offset
+    running[group == 0] = numpy.nan
+    return running
+
+
+# Evaluates every (stable, threshold, cooldown) combination on one trace.
+# Returns arrays of shape (len(stable_durations), len(thresholds), len(cooldowns)).
+def sweep_trace(timestamps, hp, thresholds, cooldowns, stable_durations):
+    timestamps = numpy.asarray(timestamps, dtype=numpy.float64)
+    hp = numpy.asarray(hp, dtype=numpy.float64)
+    thresholds = numpy.asarray(thresholds, dtype=numpy.float64)
+    cooldowns = numpy.asarray(cooldowns, dtype=numpy.float64)
+    n_s, n_t, n_c = len(stable_durations), len(thresholds), len(cooldowns)
+
+    dt = numpy.zeros(len(hp))
+    dt[:-1] = numpy.minimum(numpy.diff(timestamps), _MAX_SAMPLE_GAP)
+
+    max_hp = numpy.vstack([learned_max_hp(timestamps, hp, s) for s in stable_durations])  # (S, N)
+    with numpy.errstate(invalid='ignore', divide='ignore'):
+        ratio = hp[None, :] / max_hp  # HP as a fraction of learned max; NaN while unarmed
+
+    # Time below threshold and min HP: sort the HP ratios once per stable duration.
+    time_below = numpy.zeros((n_s, n_t))
+    min_hp_pct = numpy.full(n_s, numpy.nan)
+    for si in range(n_s):
+        armed = ~numpy.isnan(ratio[si])
+        r = ratio[si][armed]
+        if not len(r):
+            continue
+        order = numpy.argsort(r)
+        cum_dt = numpy.concatenate(([0.0], numpy.cumsum(dt[armed][order])))
+        time_below[si] = cum_dt[numpy.searchsorted(r[order], thresholds, side='left')]
+        min_hp_pct[si] = r[order[0]]
+
+    # Potions: greedy cooldown, one Python step per sample below the highest threshold,
+    # vectorized over the grid. (Jumping from potion to potion instead takes as many steps
+    # when the shortest cooldown is below the sample period, and each step costs more.)
+    potions = numpy.zeros((n_s, n_t, n_c), dtype=numpy.int64)
+    last_fire = numpy.full((n_s, n_t, n_c), -numpy.inf)
+    with numpy.errstate(invalid='ignore'):
+        candidates = numpy.flatnonzero((ratio < thresholds.max()).any(axis=0))
+        # Same comparison as the worker: HP < max HP * THRESHOLD_PCT.
+        below_all = hp[None, candidates, None] < max_hp[:, candidates, None] * thresholds  # (S, K, T)
+    for k, i in enumerate(candidates):
+        t = timestamps[i]
+        fire = below_all[:, k, :, None] & ((t - last_fire) >= cooldowns)
+        last_fire[fire] = t
+        potions += fire
+    return {
+        "potions": potions,
+        "time_below": numpy.broadcast_to(time_below[:, :, None], (n_s, n_t, n_c)),
+        "min_hp_pct": numpy.broadcast_to(min_hp_pct[:, None, None], (n_s, n_t, n_c)),
+    }
+
+
+# Sums the sweep results over several trace files.
+def sweep_traces(trace_paths, thresholds, cooldowns, stable_durations):
+    total = None
+    for trace_path in trace_paths:
+        with HpTraceReader(trace_path) as reader:
+            records = reader.as_numpy()
+            result = sweep_trace(records["timestamp"], records["hp"], thresholds, cooldowns, stable_durations)
+            del records
+        if total is None:
+            total = {key: numpy.array(value) for key, value in result.items()}
+        else:
+            total["potions"] += result["potions"]
+            total["time_below"] += result["time_below"]
+            total["min_hp_pct"] = numpy.fmin(total["min_hp_pct"], result["min_hp_pct"])
+    return total
+
+
+# Parses "start:stop:step" (stop inclusive) or "a,b,c".
+def parse_grid(spec):
+    if ":" in spec:
+        start, stop, step = (float(x) for x in spec.split(":"))
+        return numpy.round(numpy.arange(start, stop + step / 2, step), 6)
+    return numpy.array([float(x) for x in spec.split(",")])
+
+
+def main():
+    parser = ArgumentParser(description="Sweep potion settings over recorded HP traces.")
+    parser.add_argument("traces", nargs="+")
+    parser.add_argument("--thresholds", default="0.3:0.8:0.05")
+    parser.add_argument("--cooldowns", default="0.1:1.0:0.1")
+    parser.add_argument("--stable", default="1:10:1")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--sort", choices=("potions", "below", "min_hp"), default="potions")
+    args = parser.parse_args()
+
+    thresholds = parse_grid(args.thresholds)
+    cooldowns = parse_grid(args.cooldowns)
+    stable_durations = parse_grid(args.stable)
+
+    started = perf_counter()
+    result = sweep_traces(args.traces, thresholds, cooldowns, stable_durations)
+    elapsed = perf_counter() - started
+    combos = len(thresholds) * len(cooldowns) * len(stable_durations)
+    print(f"Evaluated {combos} combinations in {elapsed:.2f}s")
+
+    potions = result["potions"].ravel()
+    time_below = result["time_below"].ravel()
+    min_hp = result["min_hp_pct"].ravel()
+    if args.sort == "potions":
+        order = numpy.lexsort((time_below, potions))
+    elif args.sort == "below":
+        order = numpy.lexsort((potions, time_below))
+    else:
+        order = numpy.lexsort((potions, -min_hp))
+    print(f"\n{'THRESHOLD_PCT':>13} {'POTION_COOLDOWN':>15} {'STABLE_HP_DURATION':>18} {'potions':>8} {'below (s)':>10} {'min HP':>7}")
+    for flat in order[:args.top]:
+        si, ti, ci = numpy.unravel_index(flat, result["potions"].shape)
+        marker = "  <- current" if (abs(thresholds[ti] - config.THRESHOLD_PCT) < 1e-9 and
+                                    abs(cooldowns[ci] - config.POTION_COOLDOWN) < 1e-9 and
+                                    abs(stable_durations[si] - config.STABLE_HP_DURATION) < 1e-9) else ""
+        print(f"{thresholds[ti]:>13.2f} {cooldowns[ci]:>15.2f} {stable_durations[si]:>18.1f} "
+              f"{result['potions'][si, ti, ci]:>8d} {result['time_below'][si, ti, ci]:>10.1f} "
+              f"{result['min_hp_pct'][si, ti, ci] * 100:>6.1f}%{marker}")
+
+
+if __name__ == '__main__':
+    main()
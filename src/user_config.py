@@ -1,6 +1,11 @@
-from os import path
+from os import path, stat
+from threading import Thread, Event
 import config
 from configparser import ConfigParser
+from trigger_rules import RuleError, rules_from_user_config
+import logs
+
+log = logs.get_logger("config")
 
 USER_CONFIG_FILE = "config_user.ini"
 
@@ -10,18 +15,132 @@ DEFAULTS = {
         "HOTKEY_CLOSE": config.HOTKEY_CLOSE,
         "HOTKEY_HIDE_SHOW": config.HOTKEY_HIDE_SHOW,
         "HOTKEY_LOCK_MOVE": config.HOTKEY_LOCK_MOVE,
+        "HOTKEY_DUMP_STATS": config.HOTKEY_DUMP_STATS,
     },
     "Potion": {
         "POTION_KEY": config.POTION_KEY,
         "POTION_COOLDOWN": str(config.POTION_COOLDOWN),
         "THRESHOLD_PCT": str(config.THRESHOLD_PCT),
         "STABLE_HP_DURATION": str(config.STABLE_HP_DURATION),
+        "INPUT_INJECTOR": config.INPUT_INJECTOR,
+        "MULTIBOX": str(config.MULTIBOX).lower(),
+    },
+    "Overlay": {
+        "INITIAL_POS_X": str(config.INITIAL_POS_X),
+        "INITIAL_POS_Y": str(config.INITIAL_POS_Y),
+        "OVERLAY_REFRESH_RATE": str(config.OVERLAY_REFRESH_RATE),
+        "SPARKLINE_SECONDS": str(config.SPARKLINE_SECONDS),
+        "HEADLESS": str(config.HEADLESS).lower(),
+    },
+    "Sampling": {
+        "ADAPTIVE_SAMPLING": str(config.ADAPTIVE_SAMPLING).lower(),
+        "SAMPLING_MIN_INTERVAL": str(config.SAMPLING_MIN_INTERVAL),
+        "SAMPLING_MAX_INTERVAL": str(config.SAMPLING_MAX_INTERVAL),
+        "SAMPLING_NEAR_THRESHOLD_PCT": str(config.SAMPLING_NEAR_THRESHOLD_PCT),
+        "SAMPLING_RAMP_FACTOR": str(config.SAMPLING_RAMP_FACTOR),
+        "SPLIT_SAMPLER_THREAD": str(config.SPLIT_SAMPLER_THREAD).lower(),
+    },
+    "Prediction": {
+        "PREDICTIVE_TRIGGER": str(config.PREDICTIVE_TRIGGER).lower(),
+        "PREDICTION_WINDOW": str(config.PREDICTION_WINDOW),
+        "PREDICTION_INPUT_LATENCY": str(config.PREDICTION_INPUT_LATENCY),
     },
     "Developer": {
-        "DEVELOPER_DEBUG": "false"
+        "DEVELOPER_DEBUG": "false",
+        "HP_TRACE_FILE": config.HP_TRACE_FILE,
+        "METRICS_PORT": str(config.METRICS_PORT),
     }
 }
 
+# Every known key, typed like its config.py default.
+KEYS = tuple(key for section in DEFAULTS.values() for key in section)
+
+# Checks on loaded values; a value that fails falls back to its config.py default.
+_VALIDATORS = {
+    "POTION_KEY": lambda v: bool(v.strip()),
+    "POTION_COOLDOWN": lambda v: v >= 0,
+    "THRESHOLD_PCT": lambda v: 0 < v < 1,
+    "STABLE_HP_DURATION": lambda v: v > 0,
+    "INPUT_INJECTOR": lambda v: v.lower() in ("auto", "sendinput", "keyboard"),
+    "OVERLAY_REFRESH_RATE": lambda v: v >= 0,
+    "SPARKLINE_SECONDS": lambda v: 0 <= v <= 120,
+    "SAMPLING_MIN_INTERVAL": lambda v: v > 0,
+    "SAMPLING_MAX_INTERVAL": lambda v: v > 0,
+    "SAMPLING_NEAR_THRESHOLD_PCT": lambda v: 0 <= v < 1,
+    "SAMPLING_RAMP_FACTOR": lambda v: v >= 1,
+    "PREDICTION_WINDOW": lambda v: v >= 2,
+    "PREDICTION_INPUT_LATENCY": lambda v: v >= 0,
+    "METRICS_PORT": lambda v: 0 <= v <= 65535,
+}
+
+
+# Typed, validated, read-only snapshot of config_user.ini. Every value is converted to the
+# type of its config.py default once per load, and the [Rules] lines are parsed once, so
+# readers only do attribute lookups (cfg.THRESHOLD_PCT). Dict-style access (cfg['KEY'],
+# cfg.get) still works; keys outside KEYS are kept in extra.
+class UserConfig:
+    __slots__ = KEYS + ("extra", "rules")
+
+    def __init__(self, values=None):
+        values = values or {}
+        for key in KEYS:
+            object.__setattr__(self, key, _convert(key, values.get(key)))
+        extra = {k: v for k, v in values.items() if k not in KEYS}
+        try:
+            rules = rules_from_user_config(extra)
+        except RuleError as e:
+            log.error("config_user.ini: potion rules disabled: %s", e)
+            rules = []
+        object.__setattr__(self, "extra", extra)
+        object.__setattr__(self, "rules", tuple(rules))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("UserConfig is read-only; load a new one instead.")
+
+    def __getitem__(self, key):
+        if key in KEYS:
+            return getattr(self, key)
+        return self.extra[key]
+
+    def __contains__(self, key):
+        return key in KEYS or key in self.extra
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in KEYS] + list(self.extra.items())
+
+    # Keys whose values differ from another snapshot (all keys if other is None).
+    def changed_keys(self, other):
+        if other is None:
+            return set(KEYS) | set(self.extra)
+        keys = set(KEYS) | set(self.extra) | set(other.extra)
+        return {key for key in keys if self.get(key) != other.get(key)}
+
+
+# Converts a raw value to the type of the key's config.py default, or returns the default.
+def _convert(key, raw):
+    default = getattr(config, key)
+    if raw is None:
+        return default
+    try:
+        if isinstance(default, bool):
+            value = raw if isinstance(raw, bool) else str(raw).strip().lower() in ("1", "true", "yes", "on")
+        elif isinstance(default, int):
+            value = int(float(raw))
+        elif isinstance(default, float):
+            value = float(raw)
+        else:
+            value = str(raw).strip()
+        validator = _VALIDATORS.get(key)
+        if validator is None or validator(value):
+            return value
+    except (TypeError, ValueError):
+        pass
+    log.error("config_user.ini: invalid %s = %r, using %r.", key, raw, default)
+    return default
+
 def write_default_config_ini():
     with open(USER_CONFIG_FILE, "w") as f:
         f.write("""# === User Configurations ===\n\n""")
@@ -33,7 +152,9 @@ def write_default_config_ini():
         f.write("# HOTKEY_HIDE_SHOW: Hide/show overlay\n")
         f.write(f"HOTKEY_HIDE_SHOW = {config.HOTKEY_HIDE_SHOW}\n")
         f.write("# HOTKEY_LOCK_MOVE: Lock/unlock window movement with mouse\n")
-        f.write(f"HOTKEY_LOCK_MOVE = {config.HOTKEY_LOCK_MOVE}\n\n")
+        f.write(f"HOTKEY_LOCK_MOVE = {config.HOTKEY_LOCK_MOVE}\n")
+        f.write("# HOTKEY_DUMP_STATS: Print monitoring latency histograms to the console (developer mode)\n")
+        f.write(f"HOTKEY_DUMP_STATS = {config.HOTKEY_DUMP_STATS}\n\n")
         
         f.write("[Potion]\n")
         f.write("# POTION_KEY: Key used for potion\n")
@@ -43,17 +164,60 @@ def write_default_config_ini():
         f.write("# THRESHOLD_PCT: HP percent to trigger potion\n")
         f.write(f"THRESHOLD_PCT = {config.THRESHOLD_PCT}\n")
         f.write("# STABLE_HP_DURATION: Seconds to consider HP stable\n")
-        f.write(f"STABLE_HP_DURATION = {config.STABLE_HP_DURATION}\n\n")
+        f.write(f"STABLE_HP_DURATION = {config.STABLE_HP_DURATION}\n")
+        f.write("# INPUT_INJECTOR: How the potion key is pressed: sendinput (direct, Windows), keyboard (keyboard library) or auto\n")
+        f.write(f"INPUT_INJECTOR = {config.INPUT_INJECTOR}\n")
+        f.write("# MULTIBOX: Guard every running game client, each with its own overlay row; keys go to each client's window (restart to apply)\n")
+        f.write(f"MULTIBOX = {config.MULTIBOX}\n\n")
 
         f.write("[Overlay]\n")
         f.write("# INITIAL_POS_X: Initial X position of the overlay window\n")
         f.write(f"INITIAL_POS_X = {config.INITIAL_POS_X}\n")
         f.write("# INITIAL_POS_Y: Initial Y position of the overlay window\n")
-        f.write(f"INITIAL_POS_Y = {config.INITIAL_POS_Y}\n\n")
+        f.write(f"INITIAL_POS_Y = {config.INITIAL_POS_Y}\n")
+        f.write("# OVERLAY_REFRESH_RATE: Max overlay redraws per second\n")
+        f.write(f"OVERLAY_REFRESH_RATE = {config.OVERLAY_REFRESH_RATE}\n")
+        f.write("# SPARKLINE_SECONDS: Seconds of HP history drawn against the threshold line on the overlay (0 = off, restart to apply)\n")
+        f.write(f"SPARKLINE_SECONDS = {config.SPARKLINE_SECONDS}\n")
+        f.write("# HEADLESS: Run without the overlay; status and potion log go to the console (same as --headless)\n")
+        f.write(f"HEADLESS = {config.HEADLESS}\n\n")
+
+        f.write("[Sampling]\n")
+        f.write("# ADAPTIVE_SAMPLING: Sample faster while HP falls or is near the threshold, slower while HP is full\n")
+        f.write(f"ADAPTIVE_SAMPLING = {config.ADAPTIVE_SAMPLING}\n")
+        f.write("# SAMPLING_MIN_INTERVAL: Seconds between samples while HP falls or is near the threshold\n")
+        f.write(f"SAMPLING_MIN_INTERVAL = {config.SAMPLING_MIN_INTERVAL}\n")
+        f.write("# SAMPLING_MAX_INTERVAL: Seconds between samples while HP sits at max\n")
+        f.write(f"SAMPLING_MAX_INTERVAL = {config.SAMPLING_MAX_INTERVAL}\n")
+        f.write("# SAMPLING_NEAR_THRESHOLD_PCT: Max HP fraction above the threshold that counts as near it\n")
+        f.write(f"SAMPLING_NEAR_THRESHOLD_PCT = {config.SAMPLING_NEAR_THRESHOLD_PCT}\n")
+        f.write("# SAMPLING_RAMP_FACTOR: Period multiplier per calm sample when relaxing back to the slow period\n")
+        f.write(f"SAMPLING_RAMP_FACTOR = {config.SAMPLING_RAMP_FACTOR}\n")
+        f.write("# SPLIT_SAMPLER_THREAD: Read HP and press the potion key on a dedicated thread, so pointer checks and overlay updates never delay a potion\n")
+        f.write(f"SPLIT_SAMPLER_THREAD = {config.SPLIT_SAMPLER_THREAD}\n\n")
+
+        f.write("[Prediction]\n")
+        f.write("# PREDICTIVE_TRIGGER: Also use a potion when HP is projected to cross the threshold before the next sample lands\n")
+        f.write(f"PREDICTIVE_TRIGGER = {config.PREDICTIVE_TRIGGER}\n")
+        f.write("# PREDICTION_WINDOW: Number of recent HP samples used to estimate how fast HP is falling\n")
+        f.write(f"PREDICTION_WINDOW = {config.PREDICTION_WINDOW}\n")
+        f.write("# PREDICTION_INPUT_LATENCY: Seconds between key press and the potion taking effect\n")
+        f.write(f"PREDICTION_INPUT_LATENCY = {config.PREDICTION_INPUT_LATENCY}\n\n")
+
+        f.write("[Rules]\n")
+        f.write("# Extra potion rules, checked on every HP sample after the main THRESHOLD_PCT rule:\n")
+        f.write("# RULE_<n> = <field> <comparator> <value>[%] <key> <cooldown seconds>\n")
+        f.write("# field: hp, or a STAT_BLOCK_FIELDS name from config.py; comparator: < <= > >=; % = percent of max HP (hp only)\n")
+        f.write("# RULE_1 = hp < 30% 2 0.5\n")
+        f.write("# RULE_2 = mana < 40 3 1.0\n\n")
 
         f.write("[Developer]\n")
         f.write("# DEVELOPER_DEBUG: Enable/disable developer debug mode\n")
-        f.write(f"DEVELOPER_DEBUG = {config.DEVELOPER_DEBUG}\n\n")
+        f.write(f"DEVELOPER_DEBUG = {config.DEVELOPER_DEBUG}\n")
+        f.write("# HP_TRACE_FILE: Binary file to record every HP sample to, e.g. hp_trace.bin (empty = off)\n")
+        f.write(f"HP_TRACE_FILE = {config.HP_TRACE_FILE}\n")
+        f.write("# METRICS_PORT: Serve OpenMetrics at http://127.0.0.1:<port>/metrics (0 = off, restart to apply)\n")
+        f.write(f"METRICS_PORT = {config.METRICS_PORT}\n\n")
 
 def ensure_user_config_exists():
     if not path.exists(USER_CONFIG_FILE):
@@ -64,23 +228,54 @@ def ensure_user_config_exists():
 
 user_cfg = None
 
-def load_user_config():
+def load_user_config(file_path=None):
     global user_cfg
-    ensure_user_config_exists()
+    if file_path is None:
+        ensure_user_config_exists()
+        file_path = USER_CONFIG_FILE
     parser = ConfigParser()
     parser.optionxform = str
-    parser.read(USER_CONFIG_FILE)
-    user_cfg_local = {}
+    parser.read(file_path)
+    values = {}
     for section in parser.sections():
-        for k, v in parser[section].items():
-            if k == "DEVELOPER_DEBUG":
-                user_cfg_local[k] = v.lower() in ("1", "true", "yes", "on")
-            else:
-                try:
-                    user_cfg_local[k] = float(v) if "." in v or "e" in v.lower() else int(v)
-                except Exception:
-                    user_cfg_local[k] = v
+        values.update(parser[section].items())
     print("--------------------------------------------------------")
-    print("'config_user.ini' was loaded.")
-    user_cfg = user_cfg_local
-    return user_cfg 
\ No newline at end of file
+    print(f"'{path.basename(file_path)}' was loaded.")
+    user_cfg = UserConfig(values)
+    return user_cfg
+
+
+# Watches config_user.ini through its modification time and calls on_change with the
+# reloaded UserConfig after every change. One stat() call per poll.
+class ConfigWatcher(Thread):
+    def __init__(self, on_change, file_path=USER_CONFIG_FILE, interval=None):
+        super().__init__(name="ConfigWatcher", daemon=True)
+        self.on_change = on_change
+        self.file_path = file_path
+        self.interval = config.CONFIG_RELOAD_INTERVAL if interval is None else interval
+        self.reloads = 0
+        self._stop_event = Event()
+        self._mtime_ns = self._read_mtime()
+
+    def _read_mtime(self):
+        try:
+            return stat(self.file_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            mtime_ns = self._read_mtime()
+            if mtime_ns is None or mtime_ns == self._mtime_ns:
+                continue
+            self._mtime_ns = mtime_ns
+            try:
+                cfg = load_user_config(self.file_path)
+            except Exception as e:
+                log.error("Could not reload '%s': %.100s", self.file_path, e)
+                continue
+            self.reloads += 1
+            self.on_change(cfg)
+
+    def stop(self):
+        self._stop_event.set() 
\ No newline at end of file
@@ -1,24 +1,40 @@
-from threading import Thread, Lock
-from time import time, sleep
+from math import isfinite
+from threading import Thread, Lock, Event
+from time import time, sleep, monotonic, perf_counter, perf_counter_ns
  
-from keyboard import send
-from pymem import Pymem
-from pymem.exception import PymemError
-from pymem.process import module_from_name
  
 import game_memory
+import logs
+from memory_backend import MemoryBackendError, PymemBackend
+from sampling import AdaptiveSampler, DeadlineScheduler, SamplingStats
+from prediction import HpTrendPredictor
+from display_channel import DisplayChannel
+from instrumentation import LatencyInstrumentation, lap
+from hp_trace import HpTraceRecorder
+from input_injector import create_injector
+from process_watcher import ProcessWatcher
+from sampler import HpSampler, SamplerTarget
+from stat_block import StatBlockLayout, StatBlockReader
+from trigger_rules import RuleEngine, RuleError
 import config
-from user_config import user_cfg
+from user_config import KEYS, UserConfig
+ 
+log = logs.get_logger("worker")
+# Repeats on every retry while the game loads.
+_SEARCHING = logs.rate_limited("searching for HP address")
  
 # Worker thread for automated potion triggering based on in-game HP.
 class AutoPotionWorker(Thread):
     _ADDRESS_CHECK_INTERVAL = 2.0
-    _DISABLED_STATE_PAUSE = 0.1
     _ERROR_RECOVERY_PAUSE = 0.5
+    # Upper bound for a single blocking wait, in case the enabled flag is flipped without calling wake().
+    _MAX_BLOCKING_WAIT = 1.0
+    # Period of the housekeeping loop while a separate sampler thread reads HP.
+    _HOUSEKEEPING_INTERVAL = 0.05
  
     # Initializes worker state and GUI connections.
-    def __init__(self, status_text_var, status_color_var, enabled_flag, add_potion_log_callback=None, gui=None, user_cfg=None):
-        super().__init__()
+    def __init__(self, status_text_var, status_color_var, enabled_flag, add_potion_log_callback=None, gui=None, user_cfg=None, memory_backend=None, focus_tracker_factory=None, input_injector=None, rule_engine=None, injector_factory=None):
+        super().__init__(name="Worker")
  
         # Thread control flags.
         self._running = True
@@ -27,31 +43,54 @@ class AutoPotionWorker(Thread):
         # Active logic state flag.
         self._is_active_logic_running = False
  
-        # Pymem object and game memory details.
-        self._pm = None
+        # Memory backend, attached process and game memory details.
+        self._memory_backend = memory_backend if memory_backend is not None else PymemBackend()
+        self._process = None
+        self._pointer_resolver = None
+        # Foreground tracking for the attached process; the factory takes the process.
+        self._focus_tracker_factory = focus_tracker_factory
+        self._focus_tracker = None
+        # Process watcher while waiting for the game; launch time of the attached process
+        # until its first HP sample, and the last "game start -> first HP sample" latency.
+        self._process_watcher = None
+        self._process_launched_at = None
+        self.start_to_first_sample = None
         self._hp_final_addr = None
         self._max_hp = None
         self._threshold = None
         self._alerted = False
         self._is_paused_by_window = False
+        # Time paused by focus over the worker's lifetime, plus the current pause.
+        self.paused_seconds = 0.0
+        self._paused_since = None
+        # Monitoring loop phase shown by the metrics endpoint: off, attaching, resolving, monitoring.
+        self.phase = "off"
  
         # Variables for stable HP detection (used for Max HP).
         self._last_read_hp = None
         self._stable_hp_timestamp = None
  
-        # Configurable stable HP durations.
+        # Configurable stable HP durations (the required one comes from the user config).
         self._quick_stable_hp_duration = getattr(config, 'QUICK_STABLE_HP_DURATION', 1.0)
-        self._stable_hp_required_duration = getattr(config, 'STABLE_HP_DURATION', 5.0)
+        self._stable_hp_required_duration = config.STABLE_HP_DURATION
  
         # Reset mechanism.
         self._reset_requested = False
         self._lock = Lock()
  
+        # Set on toggle, reset and shutdown so blocking waits return at once.
+        self._wake_event = Event()
+        self._wakeup_count = 0
+        self._wakeup_window_count = 0
+        self._wakeup_window_start = monotonic()
+ 
         # GUI update variables.
         self.status_text_var = status_text_var
         self.status_color_var = status_color_var
         self.enabled_flag = enabled_flag
         self.gui = gui
+        # Change-only overlay snapshots (GUI mode).
+        self._display = DisplayChannel(gui.snapshot_signal.emit) if gui is not None else None
  
         # Log callback.
         self.add_potion_log_callback = add_potion_log_callback
@@ -59,16 +98,133 @@ class AutoPotionWorker(Thread):
         # Initial status update.
         self._update_status("Auto Potion: OFF", config.COLOR_OFF)
  
-        self.user_cfg = user_cfg
         self._last_potion_time = config.LAST_POTION_TIME_INIT
+        self.sampling_stats = SamplingStats()
+        # Sample deadlines of the monitoring loop (or of the sampler thread in split mode).
+        self.scheduler = DeadlineScheduler()
+        self.predicted_potions = 0
+        self.potions_used = 0
+        # Keys pressed by the [Rules] engine over the worker's lifetime (engines are replaced on reload).
+        self.rule_keys_sent = 0
+        # Pointer resolver counters of the previous processes (re-resolutions, failovers, failures).
+        self._retired_pointer_counts = (0, 0, 0)
+        # Sampler thread of the split mode (SPLIT_SAMPLER_THREAD) while a monitoring cycle runs.
+        self._sampler = None
+
+        # Optional stat block read around the HP value (HP, max HP and more in one read).
+        self._stat_layout = StatBlockLayout.from_config()
+        self._stat_reader = None
+        self.stat_values = None
+
+        # An injector or rule engine passed in is kept across config reloads. Otherwise the
+        # injectors come from injector_factory(key, INPUT_INJECTOR) (multibox: the client's window).
+        self._fixed_injector = input_injector
+        self._fixed_rule_engine = rule_engine
+        self._injector_factory = injector_factory or create_injector
+        self._input_injector = None
+        self._adaptive_sampler = None
+        self._predictor = None
+        self._rules = None
+        self._rules_max_hp = None
+        # Sample values for the rules when there is no stat block (HP only).
+        self._hp_values = [0.0]
+        self._latency = None
+        self._sample_read_ns = 0
+
+        # User config snapshot. A reloaded one waits in _pending_user_cfg and is swapped in
+        # between monitoring cycles, never in the middle of a tick.
+        self.user_cfg = None
+        self._pending_user_cfg = None
+        self._apply_user_config(user_cfg if isinstance(user_cfg, UserConfig) else UserConfig(user_cfg))
 
-        self._potion_cooldown = self.user_cfg['POTION_COOLDOWN'] if self.user_cfg else config.POTION_COOLDOWN
+        # Optional binary recording of every HP sample (opened when the thread starts).
+        self._trace_file = self.user_cfg.HP_TRACE_FILE
+        self._trace_recorder = None
         self._process_found_printed = False  # to print only once
  
+    # Derives the potion, sampling, prediction and rule settings from a user config snapshot,
+    # rebuilding only what changed. Runs in __init__ and on the worker thread for reloads.
+    def _apply_user_config(self, cfg):
+        changed = cfg.changed_keys(self.user_cfg)
+        self.user_cfg = cfg
+        self._potion_cooldown = cfg.POTION_COOLDOWN
+        self._stable_hp_required_duration = cfg.STABLE_HP_DURATION
+        self._split_sampler = cfg.SPLIT_SAMPLER_THREAD
+        if self._max_hp is not None:
+            self._threshold = self._max_hp * cfg.THRESHOLD_PCT
+
+        # Presses the potion key and times every press from decision to key sent.
+        if self._fixed_injector is not None:
+            self._input_injector = self._fixed_injector
+        elif changed & {'POTION_KEY', 'INPUT_INJECTOR'}:
+            self._input_injector = self._injector_factory(cfg.POTION_KEY, cfg.INPUT_INJECTOR)
+
+        # HP sampling: fixed config.INTERVAL unless adaptive sampling is enabled.
+        if changed & {'ADAPTIVE_SAMPLING', 'SAMPLING_MIN_INTERVAL', 'SAMPLING_MAX_INTERVAL',
+                      'SAMPLING_NEAR_THRESHOLD_PCT', 'SAMPLING_RAMP_FACTOR'}:
+            self._adaptive_sampler = AdaptiveSampler.from_user_config(cfg) if cfg.ADAPTIVE_SAMPLING else None
+
+        # Optional predictive trigger: fires when HP is projected to cross the threshold within the loop + input latency.
+        if changed & {'PREDICTIVE_TRIGGER', 'PREDICTION_WINDOW', 'PREDICTION_INPUT_LATENCY'}:
+            self._predictor = HpTrendPredictor(cfg.PREDICTION_WINDOW, cfg.PREDICTION_INPUT_LATENCY) if cfg.PREDICTIVE_TRIGGER else None
+
+        # Extra potion rules from the [Rules] section, evaluated after the main threshold rule.
+        if self._fixed_rule_engine is not None:
+            self._rules = self._fixed_rule_engine
+        elif 'INPUT_INJECTOR' in changed or any(key not in KEYS for key in changed):
+            try:
+                field_index = self._stat_layout.index if self._stat_layout is not None else {"hp": 0}
+                self._rules = RuleEngine(cfg.rules, field_index, lambda key: self._injector_factory(key, cfg.INPUT_INJECTOR)) if cfg.rules else None
+            except RuleError as e:
+                log.error("Potion rules disabled: %s", e)
+                self._rules = None
+            self._rules_max_hp = None
+
+        # Per-stage latency histograms, only collected in developer mode.
+        if not cfg.DEVELOPER_DEBUG:
+            self._latency = None
+        elif self._latency is None:
+            self._latency = LatencyInstrumentation()
+        logs.set_debug(cfg.DEVELOPER_DEBUG)
+
+    # Hands a reloaded user config to the worker. Thread-safe.
+    def apply_user_config(self, cfg):
+        with self._lock:
+            self._pending_user_cfg = cfg
+        self.wake()
+
+    # Swaps in a pending user config (worker thread, between monitoring cycles).
+    def _swap_pending_user_config(self):
+        with self._lock:
+            cfg, self._pending_user_cfg = self._pending_user_cfg, None
+        changed = cfg.changed_keys(self.user_cfg)
+        self._apply_user_config(cfg)
+        log.info("User config reloaded (%s).", ", ".join(sorted(changed)) or "no changes")
+
     # Requests a state reset. Thread-safe.
     def request_reset(self):
         with self._lock:
             self._reset_requested = True
+        self.wake()
+ 
+    # Wakes the worker from a blocking wait so it re-checks its state. Thread-safe.
+    def wake(self):
+        self._wake_event.set()
+ 
+    # Returns the average wakeups per second since the previous call.
+    def wakeups_per_second(self):
+        now = monotonic()
+        count = self._wakeup_count
+        elapsed = now - self._wakeup_window_start
+        rate = (count - self._wakeup_window_count) / elapsed if elapsed > 0 else 0.0
+        self._wakeup_window_count = count
+        self._wakeup_window_start = now
+        return rate
+ 
+    # Blocks until wake() is called or the timeout expires.
+    def _block(self, timeout):
+        self._wake_event.wait(min(timeout, self._MAX_BLOCKING_WAIT))
+        self._wakeup_count += 1
  
     # Checks for and performs a state reset.
     def _check_and_perform_reset(self):
@@ -87,7 +243,7 @@ class AutoPotionWorker(Thread):
             return
         try:
             if self.gui is not None:
-                self.gui.status_signal.emit(text, color_key)
+                self._display.update_status(text, color_key)
             else:
                 self.status_text_var.set(text)
                 self.status_color_var.set(color_key)
@@ -113,41 +269,77 @@ class AutoPotionWorker(Thread):
     def _signal_gui_error_shutdown(self):
         self._shutting_down = True
         self._running = False
- 
-    # Waits for a duration, checking for stop signals, resets, or disabled state.
-    def _wait_with_checks(self, duration_seconds):
-        start_time_wait = time()
-        while time() - start_time_wait < duration_seconds:
+        self.wake()
+ 
+    # Waits for a duration, checking for stop signals, resets, disabled state or a pending
+    # user config. Blocks on the wake event and re-checks only when woken or at the
+    # deadline; returns True early once until() does.
+    def _wait_with_checks(self, duration_seconds, until=None):
+        deadline = monotonic() + duration_seconds
+        while True:
+            self._wake_event.clear()
             if not self._running or self._shutting_down: return False
             if self._check_and_perform_reset(): return False
-            if not self._get_is_enabled(): return False
-            sleep(0.01)
+            if not self._get_is_enabled() or self._pending_user_cfg is not None: return False
+            if until is not None and until(): return True
+            remaining = deadline - monotonic()
+            if remaining <= 0: return True
+            self._block(remaining)
+ 
+    # Like _wait_with_checks, but until a perf_counter deadline: blocks until the scheduler's
+    # spin margin before it and busy-waits the rest so the next tick starts on time.
+    def _wait_until(self, deadline):
+        spin = self.scheduler.spin
+        while True:
+            self._wake_event.clear()
+            if not self._running or self._shutting_down: return False
+            if self._check_and_perform_reset(): return False
+            if not self._get_is_enabled() or self._pending_user_cfg is not None: return False
+            remaining = deadline - perf_counter() - spin
+            if remaining <= 0: break
+            self._block(remaining)
+        self.scheduler.spin_until(deadline)
         return True
  
     # Resets core state variables for re-initialization or error recovery.
     def _reset_core_state_variables(self):
-        self._pm = None
+        self._stop_sampler()
+        self._stop_process_watcher()
+        self._detach_process()
         self._hp_final_addr = None
         self._max_hp = None
         self._threshold = None
         self._alerted = False
-        self._is_paused_by_window = False
+        self._set_paused_by_window(False)
         self._last_read_hp = None
         self._stable_hp_timestamp = None
+        self.stat_values = None
+        if self._adaptive_sampler is not None:
+            self._adaptive_sampler.reset()
+        if self._predictor is not None:
+            self._predictor.reset()
+ 
+    # Drops the attached process and stops its focus tracker.
+    def _detach_process(self):
+        if self._focus_tracker is not None:
+            self._focus_tracker.stop()
+            self._focus_tracker = None
+        self._process = None
+        self._process_launched_at = None
  
     # Handles the state when the worker is disabled.
     def _handle_disabled_state(self):
         if self._is_active_logic_running:
             if not self._shutting_down:
                 if self.gui is not None:
-                    self.gui.set_status("OFF", config.COLOR_OFF)
-                    self.gui.set_hp(None, None)
-                    self.gui.set_threshold(None)
+                    self._display.clear("OFF", config.COLOR_OFF)
                 else:
                     self._update_status("Auto Potion: OFF", config.COLOR_OFF)
             self._is_active_logic_running = False
             self._reset_core_state_variables()
-        sleep(self._DISABLED_STATE_PAUSE)
+        self._wake_event.clear()
+        if self._get_is_enabled() or not self._running: return
+        self._block(self._MAX_BLOCKING_WAIT)
  
     # Initializes state for active logic (process attachment, memory scanning).
     def _initialize_for_active_logic(self):
@@ -157,51 +349,105 @@ class AutoPotionWorker(Thread):
             self._is_active_logic_running = True
             self._reset_core_state_variables()
  
-    # Attempts to attach to the target game process using Pymem.
+    # Attempts to attach to the target game process through the memory backend. Waits on
+    # the process watcher, which wakes the worker as soon as the game starts; after a whole
+    # WAIT_INTERVAL_PROCESS without news from it, also tries to attach by name.
     def _try_attach_process(self):
-        if self._pm is not None: return True
+        if self._process is not None: return True
  
+        watcher = self._start_process_watcher()
+        by_name = watcher is None
         while self._should_continue_attempting_connection():
+            found = watcher.found if watcher is not None else 0
             try:
-                self._pm = Pymem(config.PROCESS_NAME)
+                if by_name:
+                    self._process = self._memory_backend.attach(config.PROCESS_NAME)
+                    self._process_launched_at = None
+                else:
+                    self._attach_watched_process(watcher)
+                self._stop_process_watcher()
+                self._start_focus_tracker()
                 if not self._shutting_down:
                     if not self._process_found_printed:
-                        print(f"[DEBUG] Game process '{config.PROCESS_NAME}' found!")
+                        log.info("Game process '%s' found!", config.PROCESS_NAME)
                         self._process_found_printed = True
                     self._update_active_status(f"Process found.", config.COLOR_WAITING)
                 return True
-            except PymemError:
+            except MemoryBackendError:
                 if not self._shutting_down:
                     self._update_active_status(f"Waiting for process...", config.COLOR_WAITING)
             except Exception as e:
                 if not self._shutting_down:
-                    print(f"[ERROR] Error during process search: {str(e)[:100]}")
-                self._pm = None
+                    log.error("Error during process search: %.100s", e)
+                self._detach_process()
  
-            if not self._wait_with_checks(config.WAIT_INTERVAL_PROCESS): return False
+            until = (lambda: watcher.found != found) if watcher is not None else None
+            if not self._wait_with_checks(config.WAIT_INTERVAL_PROCESS, until): return False
+            by_name = watcher is None or watcher.found == found
         return False
  
+    # Attaches to one of the watched processes; raises MemoryBackendError if none can be.
+    def _attach_watched_process(self, watcher):
+        matches = watcher.matches
+        error = MemoryBackendError(f"Process '{config.PROCESS_NAME}' not found.")
+        for pid, launched_at in matches.items():
+            try:
+                self._process = self._memory_backend.attach(config.PROCESS_NAME, pid)
+            except MemoryBackendError as e:
+                error = e
+                continue
+            self._process_launched_at = launched_at
+            return
+        raise error
+ 
+    # Starts the process watcher; None (attach by name every WAIT_INTERVAL_PROCESS) if the
+    # backend has no process table here.
+    def _start_process_watcher(self):
+        if self._process_watcher is None:
+            try:
+                watcher = ProcessWatcher(self._memory_backend.process_table(), config.PROCESS_NAME, self.wake)
+                watcher.start()
+            except Exception as e:
+                if not self._shutting_down:
+                    log.error("Process watcher unavailable: %.100s", e)
+                return None
+            self._process_watcher = watcher
+        return self._process_watcher
+ 
+    def _stop_process_watcher(self):
+        if self._process_watcher is not None:
+            self._process_watcher.stop()
+            self._process_watcher = None
+ 
+    # Starts tracking the foreground state of the attached process's window.
+    def _start_focus_tracker(self):
+        if self._focus_tracker_factory is not None:
+            self._focus_tracker = self._focus_tracker_factory(self._process)
+        else:
+            self._focus_tracker = self._process.create_focus_tracker(config.WINDOW_TITLE)
+        self._focus_tracker.start(self.wake)
+ 
     # Attempts to find the HP memory address.
     def _try_find_hp_address(self):
         if self._hp_final_addr is not None and self._max_hp is not None: return True
  
-        while self._should_continue_attempting_connection() and self._pm is not None:
-            print("[DEBUG] Searching for HP address...")
+        while self._should_continue_attempting_connection() and self._process is not None:
+            log.info("Searching for HP address...", extra=_SEARCHING)
  
             try:
-                current_hp_addr = game_memory.get_hp_address(self._pm)
+                current_hp_addr = self._get_pointer_resolver().resolve()
                 if current_hp_addr is None:
                     if not self._handle_address_not_found_during_search(): return False
                     continue
  
                 self._hp_final_addr = current_hp_addr
-                print(f"[DEBUG] HP address found: 0x{self._hp_final_addr:X}")
+                log.info("HP address found: 0x%X", self._hp_final_addr)
                 # Performs initial HP read to set max HP and threshold.
                 self._perform_initial_hp_read_and_setup()
                 return True
             except Exception as e:
                 # Handles errors during address search.
-                print(f"[ERROR] Error during address search: {str(e)[:100]}")
+                log.error("Error during address search: %.100s", e)
                 self._reset_core_state_variables()
                 self._is_active_logic_running = False
                 return False
@@ -210,77 +456,180 @@ class AutoPotionWorker(Thread):
     # Handles scenario when HP address is not found during search.
     def _handle_address_not_found_during_search(self):
         try:
-            module_from_name(self._pm.process_handle, config.MODULE_NAME)
-        except PymemError:
-            print("[DEBUG] Process lost during address search.")
-            self._pm = None
+            module_base = self._process.module_base(config.MODULE_NAME)
+        except MemoryBackendError:
+            log.info("Process lost during address search.")
+            self._detach_process()
             return False
         except Exception as e_proc_check:
-            print(f"[ERROR] Error during process check: {str(e_proc_check)[:100]}")
-            self._pm = None
+            log.error("Error during process check: %.100s", e_proc_check)
+            self._detach_process()
             return False
  
+        # Right after the game starts, look again as soon as its module is loaded.
+        if module_base is None:
+            return self._wait_with_checks(config.MODULE_LOAD_POLL_INTERVAL)
         return self._wait_with_checks(config.WAIT_INTERVAL_MEMORY)
  
     # Performs initial HP read to set max HP and threshold.
     def _perform_initial_hp_read_and_setup(self):
         try:
-            initial_hp = self._pm.read_float(self._hp_final_addr)
+            initial_hp = self._read_hp_sample(self._hp_final_addr)
             if initial_hp > 0:
-                self._max_hp = initial_hp
-                self._threshold = self._max_hp * (self.user_cfg['THRESHOLD_PCT'] if self.user_cfg else config.THRESHOLD_PCT)
+                self._max_hp = self._block_max_hp() or initial_hp
+                self._threshold = self._max_hp * self.user_cfg.THRESHOLD_PCT
                 self._last_read_hp = None
                 self._stable_hp_timestamp = None
                 self._alerted = False
                 status_text = f"HP: {self._max_hp:.0f} / {self._max_hp:.0f} (100.0%) | Thresh: {self._threshold:.0f}"
                 self._update_active_status(status_text, config.COLOR_ON)
+                self._record_start_to_first_sample()
             else:
-                print("[DEBUG] HP address found. Waiting for positive HP value...")
+                log.info("HP address found. Waiting for positive HP value...")
         except Exception as read_err:
-            print(f"[ERROR] HP address found. Error reading initial HP: {str(read_err)[:100]}")
+            log.error("HP address found. Error reading initial HP: %.100s", read_err)
+ 
+    # Records the time from the game's launch to this first HP sample, for a game started
+    # while the process watcher was running.
+    def _record_start_to_first_sample(self):
+        if self._process_launched_at is None: return
+        self.start_to_first_sample = time() - self._process_launched_at
+        self._process_launched_at = None
+        log.info("Game start to first HP sample: %.0f ms", self.start_to_first_sample * 1000)
  
     # Handles exceptions during address search.
     def _handle_address_search_exception(self, e):
-        print(f"[ERROR] Error during address search: {str(e)[:100]}")
+        log.error("Error during address search: %.100s", e)
         self._reset_core_state_variables()
         self._is_active_logic_running = False
  
     # Main loop for monitoring HP and triggering potions.
     def _perform_hp_monitoring_cycle(self):
         last_addr_check_time = 0.0
+        self._print_sampling_stats()
+        self.sampling_stats.reset()
+        self.scheduler.reset()
+        latency = self._latency
+        recorder = self._trace_recorder
+        if recorder is not None: recorder.flush()
+        scheduler = self.scheduler
  
         while self._should_continue_monitoring():
             if not self._get_is_enabled(): return False
             if self._check_and_perform_reset(): return False
  
             try:
+                scheduler.begin_tick()
+                if latency is not None: tick_start_ns = t_ns = perf_counter_ns()
                 # Periodically re-checks HP pointer address.
                 last_addr_check_time = self._reresolve_hp_pointer_if_needed(last_addr_check_time)
+                if latency is not None: t_ns = lap(latency.pointer_check, t_ns)
                 # Checks if game is focused and pauses logic if not.
                 if not self._is_game_focused_and_handle_pause():
+                    scheduler.rearm()
                     continue
+                if latency is not None: t_ns = lap(latency.focus_check, t_ns)
  
                 # Reads current HP from memory.
                 current_hp = self._read_current_hp_value()
+                if latency is not None: t_ns = self._sample_read_ns = lap(latency.hp_read, t_ns)
                 # Updates max HP logic based on stable HP.
                 self._update_max_hp_logic(current_hp)
+                if latency is not None: t_ns = lap(latency.max_hp_logic, t_ns)
                 # Updates GUI status.
                 self._update_hp_status_display(current_hp)
+                if latency is not None: lap(latency.gui_update, t_ns)
                 # Checks threshold and triggers potion if needed.
-                self._apply_auto_potion_logic(current_hp)
+                potion_fired = self._apply_auto_potion_logic(current_hp)
+                if recorder is not None:
+                    recorder.record(monotonic(), current_hp, self._max_hp, self._threshold, potion_fired)
+                # Picks the delay before the next sample.
+                interval = self._next_sample_interval(current_hp)
+                if latency is not None: lap(latency.tick, tick_start_ns)
  
             except Exception as e:
                 # Handles errors during monitoring.
                 self._handle_monitoring_error(e)
                 return False
  
-            if not self._wait_with_checks(config.INTERVAL): return False
+            if not self._wait_until(scheduler.schedule(interval)): return False
         return False
  
+    # Housekeeping loop of the split mode: an HpSampler thread reads HP, decides and presses
+    # the key while this thread re-resolves the pointer, tracks focus, learns max HP and
+    # updates the overlay from the sampler's latest sample.
+    def _perform_split_monitoring_cycle(self):
+        last_addr_check_time = 0.0
+        last_seq = 0
+        self._print_sampling_stats()
+        self.sampling_stats.reset()
+        self.scheduler.reset()
+        latency = self._latency
+        if self._trace_recorder is not None: self._trace_recorder.flush()
+
+        sampler = self._sampler = HpSampler(self)
+        self._publish_sampler_target(self._focus_tracker.is_foreground)
+        sampler.start()
+        try:
+            while self._should_continue_monitoring():
+                if not self._get_is_enabled(): return False
+                if self._check_and_perform_reset(): return False
+
+                try:
+                    if sampler.error is not None: raise sampler.error
+                    if latency is not None: t_ns = perf_counter_ns()
+                    last_addr_check_time = self._reresolve_hp_pointer_if_needed(last_addr_check_time)
+                    if latency is not None: t_ns = lap(latency.pointer_check, t_ns)
+                    self._publish_sampler_target(self._focus_tracker.is_foreground)
+                    if not self._is_game_focused_and_handle_pause():
+                        continue
+                    if latency is not None: t_ns = lap(latency.focus_check, t_ns)
+
+                    sample = sampler.latest
+                    if sample is not None and sample.seq != last_seq:
+                        last_seq = sample.seq
+                        if sample.hp is None:
+                            # The sampler waits for a new target after a failed read.
+                            if sample.hp_addr == self._hp_final_addr:
+                                self._fail_over_hp_address()
+                            self._publish_sampler_target(True, force=True)
+                        else:
+                            self.stat_values = sample.values
+                            self._update_max_hp_logic(sample.hp, now=sample.timestamp)
+                            self._publish_sampler_target(True)
+                            if latency is not None: t_ns = lap(latency.max_hp_logic, t_ns)
+                            self._update_hp_status_display(sample.hp)
+                            if latency is not None: lap(latency.gui_update, t_ns)
+                    while sampler.potion_events:
+                        self._log_potion_use(*sampler.potion_events.popleft())
+                except Exception as e:
+                    self._handle_monitoring_error(e)
+                    return False
+
+                if not self._wait_with_checks(self._HOUSEKEEPING_INTERVAL): return False
+            return False
+        finally:
+            self._stop_sampler()
+
+    # Stops the sampler thread (split mode) and takes back the sampling state it owned.
+    def _stop_sampler(self):
+        sampler = self._sampler
+        if sampler is not None:
+            sampler.stop()
+            sampler.join()
+            self._sampler = None
+
+    # Hands the current address and limits to the sampler thread if any of them changed.
+    def _publish_sampler_target(self, active, force=False):
+        sampler = self._sampler
+        target = sampler.target
+        if force or target is None or not target.same_as(self._process, self._hp_final_addr, self._max_hp, self._threshold, active):
+            sampler.publish(SamplerTarget(self._process, self._hp_final_addr, self._max_hp, self._threshold, active))
+
     # Check conditions to continue HP monitoring loop.
     def _should_continue_monitoring(self):
-        return (self._running and not self._shutting_down and
-                self._pm is not None and self._hp_final_addr is not None)
+        return (self._running and not self._shutting_down and self._pending_user_cfg is None and
+                self._process is not None and self._hp_final_addr is not None)
  
     # Check conditions to continue attempting process/address connection.
     def _should_continue_attempting_connection(self):
@@ -291,49 +640,177 @@ class AutoPotionWorker(Thread):
     def _reresolve_hp_pointer_if_needed(self, last_check_time):
         current_time_val = time()
         if current_time_val - last_check_time > self._ADDRESS_CHECK_INTERVAL:
-            new_addr = game_memory.get_hp_address(self._pm)
-            if new_addr is None: self.debug_print("Periodic pointer re-resolution: new_addr is None.")
+            new_addr = self._get_pointer_resolver().revalidate()
+            if new_addr is None:
+                log.debug("Periodic pointer re-resolution: new_addr is None.")
+                raise MemoryBackendError("HP pointer chain could not be re-resolved.")
             if new_addr != self._hp_final_addr:
-                print(f"[DEBUG] HP address changed: 0x{self._hp_final_addr:X} -> 0x{new_addr:X}")
+                log.info("HP address changed: 0x%X -> 0x%X", self._hp_final_addr, new_addr)
                 self._hp_final_addr = new_addr
             return current_time_val
         return last_check_time
  
+    # Returns the pointer-chain resolver bound to the attached process.
+    def _get_pointer_resolver(self):
+        if self._pointer_resolver is None or self._pointer_resolver.process is not self._process:
+            self._print_pointer_resolver_stats()
+            retired = self.pointer_counts()
+            self._pointer_resolver = game_memory.MultiChainResolver(self._process)
+            self._retired_pointer_counts = retired
+        return self._pointer_resolver
+ 
+    # Pointer re-resolutions, failovers and failed resolves over the worker's lifetime.
+    # Safe to call from any thread.
+    def pointer_counts(self):
+        re_resolutions, failovers, failures = self._retired_pointer_counts
+        resolver = self._pointer_resolver
+        if resolver is not None:
+            re_resolutions += resolver.revalidations + resolver.invalidations
+            failovers += resolver.failovers
+            failures += resolver.failures
+        return re_resolutions, failovers, failures
+ 
+    # Prints pointer resolution counters of the finished process session.
+    def _print_pointer_resolver_stats(self):
+        if self._pointer_resolver is not None:
+            stats = self._pointer_resolver.stats()
+            log.debug("Pointer resolver: %d full resolves, %d revalidations, %d invalidations, %d failovers",
+                      stats['full_resolves'], stats['revalidations'], stats['invalidations'], stats['failovers'])
+            for i, (successes, failures) in enumerate(stats['chains']):
+                log.debug("  chain #%d: %d ok, %d failed", i + 1, successes, failures)
+ 
     # Checks game window focus and pauses logic if not focused.
     def _is_game_focused_and_handle_pause(self):
-        if not game_memory.is_target_window_foreground():
+        if not self._focus_tracker.is_foreground:
             if not self._is_paused_by_window:
-                self._is_paused_by_window = True
+                self._set_paused_by_window(True)
                 self._last_read_hp = None
                 self._stable_hp_timestamp = None
+                # In split mode the sampler resets its predictor when it sees the pause.
+                if self._predictor is not None and self._sampler is None:
+                    self._predictor.reset()
                 if not self._shutting_down:
                     if self.gui is not None:
-                        self.gui.set_status("PAUSED", config.COLOR_PAUSED)
+                        self._display.update_status("PAUSED", config.COLOR_PAUSED)
                     else:
                         self._update_active_status("PAUSED (Game not focused)", config.COLOR_PAUSED)
-            self._wait_with_checks(config.INTERVAL)
+            # Blocks until the focus tracker (or a toggle/reset/shutdown) wakes the worker.
+            self._wake_event.clear()
+            if not self._focus_tracker.is_foreground:
+                self._block(self._MAX_BLOCKING_WAIT)
             return False
-        if self._is_paused_by_window: self._is_paused_by_window = False
+        if self._is_paused_by_window: self._set_paused_by_window(False)
         return True
  
+    def _set_paused_by_window(self, paused):
+        if paused == self._is_paused_by_window: return
+        self._is_paused_by_window = paused
+        if paused:
+            self._paused_since = monotonic()
+        elif self._paused_since is not None:
+            self.paused_seconds += monotonic() - self._paused_since
+            self._paused_since = None
+ 
+    # Seconds paused by focus so far, including a pause in progress. Safe to call from any thread.
+    def paused_seconds_total(self):
+        since = self._paused_since
+        return self.paused_seconds + (monotonic() - since if since is not None else 0.0)
+ 
     # Reads current HP value from memory.
     def _read_current_hp_value(self):
-        current_hp = self._pm.read_float(self._hp_final_addr)
+        try:
+            current_hp = self._read_hp_sample(self._hp_final_addr)
+            if isinstance(current_hp, float) and isfinite(current_hp):
+                return current_hp
+        except MemoryBackendError:
+            pass
+        # The current chain stopped working; switch to another one without leaving the cycle.
+        self._fail_over_hp_address()
+        current_hp = self._read_hp_sample(self._hp_final_addr)
         if not isinstance(current_hp, float): raise ValueError("Invalid HP read type.")
         return current_hp
+
+    # Reads HP at addr, or the whole stat block around it when STAT_BLOCK_FIELDS is set.
+    def _read_hp_sample(self, addr):
+        layout = self._stat_layout
+        if layout is None:
+            return self._process.read_float(addr)
+        reader = self._stat_reader
+        if reader is None or reader.process is not self._process:
+            reader = self._stat_reader = StatBlockReader(layout, self._process)
+        values = self.stat_values = reader.read(addr)
+        return float(values[layout.hp_index])
+
+    # Max HP from the last stat block read, or None without a usable max_hp field.
+    def _block_max_hp(self):
+        values = self.stat_values
+        if values is None or self._stat_layout.max_hp_index is None:
+            return None
+        max_hp = float(values[self._stat_layout.max_hp_index])
+        return max_hp if max_hp > 0 and isfinite(max_hp) else None
+
+    # Switches to the next pointer chain that resolves to a plausible HP value.
+    def _fail_over_hp_address(self):
+        new_addr = self._get_pointer_resolver().failover()
+        if new_addr is None:
+            raise MemoryBackendError("No pointer chain resolves to the HP value.")
+        log.info("HP address changed: 0x%X -> 0x%X", self._hp_final_addr, new_addr)
+        self._hp_final_addr = new_addr
+ 
+    # Records the sample and returns the delay before the next one.
+    def _next_sample_interval(self, current_hp):
+        self.sampling_stats.record_sample(current_hp, self._threshold)
+        if self._adaptive_sampler is None:
+            return config.INTERVAL
+        return self._adaptive_sampler.next_interval(current_hp, self._max_hp, self._threshold)
+ 
+    # Prints sample rate, crossing detection latency and overlay update counts of the previous monitoring session.
+    def _print_sampling_stats(self):
+        stats = self.sampling_stats
+        if stats.samples and log.isEnabledFor(logs.DEBUG):
+            log.debug("Sampling: %.1f samples/s, %d threshold crossings, detection latency mean %.1f ms / max %.1f ms",
+                      stats.samples_per_second(), stats.crossings, stats.mean_detection_latency() * 1000,
+                      stats.detection_latency_max * 1000)
+            if self._display is not None:
+                log.debug("Overlay updates: %d emitted, %d suppressed", self._display.emitted, self._display.suppressed)
+            if self._input_injector.latency.count:
+                log.debug("%s", self._input_injector.latency.format_line())
+            if self._rules is not None:
+                for rule, fired in zip(self._rules.rules, self._rules.fired):
+                    log.debug("%s (%s): fired %d times", rule.name, rule.describe(), fired)
+            log.debug("Sample schedule: %s", self.scheduler.format_line())
+            if self._latency is not None:
+                self.dump_latency_stats()
+ 
+    # Prints the per-stage latency histograms (developer mode only). Safe to call from any thread.
+    def dump_latency_stats(self):
+        if self._latency is None:
+            log.info("Latency instrumentation is only available in developer mode.")
+            return
+        lines = self._latency.format_report() + [self._input_injector.latency.format_line()]
+        log.info("Monitoring latency per stage:\n  %s", "\n  ".join(lines))
  
     # Logic to determine and update max HP based on stable HP.
-    def _update_max_hp_logic(self, current_hp):
+    def _update_max_hp_logic(self, current_hp, now=None):
+        # The game's own max HP, if the stat block has it, needs no learning.
+        block_max_hp = self._block_max_hp()
+        if block_max_hp is not None:
+            if block_max_hp != self._max_hp:
+                self._set_new_max_hp(block_max_hp)
+            return
+
         if current_hp <= 0:
             self._last_read_hp = None
             self._stable_hp_timestamp = None
             return
  
+        if now is None:
+            now = time()
         if self._last_read_hp is None or abs(current_hp - self._last_read_hp) > 0.01:
             self._last_read_hp = current_hp
-            self._stable_hp_timestamp = time()
+            self._stable_hp_timestamp = now
         elif self._stable_hp_timestamp is not None:
-            elapsed_time = time() - self._stable_hp_timestamp
+            elapsed_time = now - self._stable_hp_timestamp
             # Update max HP if stable for required duration.
             if elapsed_time >= self._quick_stable_hp_duration and \
                     (self._max_hp is None or current_hp > self._max_hp):
@@ -345,7 +822,7 @@ class AutoPotionWorker(Thread):
     # Sets new max HP and recalculates threshold.
     def _set_new_max_hp(self, new_max_hp):
         self._max_hp = new_max_hp
-        self._threshold = self._max_hp * (self.user_cfg['THRESHOLD_PCT'] if self.user_cfg else config.THRESHOLD_PCT)
+        self._threshold = self._max_hp * self.user_cfg.THRESHOLD_PCT
         self._alerted = False
         self._last_read_hp = None
         self._stable_hp_timestamp = None
@@ -354,61 +831,110 @@ class AutoPotionWorker(Thread):
     def _update_hp_status_display(self, current_hp):
         if self._shutting_down: return
         if self.gui is not None:
-            if self._max_hp is not None and self._max_hp > 0:
-                self.gui.hp_signal.emit(current_hp, self._max_hp)
-                self.gui.threshold_signal.emit(self._threshold)
-                self.gui.status_signal.emit("ON", config.COLOR_ON)
-            elif self._max_hp is not None:
-                self.gui.hp_signal.emit(current_hp, self._max_hp)
-                self.gui.threshold_signal.emit(self._threshold)
-                self.gui.status_signal.emit("ON", config.COLOR_ON)
+            if self._max_hp is not None:
+                self._display.update(current_hp, self._max_hp, self._threshold, "ON", config.COLOR_ON)
             else:
-                self.gui.hp_signal.emit(current_hp, None)
-                self.gui.threshold_signal.emit(None)
-                self.gui.status_signal.emit("WAITING", config.COLOR_WAITING)
+                self._display.update(current_hp, None, None, "WAITING", config.COLOR_WAITING)
         else:
             if self._max_hp is not None and self._max_hp > 0:
                 self._update_active_status(f"HP: {current_hp:.0f}/{self._max_hp:.0f} ({(current_hp / self._max_hp) * 100:5.1f}%) | Threshold: {self._threshold:.0f}", config.COLOR_ON)
             elif self._max_hp is not None:
                 self._update_active_status(f"HP: {current_hp:.0f}/{self._max_hp:.0f} | Threshold: {self._threshold:.0f}", config.COLOR_ON)
             else:
-                self.debug_print(f"[DEBUG] HP: Determining Max HP... (Current: {current_hp:.0f})")
+                log.debug("HP: Determining Max HP... (Current: %.0f)", current_hp)
  
-    # Checks if HP is below threshold and triggers potion key press.
-    def _apply_auto_potion_logic(self, current_hp):
-        if self._max_hp is not None and self._threshold is not None:
-            from time import time
+    # Checks if HP is below threshold and triggers potion key press. Returns True if a potion was used.
+    def _apply_auto_potion_logic(self, current_hp, now=None):
+        if now is None:
             now = time()
-            if current_hp < self._threshold and (now - self._last_potion_time) >= self._potion_cooldown:
-                send(str(self.user_cfg['POTION_KEY']) if self.user_cfg else str(config.POTION_KEY))
+        potion_fired = self._decide_and_inject(current_hp, self._max_hp, self._threshold, now)
+        if self._rules is not None and self._apply_trigger_rules(current_hp, self.stat_values, self._max_hp, now):
+            potion_fired = True
+        if potion_fired:
+            self._log_potion_use(current_hp, self._max_hp)
+        return potion_fired
+
+    # Evaluates the [Rules] table for one sample. Returns the number of keys sent.
+    def _apply_trigger_rules(self, current_hp, values, max_hp, now):
+        rules = self._rules
+        if max_hp != self._rules_max_hp:
+            self._rules_max_hp = max_hp
+            rules.set_max_hp(max_hp)
+        if values is None:
+            values = self._hp_values
+            values[0] = current_hp
+        sent = rules.evaluate(values, now, perf_counter_ns())
+        if sent:
+            self.rule_keys_sent += sent
+        return sent
+
+    # Decides on a potion for one HP sample and presses the key. Returns True if a potion was used.
+    def _decide_and_inject(self, current_hp, max_hp, threshold, now=None):
+        if max_hp is not None and threshold is not None:
+            if now is None:
+                now = time()
+            predictor = self._predictor
+            below = current_hp < threshold
+            if predictor is not None:
+                predictor.add_sample(now, current_hp)
+                predicted = not below and predictor.predicts_crossing(current_hp, threshold)
+            else:
+                predicted = False
+            if (below or predicted) and (now - self._last_potion_time) >= self._potion_cooldown:
+                decided_ns = perf_counter_ns()
+                sent_ns = self._input_injector.inject(decided_ns)
+                if predictor is not None:
+                    predictor.record_send_duration((sent_ns - decided_ns) / 1e9)
+                latency = self._latency
+                if latency is not None:
+                    latency.key_send.record(sent_ns - decided_ns)
+                    if self._sample_read_ns:
+                        latency.crossing_to_key.record(sent_ns - self._sample_read_ns)
+                self.potions_used += 1
+                if predicted:
+                    self.predicted_potions += 1
                 self._last_potion_time = now
-                if self.add_potion_log_callback:
-                    try:
-                        self.debug_print(f"[DEBUG] Logging potion use: HP={current_hp}, MaxHP={self._max_hp}")
-                        if self.gui is not None:
-                            self.gui.log_signal.emit(current_hp, self._max_hp)
-                        else:
-                            self.add_potion_log_callback(current_hp, self._max_hp)
-                    except Exception as e:
-                        self.debug_print(f"[ERROR] Error logging potion: {e}")
+                return True
+        return False
+
+    # Adds a potion use to the overlay's potion log.
+    def _log_potion_use(self, current_hp, max_hp):
+        if self.add_potion_log_callback:
+            try:
+                log.debug("Logging potion use: HP=%s, MaxHP=%s", current_hp, max_hp)
+                if self.gui is not None:
+                    self.gui.log_signal.emit(current_hp, max_hp)
+                else:
+                    self.add_potion_log_callback(current_hp, max_hp)
+            except Exception as e:
+                log.error("Error logging potion: %s", e)
  
     # Handles errors during HP monitoring phase.
     def _handle_monitoring_error(self, e):
         if not self._shutting_down:
-            error_prefix = "Process/Memory Error" if isinstance(e, PymemError) else "Error"
-            self.debug_print(f"[ERROR] {error_prefix}: {str(e)[:100]}. Restarting search...")
+            error_prefix = "Process/Memory Error" if isinstance(e, MemoryBackendError) else "Error"
+            log.debug("%s: %.100s. Restarting search...", error_prefix, e)
         self._reset_core_state_variables()
         self._is_active_logic_running = False
         sleep(self._ERROR_RECOVERY_PAUSE)
  
     # Main execution method for the thread.
     def run(self):
-        print("Worker Thread started.")
+        log.info("Worker Thread started.")
+        if self._trace_file:
+            try:
+                self._trace_recorder = HpTraceRecorder(self._trace_file)
+                log.info("Recording HP trace to '%s'.", self._trace_file)
+            except Exception as e:
+                log.error("Could not open HP trace file: %.100s", e)
         while self._running and not self._shutting_down:
+            if self._pending_user_cfg is not None:
+                self._swap_pending_user_config()
             if self._check_and_perform_reset():
                 continue
  
             if not self._get_is_enabled():
+                self.phase = "off"
                 self._handle_disabled_state()
                 continue
  
@@ -416,29 +942,40 @@ class AutoPotionWorker(Thread):
             self._initialize_for_active_logic()
  
             # Phase 1: Attempt to attach to process.
-            if self._pm is None:
+            if self._process is None:
+                self.phase = "attaching"
                 if not self._try_attach_process(): continue
  
             # Phase 2: Attempt to find HP address.
-            if self._pm is not None and self._hp_final_addr is None:
+            if self._process is not None and self._hp_final_addr is None:
+                self.phase = "resolving"
                 if not self._try_find_hp_address(): continue
  
             # Phase 3: Monitor HP and apply logic.
-            if self._pm is not None and self._hp_final_addr is not None:
-                if not self._perform_hp_monitoring_cycle(): continue
- 
-        print("Worker Thread stopped.")
+            if self._process is not None and self._hp_final_addr is not None:
+                self.phase = "monitoring"
+                if self._split_sampler:
+                    if not self._perform_split_monitoring_cycle(): continue
+                elif not self._perform_hp_monitoring_cycle(): continue
+ 
+        self._stop_process_watcher()
+        self.phase = "off"
+        if self._trace_recorder is not None:
+            self._trace_recorder.close()
+        log.info("Worker Thread stopped.")
     
     
-    def debug_print(self, message):
-        if self.user_cfg['DEVELOPER_DEBUG']:
-            print('> ' + message)
+    # (label, worker) pairs for the metrics endpoint; a single worker has no label.
+    def metric_clients(self):
+        return [(None, self)]
  
     # Signals the thread to stop gracefully.
     def stop(self):
         self._running = False
+        self.wake()
  
     # Signals the thread for immediate shutdown.
     def signal_shutdown(self):
         self._shutting_down = True
-        self._running = False
\ No newline at end of file
+        self._running = False
+        self.wake()
\ No newline at end of file
@@ -0,0 +1,8 @@
+# Makes src/ importable for the tests, like benchmarks/bench_common.py does for the benchmarks,
+# and benchmarks/ for the fakes the tests share with the benchmarks (bench_common).
+from os import path
+from sys import path as sys_path
+
+_ROOT = path.join(path.dirname(path.abspath(__file__)), "..")
+sys_path.insert(0, path.join(_ROOT, "src"))
+sys_path.insert(0, path.join(_ROOT, "benchmarks"))
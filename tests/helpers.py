@@ -0,0 +1,14 @@
+from time import monotonic, sleep
+
+# Same stand-ins for the GUI as the benchmarks use.
+from bench_common import AlwaysEnabled, StatusVar, ToggleFlag  # noqa: F401
+
+
+# Polls condition until it is true; False after timeout seconds.
+def wait_for(condition, timeout=5.0):
+    deadline = monotonic() + timeout
+    while not condition():
+        if monotonic() > deadline:
+            return False
+        sleep(0.005)
+    return True
@@ -0,0 +1,77 @@
+import logging
+
+from bench_chain_failover import make_game
+
+import config
+import game_memory
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from game_memory import MultiChainResolver
+
+
+# Adds a one-hop chain from the module image to a float of its own; returns the chain.
+def add_stale_chain(game, base_offset, value):
+    block = game._alloc_heap_block()
+    game.write_pointer(game.module_base + base_offset, block)
+    game.write_float(block + 0x10, value)
+    return base_offset, [0x10]
+
+
+def attach(game):
+    return SimulatedBackend(game).attach(config.PROCESS_NAME)
+
+
+def test_winner_is_revalidated_and_fails_over_to_a_backup():
+    game = make_game()
+    resolver = MultiChainResolver(attach(game))
+    assert resolver.resolve() == game.hp_addr
+    assert resolver.winner == 0
+    assert resolver.revalidate() == game.hp_addr
+    assert resolver.revalidations == 1
+
+    game.break_chain(config.POINTER_CHAINS[0][0])
+    assert resolver.revalidate() == game.hp_addr
+    assert resolver.winner == 1
+    assert (resolver.invalidations, resolver.failovers, resolver.failures) == (1, 1, 0)
+
+
+def test_chains_agreeing_on_an_hp_outvote_an_earlier_one():
+    game = make_game()
+    stale = add_stale_chain(game, 0x100, 500.0)
+    resolver = MultiChainResolver(attach(game), chains=[stale] + config.POINTER_CHAINS[:2])
+    assert resolver.resolve() == game.hp_addr
+    assert resolver.winner == 1
+
+
+def test_zeroed_chains_do_not_outvote_a_live_one():
+    game = make_game()
+    zeroed = [add_stale_chain(game, 0x100, 0.0), add_stale_chain(game, 0x200, 0.0)]
+    resolver = MultiChainResolver(attach(game), chains=zeroed + config.POINTER_CHAINS[:1])
+    assert resolver.resolve() == game.hp_addr
+    assert resolver.winner == 2
+    assert resolver.chain_failures[:2] == [1, 1]
+
+
+def test_hp_zero_resolves_when_every_chain_reads_it():
+    # A dead character (or a loading screen) on the only configured chain.
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 0.0)]))
+    resolver = MultiChainResolver(attach(game), chains=config.POINTER_CHAINS[:1])
+    assert resolver.resolve() == game.hp_addr
+    assert resolver.failures == 0
+    # Also when the other chains agree on 0 or do not resolve at all.
+    zeroed = add_stale_chain(game, 0x100, 0.0)
+    resolver = MultiChainResolver(attach(game), chains=[zeroed] + config.POINTER_CHAINS)
+    assert resolver.resolve() is not None
+    assert resolver.failures == 0
+
+
+def test_winning_chain_is_printed_in_developer_debug_mode(caplog):
+    game_memory._last_successful_chain = None
+    game = make_game()
+    resolver = MultiChainResolver(attach(game))
+    resolver.resolve()
+    assert "Pointer chain resolved:" not in caplog.text
+    game.relocate_hop()
+    caplog.set_level(logging.DEBUG, logger="autopot")
+    resolver.resolve()
+    assert caplog.text.count("Pointer chain resolved:") == 1
+    assert caplog.text.count("Step ") == len(config.OFFSETS) + 1
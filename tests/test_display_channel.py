@@ -0,0 +1,33 @@
+from display_channel import DisplayChannel
+
+
+def channel():
+    emitted = []
+    return DisplayChannel(emitted.append), emitted
+
+
+def test_only_changes_at_display_precision_are_emitted():
+    display, emitted = channel()
+    display.update(800.2, 1000.0, 600.0, "ON", "green")
+    display.update(800.3, 1000.0, 600.0, "ON", "green")
+    display.update(800.4, 1000.0, 600.0, "ON", "green")
+    assert emitted == [(800.2, 1000.0, 600.0, "ON", "green")]
+    display.update(799.0, 1000.0, 600.0, "ON", "green")
+    assert len(emitted) == 2
+    assert (display.emitted, display.suppressed) == (2, 2)
+
+
+def test_status_only_update_keeps_the_hp_values():
+    display, emitted = channel()
+    display.update(800.0, 1000.0, 600.0, "ON", "green")
+    display.update_status("PAUSED", "blue")
+    display.update_status("PAUSED", "blue")
+    assert emitted[-1] == (800.0, 1000.0, 600.0, "PAUSED", "blue")
+    assert len(emitted) == 2
+
+
+def test_clear_emits_empty_hp_values():
+    display, emitted = channel()
+    display.update(500.0, None, None, "WAITING", "orange")
+    display.clear("OFF", "red")
+    assert emitted == [(500.0, None, None, "WAITING", "orange"), (None, None, None, "OFF", "red")]
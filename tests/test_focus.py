@@ -0,0 +1,67 @@
+from time import sleep
+
+from helpers import AlwaysEnabled, StatusVar, wait_for
+
+import config
+from focus_tracker import ScriptedFocusTracker
+from input_injector import RecordingInjector
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from user_config import UserConfig
+from worker import AutoPotionWorker
+
+
+# HP curve the test sets directly.
+class SettableHp:
+    def __init__(self, hp):
+        self.hp = hp
+
+    def __call__(self, t):
+        return self.hp
+
+
+def test_tracker_reports_only_changes_while_started():
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]))
+    tracker = SimulatedBackend(game).attach(config.PROCESS_NAME).create_focus_tracker(config.WINDOW_TITLE)
+    changes = []
+    tracker.start(lambda: changes.append(tracker.is_foreground))
+    game.set_foreground(True)
+    game.set_foreground(False)
+    game.set_foreground(False)
+    game.set_foreground(True)
+    assert changes == [False, True]
+    game.terminate()
+    assert changes == [False, True, False]
+    tracker.stop()
+    tracker.set_foreground(True)
+    assert changes == [False, True, False]
+
+
+def test_focus_loss_pauses_potions_and_focus_return_resumes_them():
+    hp = SettableHp(1000.0)
+    tracker = ScriptedFocusTracker(True)
+    injector = RecordingInjector()
+    status = StatusVar()
+    worker = AutoPotionWorker(status, StatusVar(), AlwaysEnabled(),
+                              user_cfg=UserConfig({"STABLE_HP_DURATION": 0.2, "POTION_COOLDOWN": 0.0}),
+                              memory_backend=SimulatedBackend(SimulatedGame(hp)), input_injector=injector,
+                              focus_tracker_factory=lambda process: tracker)
+    worker.daemon = True
+    worker.start()
+    try:
+        assert wait_for(lambda: worker._max_hp == 1000.0)
+
+        tracker.set_foreground(False)
+        assert wait_for(lambda: (status.get() or "").startswith("PAUSED"))
+        hp.hp = 300.0
+        sleep(0.4)
+        assert injector.sent == []
+        assert worker.paused_seconds_total() > 0.3
+
+        tracker.set_foreground(True)
+        assert wait_for(lambda: injector.sent)
+        paused = worker.paused_seconds_total()
+        sleep(0.2)
+        assert worker.paused_seconds_total() == paused
+    finally:
+        worker.stop()
+        worker.join(5.0)
@@ -0,0 +1,70 @@
+import pytest
+
+from helpers import AlwaysEnabled, StatusVar, wait_for
+
+from hp_trace import HEADER, RECORD, HpTraceReader, HpTraceRecorder
+from input_injector import RecordingInjector
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from user_config import UserConfig
+from worker import AutoPotionWorker
+
+
+def test_round_trip_and_append(tmp_path):
+    file_path = str(tmp_path / "hp_trace.bin")
+    recorder = HpTraceRecorder(file_path, batch_records=4)
+    recorder.record(1.0, 1000.0, None, None, False)
+    for i in range(5):
+        recorder.record(2.0 + i, 900.0 - i, 1000.0, 600.0, i == 3)
+    recorder.close()
+    recorder = HpTraceRecorder(file_path)
+    recorder.record(10.0, 500.0, 1000.0, 600.0, True)
+    recorder.close()
+
+    with HpTraceReader(file_path) as reader:
+        assert len(reader) == 7
+        assert reader[0] == (1.0, 1000.0, None, None, False)
+        assert reader[4] == (5.0, 897.0, 1000.0, 600.0, True)
+        assert reader[-1] == (10.0, 500.0, 1000.0, 600.0, True)
+        assert [record[0] for record in reader] == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 10.0]
+
+
+def test_batches_older_than_the_flush_interval_are_written_before_close(tmp_path):
+    file_path = tmp_path / "hp_trace.bin"
+    recorder = HpTraceRecorder(str(file_path), flush_interval=1.0)
+    try:
+        for i in range(5):
+            recorder.record(i * 0.3, 1000.0, 1000.0, 600.0, False)
+        # The fifth sample is 1.2 s after the first, so the batch is handed to the writer.
+        assert wait_for(lambda: file_path.stat().st_size == HEADER.size + 5 * RECORD.size)
+    finally:
+        recorder.close()
+
+
+def test_incompatible_file_is_rejected(tmp_path):
+    file_path = tmp_path / "other.bin"
+    file_path.write_bytes(b"NOTATRACE" + bytes(16))
+    with pytest.raises(ValueError):
+        HpTraceRecorder(str(file_path))
+    with pytest.raises(ValueError):
+        HpTraceReader(str(file_path))
+
+
+def test_worker_records_its_samples_and_potions(tmp_path):
+    file_path = str(tmp_path / "hp_trace.bin")
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0), (0.3, 1000.0), (0.4, 300.0), (10.0, 300.0)], loop=False))
+    injector = RecordingInjector()
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=UserConfig({"HP_TRACE_FILE": file_path}),
+                              memory_backend=SimulatedBackend(game), input_injector=injector)
+    worker.daemon = True
+    worker.start()
+    try:
+        assert wait_for(lambda: len(injector.sent) >= 2)
+    finally:
+        worker.stop()
+        worker.join(5.0)
+
+    with HpTraceReader(file_path) as reader:
+        records = list(reader)
+    assert len(records) == worker.sampling_stats.total_samples
+    assert sum(fired for *_, fired in records) == worker.potions_used
+    assert records[0][1:4] == (1000.0, 1000.0, 600.0)
@@ -0,0 +1,42 @@
+import sys
+from time import perf_counter_ns
+from types import ModuleType
+
+import pytest
+
+from input_injector import KeyboardLibInjector, RecordingInjector, create_injector
+
+
+@pytest.fixture
+def keyboard_module(monkeypatch):
+    module = ModuleType("keyboard")
+    module.sent = []
+    module.send = module.sent.append
+    monkeypatch.setitem(sys.modules, "keyboard", module)
+    return module
+
+
+def test_recording_injector_times_decision_to_key():
+    injector = RecordingInjector(clock=lambda: 42.0)
+    decided_ns = perf_counter_ns()
+    sent_ns = injector.inject(decided_ns)
+    assert injector.sent == [42.0]
+    assert sent_ns >= decided_ns
+    assert injector.latency.count == 1
+    assert injector.latency.max_ns == sent_ns - decided_ns
+
+
+def test_keyboard_injector_sends_the_key(keyboard_module):
+    injector = create_injector(3, "keyboard")
+    assert isinstance(injector, KeyboardLibInjector)
+    injector.inject(perf_counter_ns())
+    assert keyboard_module.sent == ["3"]
+    assert injector.latency.count == 1
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="SendInput exists on Windows")
+def test_auto_falls_back_to_the_keyboard_library(keyboard_module):
+    assert isinstance(create_injector("1", "auto"), KeyboardLibInjector)
+    assert isinstance(create_injector("1", "AUTO"), KeyboardLibInjector)
+    with pytest.raises(Exception):
+        create_injector("1", "sendinput")
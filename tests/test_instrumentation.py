@@ -0,0 +1,49 @@
+from helpers import AlwaysEnabled, StatusVar, wait_for
+
+import logs
+from input_injector import RecordingInjector
+from instrumentation import LatencyHistogram
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from user_config import UserConfig
+from worker import AutoPotionWorker
+
+
+def test_histogram_percentiles_are_bucket_upper_bounds():
+    histogram = LatencyHistogram("test")
+    for duration_ns in [100] * 98 + [5000, 1_000_000]:
+        histogram.record(duration_ns)
+    assert histogram.count == 100
+    assert histogram.percentile(50) == 128
+    assert histogram.percentile(99) == 8192
+    assert histogram.percentile(100) == 1_000_000
+    assert histogram.max_ns == 1_000_000
+    assert histogram.mean_ns() == (98 * 100 + 5000 + 1_000_000) / 100
+    histogram.reset()
+    assert histogram.count == 0 and histogram.percentile(99) == 0
+
+
+def test_huge_durations_land_in_the_last_bucket():
+    histogram = LatencyHistogram("test")
+    histogram.record(1 << 60)
+    assert histogram.counts[-1] == 1
+
+
+def test_stages_are_timed_in_developer_mode_only():
+    def run(debug):
+        game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]))
+        worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=UserConfig({"DEVELOPER_DEBUG": debug}),
+                                  memory_backend=SimulatedBackend(game), input_injector=RecordingInjector())
+        worker.daemon = True
+        worker.start()
+        try:
+            assert wait_for(lambda: worker.sampling_stats.total_samples >= 3)
+        finally:
+            worker.stop()
+            worker.join(5.0)
+            logs.set_debug(False)
+        return worker._latency
+
+    assert run(False) is None
+    latency = run(True)
+    assert latency.hp_read.count >= 3
+    assert latency.tick.count >= 3
@@ -0,0 +1,47 @@
+import logging
+
+import pytest
+
+import logs
+from game_memory import PointerChainResolver
+from logs import RateLimitFilter
+
+
+def record(msg, *args, key=None):
+    record = logging.LogRecord("autopot.test", logging.ERROR, __file__, 1, msg, args, None)
+    if key is not None:
+        record.rate_key = key
+    return record
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(logs, "monotonic", lambda: now[0])
+    return now
+
+
+def test_rate_limit_filter_passes_a_key_once_per_interval(clock):
+    limit = RateLimitFilter(interval=5.0)
+    assert limit.filter(record("searching", key="searching"))
+    clock[0] = 4.9
+    assert not limit.filter(record("searching", key="searching"))
+    assert limit.filter(record("other", key="other"))
+    # Records without a key are never limited.
+    assert limit.filter(record("plain")) and limit.filter(record("plain"))
+    clock[0] = 5.0
+    assert limit.filter(record("searching", key="searching"))
+    assert limit.suppressed == 1
+
+
+def test_resolver_errors_are_limited_per_formatted_message(clock, caplog):
+    caplog.handler.addFilter(RateLimitFilter(interval=5.0))
+    resolver = PointerChainResolver(None)
+    with caplog.at_level(logging.ERROR, logger=logs.LOGGER_NAME):
+        resolver._report_error("Module not found: %s", "a.dll")
+        resolver._report_error("Module not found: %s", "a.dll")
+        resolver._report_error("Module not found: %s", "b.dll")
+        clock[0] = 5.0
+        resolver._report_error("Module not found: %s", "a.dll")
+    assert [r.getMessage() for r in caplog.records] == [
+        "Module not found: a.dll", "Module not found: b.dll", "Module not found: a.dll"]
@@ -0,0 +1,77 @@
+import pytest
+
+from helpers import AlwaysEnabled, StatusVar, wait_for
+
+import config
+import game_memory
+from input_injector import RecordingInjector
+from memory_backend import MemoryBackendError, ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from user_config import UserConfig
+from worker import AutoPotionWorker
+
+
+# Clock the test moves by hand.
+class ManualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_scripted_curve_interpolates_and_loops():
+    curve = ScriptedHpCurve([(0.0, 1000.0), (1.0, 500.0), (2.0, 1000.0)])
+    assert curve(0.5) == 750.0
+    assert curve(1.0) == 500.0
+    assert curve(2.5) == 750.0
+    once = ScriptedHpCurve([(0.0, 1000.0), (1.0, 500.0)], loop=False)
+    assert once(5.0) == 500.0
+    with pytest.raises(ValueError):
+        ScriptedHpCurve([])
+
+
+def test_configured_chain_leads_to_the_scripted_hp():
+    clock = ManualClock()
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0), (1.0, 500.0)], loop=False), clock=clock)
+    process = SimulatedBackend(game).attach(config.PROCESS_NAME)
+    addr = game_memory.get_hp_address(process)
+    assert addr == game.hp_addr
+    assert process.read_float(addr) == 1000.0
+    clock.now = 0.5
+    assert process.read_float(addr) == 750.0
+
+    # The player object moves: the old chain walk is stale, a new one finds it again.
+    game.relocate_hop()
+    assert game_memory.get_hp_address(process) == game.hp_addr != addr
+
+
+def test_closed_game_cannot_be_attached_or_read():
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]))
+    backend = SimulatedBackend(game)
+    process = backend.attach(config.PROCESS_NAME)
+    game.terminate()
+    with pytest.raises(MemoryBackendError):
+        process.read_float(game.hp_addr)
+    with pytest.raises(MemoryBackendError):
+        backend.attach(config.PROCESS_NAME)
+    assert backend.process_ids(config.PROCESS_NAME) == []
+
+
+def test_worker_presses_the_potion_key_below_the_threshold():
+    # Max HP is the first sample (1000), so the default 60% threshold is 600.
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0), (0.5, 1000.0), (0.6, 300.0), (10.0, 300.0)], loop=False))
+    injector = RecordingInjector()
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=UserConfig({}),
+                              memory_backend=SimulatedBackend(game), input_injector=injector)
+    worker.daemon = True
+    worker.start()
+    try:
+        assert wait_for(lambda: worker._max_hp == 1000.0)
+        assert injector.sent == []
+        assert wait_for(lambda: len(injector.sent) >= 2)
+        assert worker.potions_used == len(injector.sent)
+        # POTION_COOLDOWN apart at least.
+        assert (injector.sent[1] - injector.sent[0]) / 1e9 >= config.POTION_COOLDOWN * 0.9
+    finally:
+        worker.stop()
+        worker.join(5.0)
@@ -0,0 +1,78 @@
+from urllib.request import urlopen
+
+from helpers import AlwaysEnabled, StatusVar, wait_for
+
+from input_injector import RecordingInjector
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from metrics import CONTENT_TYPE, MetricsServer, render_metrics, start_metrics_server
+from multibox import MultiboxWorker
+from user_config import UserConfig
+from worker import AutoPotionWorker
+
+HIT = [(0.0, 1000.0), (0.3, 1000.0), (0.4, 300.0), (10.0, 300.0)]
+
+
+def values(text):
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#"))
+
+
+def test_idle_worker_renders_zeroes_and_the_off_phase():
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=UserConfig({}),
+                              memory_backend=SimulatedBackend(), input_injector=RecordingInjector())
+    text = render_metrics(worker)
+    assert text.endswith("# EOF\n")
+    metrics = values(text)
+    assert metrics["leautopot_samples_total"] == "0"
+    assert metrics['leautopot_potions_total{source="threshold"}'] == "0"
+    assert metrics['leautopot_phase{leautopot_phase="off"}'] == "1"
+    assert metrics['leautopot_phase{leautopot_phase="monitoring"}'] == "0"
+    assert metrics['leautopot_tick_seconds_bucket{le="+Inf"}'] == metrics["leautopot_tick_seconds_count"] == "0"
+    # METRICS_PORT = 0 leaves the endpoint off.
+    assert start_metrics_server(worker, 0) is None
+
+
+def test_endpoint_serves_a_running_worker():
+    game = SimulatedGame(ScriptedHpCurve(HIT, loop=False))
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=UserConfig({}),
+                              memory_backend=SimulatedBackend(game), input_injector=RecordingInjector())
+    worker.daemon = True
+    worker.start()
+    # Port 0 picks a free port.
+    server = MetricsServer(worker, 0)
+    server.start()
+    try:
+        assert wait_for(lambda: worker.potions_used >= 1)
+        with urlopen(f"http://127.0.0.1:{server.port}/metrics") as response:
+            assert response.headers["Content-Type"] == CONTENT_TYPE
+            metrics = values(response.read().decode())
+    finally:
+        server.stop()
+        worker.stop()
+        worker.join(5.0)
+    assert int(metrics["leautopot_samples_total"]) > 0
+    assert int(metrics['leautopot_potions_total{source="threshold"}']) >= 1
+    assert metrics['leautopot_phase{leautopot_phase="monitoring"}'] == "1"
+    # Cumulative buckets end at the total count.
+    buckets = [int(value) for key, value in metrics.items() if key.startswith("leautopot_tick_seconds_bucket")]
+    assert buckets == sorted(buckets)
+    assert buckets[-1] == int(metrics["leautopot_tick_seconds_count"]) > 0
+
+
+def test_multibox_clients_are_labelled_by_row():
+    games = [SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]), pid=1001),
+             SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]), pid=1002)]
+    worker = MultiboxWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=UserConfig({}),
+                            memory_backend=SimulatedBackend(*games),
+                            injector_factory=lambda process, key, kind: RecordingInjector(key))
+    worker.daemon = True
+    worker.start()
+    try:
+        assert wait_for(lambda: len(worker._active) == 2)
+        metrics = values(render_metrics(worker))
+    finally:
+        worker.stop()
+        worker.join(5.0)
+    assert 'leautopot_samples_total{client="1"}' in metrics
+    assert 'leautopot_samples_total{client="2"}' in metrics
+    assert metrics['leautopot_phase{leautopot_phase="monitoring"}'] == "1"
+    assert metrics['leautopot_phase{client="2",leautopot_phase="monitoring"}'] == "1"
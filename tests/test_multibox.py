@@ -0,0 +1,85 @@
+from helpers import AlwaysEnabled, StatusVar, wait_for
+
+import config
+from hp_trace import HpTraceReader
+from input_injector import RecordingInjector
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from multibox import MultiboxWorker, StatusSlots, _client_trace_file
+from user_config import UserConfig
+
+HEALTHY = [(0.0, 1000.0)]
+# Max HP is learned from the first sample; then a hit to 30%.
+HIT = [(0.0, 1000.0), (0.3, 1000.0), (0.4, 300.0), (10.0, 300.0)]
+
+
+def start_worker(games, user_cfg, injectors):
+    def injector_factory(process, key, kind):
+        injector = RecordingInjector(key)
+        injectors.setdefault(process.pid, []).append(injector)
+        return injector
+
+    worker = MultiboxWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=UserConfig(user_cfg),
+                            memory_backend=SimulatedBackend(*games), injector_factory=injector_factory)
+    worker.daemon = True
+    worker.start()
+    return worker
+
+
+def sent(injectors, pid):
+    return sum(len(injector.sent) for injector in injectors.get(pid, []))
+
+
+def test_client_trace_files_are_numbered_by_row():
+    assert _client_trace_file("hp_trace.bin", 0) == "hp_trace.client1.bin"
+    assert _client_trace_file("traces/hp", 2) == "traces/hp.client3"
+
+
+def test_status_slots_join_their_parts():
+    status = StatusVar()
+    slots = StatusSlots(status)
+    own, first, second = slots.slot(-1), slots.slot(0, "#1 "), slots.slot(1, "#2 ")
+    own.set("ON (2 clients)")
+    second.set("HP 300")
+    first.set("HP 1000")
+    assert status.get() == "ON (2 clients) | #1 HP 1000 | #2 HP 300"
+    assert second.get() == "HP 300"
+    first.set(None)
+    assert status.get() == "ON (2 clients) | #2 HP 300"
+
+
+def test_only_the_damaged_client_gets_its_key(tmp_path):
+    games = [SimulatedGame(ScriptedHpCurve(HEALTHY), pid=1001),
+             SimulatedGame(ScriptedHpCurve(HIT, loop=False), pid=1002)]
+    injectors = {}
+    trace = tmp_path / "hp_trace.bin"
+    worker = start_worker(games, {"HP_TRACE_FILE": str(trace)}, injectors)
+    try:
+        assert wait_for(lambda: sent(injectors, 1002) >= 2)
+        assert sent(injectors, 1001) == 0
+        assert [client._process.pid for client in worker.clients] == [1001, 1002]
+        assert worker.phase == "monitoring"
+    finally:
+        worker.stop()
+        worker.join(5.0)
+    with HpTraceReader(str(tmp_path / "hp_trace.client1.bin")) as reader:
+        assert len(reader) and not any(record[4] for record in reader)
+    with HpTraceReader(str(tmp_path / "hp_trace.client2.bin")) as reader:
+        assert sum(record[4] for record in reader) == sent(injectors, 1002)
+
+
+def test_closed_client_frees_its_row_for_the_next_one(monkeypatch):
+    monkeypatch.setattr(config, "MULTIBOX_SCAN_INTERVAL", 0.05)
+    first = SimulatedGame(ScriptedHpCurve(HEALTHY), pid=1001)
+    second = SimulatedGame(ScriptedHpCurve(HEALTHY), pid=1002)
+    second.terminate()
+    worker = start_worker([first, second], {}, {})
+    try:
+        assert wait_for(lambda: len(worker._active) == 1)
+        first.terminate()
+        assert wait_for(lambda: worker.clients == [None])
+        second.launch()
+        assert wait_for(lambda: len(worker._active) == 1)
+        assert worker.clients[0]._process.pid == 1002
+    finally:
+        worker.stop()
+        worker.join(5.0)
@@ -0,0 +1,35 @@
+import config
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from game_memory import PointerChainResolver
+
+
+def attached_game():
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]))
+    return game, SimulatedBackend(game).attach(config.PROCESS_NAME)
+
+
+def test_revalidate_rereads_hops_without_walking_the_chain_again():
+    game, process = attached_game()
+    resolver = PointerChainResolver(process)
+    assert resolver.revalidate() == game.hp_addr
+    for _ in range(10):
+        assert resolver.revalidate() == game.hp_addr
+    assert resolver.stats() == {"full_resolves": 1, "revalidations": 10, "invalidations": 0}
+
+
+def test_changed_hop_walks_the_chain_again():
+    game, process = attached_game()
+    resolver = PointerChainResolver(process)
+    old_addr = resolver.resolve()
+    game.relocate_hop()
+    assert resolver.revalidate() == game.hp_addr != old_addr
+    assert resolver.stats() == {"full_resolves": 2, "revalidations": 0, "invalidations": 1}
+
+
+def test_broken_chain_resolves_to_none():
+    game, process = attached_game()
+    resolver = PointerChainResolver(process)
+    resolver.resolve()
+    game.break_chain(config.BASE_OFFSET)
+    assert resolver.revalidate() is None
+    assert resolver.hp_addr is None
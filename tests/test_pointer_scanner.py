@@ -0,0 +1,39 @@
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from memory_dump import MemoryImage, capture, pages_covering
+from pointer_scanner import PointerScanner
+
+PATCHED_BASE_OFFSET = 0x44DF308
+PATCHED_OFFSETS = [0x88, 0xE98, 0x30, 0x6C]
+
+
+def test_scanner_recovers_the_chain_of_a_patched_game(tmp_path):
+    now = [0.0]
+    curve = ScriptedHpCurve([(0.0, 1250.0), (10.0, 980.0)], loop=False)
+    game = SimulatedGame(curve, base_offset=PATCHED_BASE_OFFSET, offsets=PATCHED_OFFSETS, clock=lambda: now[0])
+    # Decoys equal to the first HP, in a heap block and in the module image.
+    game.map_region(0x0000_0300_0000_0000, 0x1000)
+    for i in range(8):
+        game.write_float(0x0000_0300_0000_0000 + i * 0x40, 1250.0)
+    game.write_float(game.module_base + 0x100, 1250.0)
+    process = SimulatedBackend(game).attach(game.process_name)
+    scanner = PointerScanner(workers=1)
+
+    first = str(tmp_path / "first.dmp")
+    capture(process, first, game.module_name)
+    with MemoryImage(first) as image:
+        assert scanner.scan_value(image, 1250.0) >= 10
+
+    now[0] = 10.0
+    pages = str(tmp_path / "pages.dmp")
+    capture(process, pages, game.module_name, regions=pages_covering(scanner.candidates.tolist()))
+    with MemoryImage(pages) as image:
+        assert scanner.scan_value(image, 980.0) == 1
+    assert int(scanner.candidates[0]) == game.hp_addr
+
+    final = str(tmp_path / "final.dmp")
+    capture(process, final, game.module_name)
+    with MemoryImage(final) as image:
+        paths = scanner.find_paths(image)
+        assert [PATCHED_BASE_OFFSET, PATCHED_OFFSETS] in paths
+        assert [PATCHED_BASE_OFFSET, PATCHED_OFFSETS] in scanner.narrow_paths(image, 980.0)
+        assert scanner.narrow_paths(image, 1250.0) == []
@@ -0,0 +1,45 @@
+import pytest
+
+from prediction import HpTrendPredictor
+
+
+def test_slope_of_a_linear_fall():
+    predictor = HpTrendPredictor(window=6, input_latency=0.0)
+    for i in range(10):
+        predictor.add_sample(100.0 + i * 0.1, 1000.0 - i * 20.0)
+    assert predictor.slope() == pytest.approx(-200.0)
+    assert predictor.sample_period == pytest.approx(0.1)
+
+
+def test_too_few_samples_have_no_slope():
+    predictor = HpTrendPredictor(window=6)
+    assert predictor.slope() == 0.0
+    predictor.add_sample(1.0, 900.0)
+    assert predictor.slope() == 0.0
+
+
+def test_predicts_crossing_within_the_lead_time_only():
+    predictor = HpTrendPredictor(window=4, input_latency=0.05)
+    for i in range(4):
+        predictor.add_sample(i * 0.1, 1000.0 - i * 100.0)
+    # -1000 HP/s over a 0.1 s sample period + 0.05 s input latency: 150 HP ahead.
+    assert predictor.predicts_crossing(700.0, 600.0)
+    assert not predictor.predicts_crossing(760.0, 600.0)
+    predictor.reset()
+    for i in range(4):
+        predictor.add_sample(i * 0.1, 700.0 + i * 10.0)
+    assert not predictor.predicts_crossing(610.0, 600.0)
+
+
+def test_sums_stay_exact_over_a_long_session():
+    predictor = HpTrendPredictor(window=6, input_latency=0.0)
+    # Large, uneven HP values make every incremental update round, over about 28 hours.
+    hp = 123456.789
+    for i in range(200_000):
+        hp = 100000.0 + (hp * 1.000001 + 0.37) % 50000.0
+        predictor.add_sample(i * 0.5, hp)
+    values = predictor._values
+    times = predictor._times
+    assert predictor._sum_h == pytest.approx(sum(values), abs=1e-9)
+    assert predictor._sum_t == pytest.approx(sum(times), abs=1e-9)
+    assert predictor._sum_th == pytest.approx(sum(t * h for t, h in zip(times, values)), abs=1e-6)
@@ -0,0 +1,125 @@
+from time import sleep
+
+from helpers import AlwaysEnabled, StatusVar, wait_for
+
+import config
+from input_injector import RecordingInjector
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame, SimulatedProcessTable
+from process_watcher import ProcessWatcher
+from user_config import UserConfig
+from worker import AutoPotionWorker
+
+
+def closed_game():
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]))
+    game.terminate()
+    return game
+
+
+# Process table that cannot describe the game's pid for its first `denied` lookups, like
+# a process that is still starting up or refuses to be opened.
+class DenyingProcessTable(SimulatedProcessTable):
+    def __init__(self, backend, denied):
+        super().__init__(backend, background_processes=10)
+        self.denied = denied
+
+    def describe(self, pid):
+        if self.denied and any(game.pid == pid for game in self.backend.games):
+            self.denied -= 1
+            return None
+        return super().describe(pid)
+
+
+def test_initial_poll_reports_running_game_without_launch_time():
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]))
+    watcher = ProcessWatcher(SimulatedBackend(game).process_table(), config.PROCESS_NAME)
+    watcher.poll(initial=True)
+    assert watcher.matches == {game.pid: None}
+    assert watcher.found == 1
+
+
+def test_poll_looks_up_only_new_pids_and_drops_exited_ones():
+    game = closed_game()
+    table = SimulatedBackend(game).process_table()
+    started = []
+    watcher = ProcessWatcher(table, config.PROCESS_NAME, on_start=lambda: started.append(True))
+    watcher.poll(initial=True)
+    assert watcher.matches == {}
+    initial_lookups = watcher.lookups
+
+    other = table.start("other.exe")
+    watcher.poll()
+    assert watcher.lookups == initial_lookups + 1
+    assert watcher.matches == {}
+    assert started == []
+
+    game.launch()
+    watcher.poll()
+    assert watcher.lookups == initial_lookups + 2
+    assert watcher.matches == {game.pid: game.started_at}
+    assert watcher.found == 1
+    assert started == [True]
+
+    # Nothing new: no lookups, and the matches dict is not replaced.
+    matches = watcher.matches
+    watcher.poll()
+    assert watcher.lookups == initial_lookups + 2
+    assert watcher.matches is matches
+
+    table.exit(other)
+    game.terminate()
+    watcher.poll()
+    assert watcher.matches == {}
+    assert watcher.found == 1
+
+
+def test_worker_attaches_when_the_game_launches():
+    game = closed_game()
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=UserConfig({}),
+                              memory_backend=SimulatedBackend(game), input_injector=RecordingInjector())
+    worker.daemon = True
+    worker.start()
+    try:
+        sleep(0.2)
+        assert worker._process is None
+        game.launch()
+        assert wait_for(lambda: worker._hp_final_addr is not None)
+        assert worker._process.pid == game.pid
+    finally:
+        worker.stop()
+        worker.join(5.0)
+
+
+
+def test_pid_that_cannot_be_described_is_looked_up_again():
+    game = closed_game()
+    backend = SimulatedBackend(game)
+    table = backend.table = DenyingProcessTable(backend, denied=2)
+    watcher = ProcessWatcher(table, config.PROCESS_NAME)
+    watcher.poll(initial=True)
+    game.launch()
+    watcher.poll()
+    watcher.poll()
+    assert watcher.matches == {}
+    watcher.poll()
+    assert watcher.matches == {game.pid: game.started_at}
+    assert watcher.found == 1
+
+
+def test_worker_attaches_by_name_when_the_watcher_misses_the_game(monkeypatch):
+    monkeypatch.setattr(config, "WAIT_INTERVAL_PROCESS", 0.2)
+    game = closed_game()
+    backend = SimulatedBackend(game)
+    backend.table = DenyingProcessTable(backend, denied=10 ** 9)
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=UserConfig({}),
+                              memory_backend=backend, input_injector=RecordingInjector())
+    worker.daemon = True
+    worker.start()
+    try:
+        assert wait_for(lambda: worker.phase == "attaching")
+        game.launch()
+        assert wait_for(lambda: worker._hp_final_addr is not None, timeout=2.0)
+        assert worker._process.pid == game.pid
+    finally:
+        worker.stop()
+        worker.join(5.0)
@@ -0,0 +1,104 @@
+import pytest
+
+import config
+import sampling
+from sampling import AdaptiveSampler, DeadlineScheduler, SamplingStats
+
+
+def sampler():
+    return AdaptiveSampler(0.005, 0.1, 0.15, 2.0, base_interval=0.05)
+
+
+def test_falling_hp_samples_at_the_minimum_period():
+    s = sampler()
+    assert s.next_interval(1000.0, 1000.0, 600.0) == 0.1
+    assert s.next_interval(990.0, 1000.0, 600.0) == 0.005
+
+
+def test_hp_near_the_threshold_samples_at_the_minimum_period():
+    s = sampler()
+    # Within 15% of max HP above the 600 threshold.
+    assert s.next_interval(740.0, 1000.0, 600.0) == 0.005
+    assert s.next_interval(745.0, 1000.0, 600.0) == 0.005
+
+
+def test_period_ramps_up_to_base_below_max_and_to_max_at_max():
+    s = sampler()
+    s.next_interval(900.0, 1000.0, 600.0)
+    s.next_interval(800.0, 1000.0, 600.0)
+    assert s.next_interval(800.0, 1000.0, 600.0) == pytest.approx(0.01)
+    assert s.next_interval(800.0, 1000.0, 600.0) == pytest.approx(0.02)
+    for _ in range(5):
+        interval = s.next_interval(800.0, 1000.0, 600.0)
+    assert interval == 0.05
+    for _ in range(5):
+        interval = s.next_interval(1000.0, 1000.0, 600.0)
+    assert interval == 0.1
+
+
+def test_unknown_max_hp_uses_the_base_period():
+    s = sampler()
+    assert s.next_interval(500.0, None, None) == 0.05
+
+
+def test_detection_latency_is_the_gap_around_a_crossing():
+    stats = SamplingStats()
+    stats.record_sample(700.0, 600.0, now=0.0)
+    stats.record_sample(650.0, 600.0, now=0.1)
+    stats.record_sample(500.0, 600.0, now=0.13)
+    stats.record_sample(700.0, 600.0, now=0.2)
+    stats.record_sample(550.0, 600.0, now=0.4)
+    assert stats.crossings == 2
+    assert stats.detection_latency_max == pytest.approx(0.2)
+    assert stats.mean_detection_latency() == pytest.approx(0.115)
+    assert stats.samples_per_second() == pytest.approx(10.0)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(sampling, "perf_counter", lambda: now[0])
+    return now
+
+
+def test_scheduler_keeps_the_deadlines_on_the_grid(clock):
+    scheduler = DeadlineScheduler(spin=0.0002)
+    assert scheduler.begin_tick() == 100.0
+    assert scheduler.schedule(0.01) == pytest.approx(100.01)
+    # A tick that starts 2 ms late does not push the later deadlines back.
+    clock[0] = 100.012
+    scheduler.begin_tick()
+    assert scheduler.schedule(0.01) == pytest.approx(100.02)
+    assert scheduler.lateness.max_ns == pytest.approx(2_000_000, rel=1e-3)
+    assert scheduler.ticks == 2 and scheduler.missed == 0
+
+
+def test_scheduler_skips_the_deadlines_that_already_passed(clock):
+    scheduler = DeadlineScheduler()
+    scheduler.begin_tick()
+    # A 35 ms tick on a 10 ms period misses the deadlines at +10, +20 and +30 ms.
+    clock[0] = 100.035
+    assert scheduler.schedule(0.01) == pytest.approx(100.04)
+    assert scheduler.missed == 3
+    assert scheduler.busy.max_ns == pytest.approx(35_000_000, rel=1e-3)
+
+
+def test_scheduler_spins_only_for_fast_periods(clock):
+    scheduler = DeadlineScheduler(spin=0.0002)
+    scheduler.begin_tick()
+    scheduler.schedule(config.SCHEDULER_SPIN_MAX_INTERVAL)
+    assert scheduler.spin == 0.0002
+    scheduler.begin_tick()
+    scheduler.schedule(config.SCHEDULER_SPIN_MAX_INTERVAL * 2)
+    assert scheduler.spin == 0.0
+
+
+def test_rearmed_scheduler_starts_a_new_schedule(clock):
+    scheduler = DeadlineScheduler()
+    scheduler.begin_tick()
+    scheduler.schedule(0.01)
+    scheduler.rearm()
+    clock[0] = 105.0
+    scheduler.begin_tick()
+    assert scheduler.schedule(0.01) == pytest.approx(105.01)
+    assert scheduler.missed == 0 and scheduler.lateness.count == 0
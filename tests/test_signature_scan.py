@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from bench_signature_scan import SIGNATURE, build_module_image
+
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from signature_scan import Signature, SignatureError, find_base_offset, parse_signature
+
+
+def test_wildcards_match_any_byte():
+    signature = Signature("48 8B ?? 05 ?? 90")
+    data = bytes.fromhex("00488B000590 90 488B7705AA90 488B770690".replace(" ", ""))
+    assert signature.find_all(data) == [1, 7]
+    with pytest.raises(SignatureError):
+        parse_signature("?? ??")
+
+
+@pytest.fixture
+def game():
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]))
+    game.signature_at = build_module_image(game, text_end=0x40000)
+    return game
+
+
+def test_base_offset_is_found_and_cached_per_build(game, tmp_path):
+    cache_file = str(tmp_path / "signature_cache.json")
+    process = SimulatedBackend(game).attach(game.process_name)
+    assert find_base_offset(process, signature_text=SIGNATURE, cache_file=cache_file) == game.base_offset
+    with open(cache_file) as f:
+        assert list(json.load(f).values()) == [game.base_offset]
+
+    # A cached build is not scanned again: hide the instruction and still get the offset.
+    at = game.signature_at
+    game.module_image[at:at + 3] = bytes(3)
+    assert find_base_offset(process, signature_text=SIGNATURE, cache_file=cache_file) == game.base_offset
+    # Another build (PE timestamp) is scanned.
+    build_module_image(game, timestamp=0x65F0_9999, text_end=0x40000)
+    game.module_image[at:at + 3] = bytes(3)
+    with pytest.raises(SignatureError):
+        find_base_offset(process, signature_text=SIGNATURE, cache_file=cache_file)
+
+
+def test_ambiguous_signature_is_rejected(game, tmp_path):
+    at = game.signature_at
+    game.module_image[at + 0x100:at + 0x10E] = game.module_image[at:at + 14]
+    process = SimulatedBackend(game).attach(game.process_name)
+    with pytest.raises(SignatureError):
+        find_base_offset(process, signature_text=SIGNATURE, cache_file=str(tmp_path / "cache.json"))
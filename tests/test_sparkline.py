@@ -0,0 +1,93 @@
+from math import isnan
+from os import environ
+
+import pytest
+
+environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+pytest.importorskip("PyQt5")
+
+from PyQt5.QtWidgets import QApplication
+
+import gui_qt
+from gui_qt import HpSparkline
+
+
+@pytest.fixture(scope="module")
+def app():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(gui_qt, "monotonic", lambda: now[0])
+    return now
+
+
+# Records the repaint requests instead of only scheduling them.
+class RecordingSparkline(HpSparkline):
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.updates = []
+
+    def update(self, *args):
+        self.updates.append(args[0] if args else None)
+        super().update(*args)
+
+
+def values(sparkline):
+    return [None if isnan(value) else round(value, 3) for value in sparkline._values]
+
+
+def test_slots_hold_the_lowest_hp_and_carry_the_latest_over(app, clock):
+    # 10 slots of 1 s.
+    sparkline = HpSparkline(10, 1.0)
+    sparkline.add_sample(900.0, 1000.0, 600.0)
+    sparkline.add_sample(500.0, 1000.0, 600.0)
+    sparkline.add_sample(800.0, 1000.0, 600.0)
+    clock[0] += 1
+    sparkline.add_sample(700.0, 1000.0, 600.0)
+    # Two slots without a sample repeat the latest HP.
+    clock[0] += 3
+    sparkline.add_sample(650.0, 1000.0, 600.0)
+    assert values(sparkline) == [0.5, 0.7, 0.7, 0.7] + [None] * 6
+    assert sparkline._threshold == 0.6
+
+    # After a full period the ring wraps around.
+    clock[0] += 10
+    sparkline.add_sample(650.0, 1000.0, 600.0)
+    assert values(sparkline) == [0.65] * 10
+
+
+def test_frame_repaints_only_the_new_slots(app, clock):
+    sparkline = RecordingSparkline(10, 1.0)
+    sparkline.resize(100, sparkline.height())
+    sparkline.show()
+    sparkline.add_sample(900.0, 1000.0, 600.0)
+    for _ in range(4):
+        clock[0] += 1
+        sparkline.add_sample(900.0, 1000.0, 600.0)
+    sparkline.updates.clear()
+    clock[0] += 1
+    sparkline.frame()
+    rect = sparkline.updates[-1]
+    assert rect is not None
+    assert 0 < rect.width() < sparkline.width() // 2
+    assert rect.height() == sparkline.height()
+
+    # A gap longer than the whole sparkline repaints all of it.
+    clock[0] += 20
+    sparkline.frame()
+    assert sparkline.updates[-1] is None
+    sparkline.hide()
+
+
+def test_no_hp_stops_the_frames(app, clock):
+    sparkline = HpSparkline(10, 1.0)
+    sparkline.show()
+    sparkline.add_sample(900.0, 1000.0, 600.0)
+    assert sparkline._frame_timer.isActive()
+    sparkline.add_sample(None, None, None)
+    sparkline.frame()
+    assert not sparkline._frame_timer.isActive()
+    sparkline.hide()
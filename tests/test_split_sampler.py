@@ -0,0 +1,73 @@
+from time import sleep
+
+from bench_chain_failover import make_game
+from helpers import AlwaysEnabled, StatusVar, wait_for
+
+import config
+from focus_tracker import ScriptedFocusTracker
+from input_injector import RecordingInjector
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from user_config import UserConfig
+from worker import AutoPotionWorker
+
+
+def split_worker(game, **kwargs):
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(),
+                              user_cfg=UserConfig({"SPLIT_SAMPLER_THREAD": True, "STABLE_HP_DURATION": 0.2}),
+                              memory_backend=SimulatedBackend(game), **kwargs)
+    worker.daemon = True
+    worker.start()
+    return worker
+
+
+def test_sampler_thread_presses_the_key_and_the_worker_logs_it():
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0), (0.5, 1000.0), (0.6, 300.0), (10.0, 300.0)], loop=False))
+    injector = RecordingInjector()
+    logged = []
+    worker = split_worker(game, input_injector=injector, add_potion_log_callback=lambda hp, max_hp: logged.append((hp, max_hp)))
+    try:
+        assert wait_for(lambda: worker._sampler is not None)
+        assert wait_for(lambda: len(logged) >= 2)
+        assert logged[0] == (300.0, 1000.0)
+        assert len(injector.sent) >= len(logged)
+    finally:
+        worker.stop()
+        worker.join(5.0)
+    assert worker._sampler is None
+
+
+def test_sampler_stops_reading_while_the_game_is_not_focused():
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]))
+    tracker = ScriptedFocusTracker(True)
+    worker = split_worker(game, input_injector=RecordingInjector(), focus_tracker_factory=lambda process: tracker)
+    try:
+        assert wait_for(lambda: worker.sampling_stats.total_samples >= 3)
+        tracker.set_foreground(False)
+        assert wait_for(lambda: worker._sampler is not None and worker._sampler.target is not None
+                        and not worker._sampler.target.active)
+        sleep(0.05)
+        samples = worker.sampling_stats.total_samples
+        sleep(0.3)
+        assert worker.sampling_stats.total_samples == samples
+        tracker.set_foreground(True)
+        assert wait_for(lambda: worker.sampling_stats.total_samples > samples)
+    finally:
+        worker.stop()
+        worker.join(5.0)
+
+
+def test_housekeeping_fails_over_while_the_sampler_keeps_reading():
+    game = make_game()
+    worker = split_worker(game, input_injector=RecordingInjector())
+    try:
+        assert wait_for(lambda: worker.sampling_stats.total_samples >= 3)
+        game.break_chain(config.POINTER_CHAINS[0][0])
+        # Found by the periodic re-resolution (every _ADDRESS_CHECK_INTERVAL seconds).
+        assert wait_for(lambda: worker.pointer_counts()[1] == 1, timeout=worker._ADDRESS_CHECK_INTERVAL + 2.0)
+        samples = worker.sampling_stats.total_samples
+        assert wait_for(lambda: worker.sampling_stats.total_samples > samples + 3)
+        assert worker._pointer_resolver.winner == 1
+        assert worker._hp_final_addr == game.hp_addr
+    finally:
+        worker.stop()
+        worker.join(5.0)
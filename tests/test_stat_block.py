@@ -0,0 +1,59 @@
+import pytest
+
+from bench_stat_block import FIELDS, MAX_HP, WOUNDED_CURVE, make_game
+from helpers import AlwaysEnabled, StatusVar, wait_for
+
+import config
+from input_injector import RecordingInjector
+from memory_backend import SimulatedBackend
+from stat_block import StatBlockError, StatBlockLayout, StatBlockReader
+from user_config import UserConfig
+from worker import AutoPotionWorker
+
+
+def test_layout_packs_fields_by_offset_with_padding():
+    layout = StatBlockLayout({"mana": (0x20, "float"), "hp": (0x0, "float"), "level": (-0x8, "int32"),
+                              "max_hp": (0x4, "f")})
+    assert layout.names == ("level", "hp", "max_hp", "mana")
+    assert layout.start == -0x8
+    assert layout.struct.format == "<i4xff24xf"
+    assert layout.size == 0x2C
+    assert (layout.hp_index, layout.max_hp_index) == (1, 2)
+    assert StatBlockLayout.from_config({}) is None
+
+
+@pytest.mark.parametrize("fields", [
+    {"max_hp": (0x4, "float")},                         # no hp
+    {"hp": (0x4, "float")},                             # hp not at the HP address
+    {"hp": (0x0, "double"), "max_hp": (0x4, "float")},  # overlap
+    {"hp": (0x0, "float"), "mana": (0x8, "half")},      # unknown type
+])
+def test_invalid_layouts_are_rejected(fields):
+    with pytest.raises(StatBlockError):
+        StatBlockLayout(fields)
+
+
+def test_reader_decodes_the_block_in_one_read():
+    game = make_game([(0.0, 700.0)])
+    process = SimulatedBackend(game).attach(config.PROCESS_NAME)
+    layout = StatBlockLayout(FIELDS)
+    reader = StatBlockReader(layout, process)
+    assert dict(zip(layout.names, reader.read(game.hp_addr))) == {"hp": 700.0, "max_hp": MAX_HP, "ward": 120.0, "mana": 80.0}
+
+
+def test_worker_uses_the_games_max_hp_from_the_first_sample(monkeypatch):
+    monkeypatch.setattr(config, "STAT_BLOCK_FIELDS", FIELDS)
+    injector = RecordingInjector()
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=UserConfig({}),
+                              memory_backend=SimulatedBackend(make_game(WOUNDED_CURVE)), input_injector=injector)
+    worker.daemon = True
+    worker.start()
+    try:
+        # Attached at 700 HP, but the threshold is 60% of the real max HP.
+        assert wait_for(lambda: worker._max_hp is not None)
+        assert (worker._max_hp, worker._threshold) == (MAX_HP, MAX_HP * 0.6)
+        # The hit to 500 HP is below it.
+        assert wait_for(lambda: injector.sent)
+    finally:
+        worker.stop()
+        worker.join(5.0)
@@ -0,0 +1,100 @@
+import pytest
+
+from helpers import AlwaysEnabled, StatusVar, wait_for
+
+from input_injector import RecordingInjector
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from trigger_rules import RuleEngine, RuleError, parse_rule, rules_from_user_config
+from user_config import UserConfig
+from worker import AutoPotionWorker
+
+FIELDS = {"hp": 0, "mana": 1}
+
+
+def engine(*texts):
+    rules = [parse_rule(f"RULE_{i + 1}", text) for i, text in enumerate(texts)]
+    return RuleEngine(rules, FIELDS, RecordingInjector)
+
+
+def test_parse_rule():
+    rule = parse_rule("RULE_1", "hp < 30% 2 0.5")
+    assert (rule.field, rule.comparator, rule.value, rule.percent, rule.key, rule.cooldown) == \
+        ("hp", "<", pytest.approx(0.3), True, "2", 0.5)
+    rule = parse_rule("RULE_2", "Mana >= 40 num 3 1")
+    assert (rule.field, rule.comparator, rule.value, rule.percent, rule.key) == ("mana", ">=", 40.0, False, "num 3")
+
+
+@pytest.mark.parametrize("text", [
+    "hp < 30%",                 # too few tokens
+    "hp == 30 2 0.5",           # unknown comparator
+    "hp < lots 2 0.5",          # value not a number
+    "hp < 30 2 soon",           # cooldown not a number
+    "mana < 40% 3 1.0",         # % only for hp
+])
+def test_parse_rule_rejects(text):
+    with pytest.raises(RuleError):
+        parse_rule("RULE_1", text)
+
+
+def test_rules_from_user_config_orders_by_number_and_skips_other_keys():
+    rules = rules_from_user_config({"RULE_10": "hp < 10 3 1", "POTION_KEY": "1", "RULE_2": "hp < 20 2 1",
+                                    "RULE_3": " "})
+    assert [rule.name for rule in rules] == ["RULE_2", "RULE_10"]
+
+
+def test_unknown_field_is_rejected_when_compiling():
+    with pytest.raises(RuleError):
+        RuleEngine([parse_rule("RULE_1", "ward < 10 2 1")], FIELDS, RecordingInjector)
+
+
+def test_absolute_rule_fires_below_its_limit_and_respects_cooldown():
+    rules = engine("hp < 500 2 1.0")
+    assert rules.evaluate((600.0, 0.0), 10.0, 0) == 0
+    assert rules.evaluate((400.0, 0.0), 10.0, 0) == 1
+    assert rules.evaluate((400.0, 0.0), 10.5, 0) == 0
+    assert rules.evaluate((400.0, 0.0), 11.0, 0) == 1
+    assert rules.fired == [2]
+    assert len(rules.injectors[0].sent) == 2
+
+
+def test_percent_rule_waits_for_max_hp():
+    rules = engine("hp < 30% 2 0")
+    assert rules.evaluate((100.0, 0.0), 10.0, 0) == 0
+    rules.set_max_hp(1000.0)
+    assert rules.evaluate((299.0, 0.0), 11.0, 0) == 1
+    assert rules.evaluate((300.0, 0.0), 12.0, 0) == 0
+    rules.set_max_hp(None)
+    assert rules.evaluate((100.0, 0.0), 13.0, 0) == 0
+
+
+def test_comparators_and_shared_injectors():
+    rules = engine("mana <= 40 3 0", "mana > 90 3 0", "hp >= 1000 4 0")
+    assert len(rules.injectors) == 2
+    assert rules.evaluate((1000.0, 40.0), 10.0, 0) == 2
+    assert rules.evaluate((999.0, 95.0), 11.0, 0) == 1
+    assert rules.fired == [1, 1, 1]
+
+
+def test_worker_presses_rule_keys_and_logs_them():
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0), (0.3, 1000.0), (0.4, 250.0), (10.0, 250.0)], loop=False))
+    injectors = {}
+
+    def injector_factory(key, kind):
+        return injectors.setdefault(key, RecordingInjector(key))
+
+    logged = []
+    # The main rule (key 1, 60%) and an emergency key below 30%.
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(),
+                              add_potion_log_callback=lambda hp, max_hp: logged.append(hp),
+                              user_cfg=UserConfig({"RULE_1": "hp < 30% 2 0.5"}),
+                              memory_backend=SimulatedBackend(game), injector_factory=injector_factory)
+    worker.daemon = True
+    worker.start()
+    try:
+        assert wait_for(lambda: len(injectors.get("2", RecordingInjector()).sent) >= 2)
+    finally:
+        worker.stop()
+        worker.join(5.0)
+    assert worker.rule_keys_sent == len(injectors["2"].sent)
+    assert worker.potions_used == len(injectors["1"].sent)
+    assert logged and set(logged) == {250.0}
@@ -0,0 +1,53 @@
+import numpy
+import pytest
+
+# The benchmark's random trace and its replay through AutoPotionWorker.
+from bench_tuner import generate_trace, replay_worker
+
+from hp_trace import HpTraceReader
+from tuner import learned_max_hp, parse_grid, sweep_traces
+
+
+@pytest.fixture(scope="module")
+def trace(tmp_path_factory):
+    file_path = str(tmp_path_factory.mktemp("tuner") / "hp_trace.bin")
+    generate_trace(file_path, 0.25)
+    return file_path
+
+
+def test_parse_grid():
+    assert list(parse_grid("0.1:0.3:0.1")) == [0.1, 0.2, 0.3]
+    assert list(parse_grid("1,2.5")) == [1.0, 2.5]
+
+
+def test_learned_max_hp_follows_the_stable_hp_rule():
+    timestamps = numpy.arange(12) * 1.0
+    hp = numpy.array([0, 500, 500, 500, 400, 400, 400, 400, 600, 600, 600, 600], dtype=numpy.float64)
+    # Quick (1 s) stable reads raise max HP, a read stable for 3 s sets it even if lower.
+    max_hp = learned_max_hp(timestamps, hp, 3.0)
+    assert numpy.isnan(max_hp[:2]).all()
+    assert list(max_hp[2:]) == [500, 500, 500, 500, 500, 400, 400, 600, 600, 600]
+
+
+def test_sweep_matches_the_worker(trace):
+    thresholds = parse_grid("0.3:0.7:0.2")
+    cooldowns = parse_grid("0.1,0.2,0.75")
+    stable_durations = parse_grid("2,5")
+    result = sweep_traces([trace], thresholds, cooldowns, stable_durations)
+    assert result["potions"].shape == (2, 3, 3)
+    for si, stable in enumerate(stable_durations):
+        for ti, threshold in enumerate(thresholds):
+            for ci, cooldown in enumerate(cooldowns):
+                assert result["potions"][si, ti, ci] == replay_worker(trace, threshold, cooldown, stable)
+    # More potions with a higher threshold or a shorter cooldown.
+    assert (numpy.diff(result["potions"], axis=1) >= 0).all()
+    assert (numpy.diff(result["potions"], axis=2) <= 0).all()
+
+
+def test_time_below_and_min_hp(trace):
+    result = sweep_traces([trace], numpy.array([0.5, 1.01]), numpy.array([0.2]), numpy.array([1.0]))
+    with HpTraceReader(trace) as reader:
+        duration = reader[-1][0] - reader[0][0]
+    below_half, below_all = result["time_below"][0, :, 0]
+    assert 0 < below_half < below_all <= duration
+    assert 0 < result["min_hp_pct"][0, 0, 0] < 0.5
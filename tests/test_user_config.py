@@ -0,0 +1,66 @@
+from os import utime
+
+from time import monotonic
+
+from helpers import AlwaysEnabled, StatusVar, wait_for
+
+import config
+from input_injector import RecordingInjector
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from user_config import KEYS, ConfigWatcher, UserConfig
+from worker import AutoPotionWorker
+
+
+def test_values_are_typed_and_invalid_ones_fall_back_to_defaults():
+    cfg = UserConfig({"THRESHOLD_PCT": "0.5", "POTION_COOLDOWN": "-1", "MULTIBOX": "true"})
+    assert cfg.THRESHOLD_PCT == 0.5
+    assert cfg.POTION_COOLDOWN == config.POTION_COOLDOWN
+    assert cfg.MULTIBOX is True
+
+
+def test_changed_keys():
+    cfg = UserConfig({"THRESHOLD_PCT": "0.5", "RULE_1": "hp < 30% 2 0.5"})
+    assert cfg.changed_keys(UserConfig({"THRESHOLD_PCT": "0.50", "RULE_1": "hp < 30% 2 0.5"})) == set()
+    assert cfg.changed_keys(UserConfig({"THRESHOLD_PCT": "0.4", "RULE_1": "hp < 30% 2 0.5"})) == {"THRESHOLD_PCT"}
+    assert cfg.changed_keys(UserConfig({"THRESHOLD_PCT": "0.5"})) == {"RULE_1"}
+    assert cfg.changed_keys(None) == set(KEYS) | {"RULE_1"}
+
+
+def test_watcher_reloads_after_the_file_changes(tmp_path):
+    ini = tmp_path / "config_user.ini"
+    ini.write_text("[Potion]\nTHRESHOLD_PCT = 0.5\n")
+    reloaded = []
+    watcher = ConfigWatcher(reloaded.append, file_path=str(ini), interval=0.01)
+    watcher.daemon = True
+    watcher.start()
+    try:
+        ini.write_text("[Potion]\nTHRESHOLD_PCT = 0.4\n")
+        # Some file systems keep the modification time for a quick rewrite.
+        utime(ini, ns=(0, 10 ** 18))
+        assert wait_for(lambda: reloaded)
+        cfg = reloaded[0]
+        assert cfg.THRESHOLD_PCT == 0.4
+        assert cfg.changed_keys(UserConfig({"THRESHOLD_PCT": "0.5"})) == {"THRESHOLD_PCT"}
+    finally:
+        watcher.stop()
+
+
+def test_reload_reaches_a_worker_waiting_for_the_game(monkeypatch):
+    monkeypatch.setattr(config, "WAIT_INTERVAL_PROCESS", 30)
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]))
+    game.terminate()
+    worker = AutoPotionWorker(StatusVar(), StatusVar(), AlwaysEnabled(), user_cfg=UserConfig({}),
+                              memory_backend=SimulatedBackend(game), input_injector=RecordingInjector())
+    worker.daemon = True
+    worker.start()
+    try:
+        assert wait_for(lambda: worker.phase == "attaching")
+        cfg = UserConfig({"THRESHOLD_PCT": "0.4"})
+        start = monotonic()
+        worker.apply_user_config(cfg)
+        assert wait_for(lambda: worker.user_cfg is cfg, timeout=1.0)
+        assert monotonic() - start < 0.5
+        assert worker.phase == "attaching"
+    finally:
+        worker.stop()
+        worker.join(5.0)
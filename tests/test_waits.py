@@ -0,0 +1,63 @@
+from time import monotonic, sleep
+
+from helpers import StatusVar, ToggleFlag, wait_for
+
+from memory_backend import ScriptedHpCurve, SimulatedBackend, SimulatedGame
+from user_config import UserConfig
+from worker import AutoPotionWorker
+
+
+def idle_worker(flag):
+    game = SimulatedGame(ScriptedHpCurve([(0.0, 1000.0)]))
+    game.terminate()
+    status = StatusVar()
+    worker = AutoPotionWorker(status, StatusVar(), flag, user_cfg=UserConfig({}), memory_backend=SimulatedBackend(game))
+    worker.daemon = True
+    return worker, status
+
+
+def test_disabled_worker_blocks_instead_of_polling():
+    worker, _ = idle_worker(ToggleFlag(False))
+    worker.start()
+    try:
+        sleep(0.1)
+        worker.wakeups_per_second()
+        sleep(1.0)
+        # One wakeup per _MAX_BLOCKING_WAIT at most, not one per 10 ms.
+        assert worker.wakeups_per_second() <= 2.0
+    finally:
+        worker.stop()
+        worker.join(5.0)
+
+
+def test_toggle_reaches_a_blocked_worker_at_once():
+    flag = ToggleFlag(False)
+    worker, status = idle_worker(flag)
+    worker.start()
+    try:
+        sleep(0.1)
+        flag.enabled = True
+        worker.wake()
+        assert wait_for(lambda: worker.phase == "attaching", timeout=0.2)
+        sleep(0.1)
+
+        # Waiting for the game (up to WAIT_INTERVAL_PROCESS between checks) ends on toggle off too.
+        flag.enabled = False
+        started = monotonic()
+        worker.wake()
+        assert wait_for(lambda: status.get() == "Auto Potion: OFF", timeout=0.2)
+        assert monotonic() - started < 0.2
+    finally:
+        worker.stop()
+        worker.join(5.0)
+
+
+def test_stop_ends_a_long_wait():
+    worker, _ = idle_worker(ToggleFlag(True))
+    worker.start()
+    assert wait_for(lambda: worker.phase == "attaching")
+    started = monotonic()
+    worker.stop()
+    worker.join(5.0)
+    assert not worker.is_alive()
+    assert monotonic() - started < 0.5